@@ -1,17 +1,20 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from core_apps.media.derivatives import derivative_urls
+from core_apps.media.uploads import normalize_image_upload
 from core_apps.mitglieder.models import Mitglied
 from .models import Anwesenheitsliste, AnwesenheitslisteFoto
 
 
 class AnwesenheitslisteFotoSerializer(serializers.ModelSerializer):
     foto_url = serializers.SerializerMethodField(read_only=True)
+    foto_urls = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = AnwesenheitslisteFoto
-        fields = ["id", "foto", "foto_url", "created_at"]
-        read_only_fields = ["id", "foto_url", "created_at"]
+        fields = ["id", "foto", "foto_url", "foto_urls", "created_at"]
+        read_only_fields = ["id", "foto_url", "foto_urls", "created_at"]
 
     def get_foto_url(self, obj):
         f = getattr(obj, "foto", None)
@@ -20,6 +23,9 @@ class AnwesenheitslisteFotoSerializer(serializers.ModelSerializer):
         except Exception:
             return None
 
+    def get_foto_urls(self, obj):
+        return derivative_urls(getattr(obj, "foto", None))
+
 
 class NullableDateField(serializers.DateField):
     def to_internal_value(self, value):
@@ -70,7 +76,7 @@ class AnwesenheitslisteSerializer(serializers.ModelSerializer):
         for f in request.FILES.getlist("fotos_doku"):
             AnwesenheitslisteFoto.objects.create(
                 anwesenheitsliste=instance,
-                foto=f,
+                foto=normalize_image_upload(f),
             )
 
     def create(self, validated_data):
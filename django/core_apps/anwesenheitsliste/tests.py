@@ -64,6 +64,23 @@ class AnwesenheitslisteEndpointTests(EndpointSmokeMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("mitglieder", response.data)
 
+    def test_context_revalidates_with_etag(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.request_method("get", "anwesenheitsliste/context/")
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+        cached = self.client.get(
+            self.build_api_url("anwesenheitsliste/context/"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.mitglied.vorname = "Anne"
+        self.mitglied.save()
+        changed = self.client.get(
+            self.build_api_url("anwesenheitsliste/context/"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+
     def test_context_excludes_reserve_members(self):
         Mitglied.objects.create(
             stbnr=78,
@@ -8,9 +8,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
+from core_apps.common.http_cache import CACHE_PRIVATE, CachePolicyMixin
 from core_apps.common.permissions import HasAnyRolePermission
-from core_apps.mitglieder.models import Mitglied
-from core_apps.mitglieder.serializers import MitgliedSerializer
+from core_apps.mitglieder.directory import snapshot as mitglieder_snapshot
 
 from .models import Anwesenheitsliste
 from .serializers import AnwesenheitslisteSerializer
@@ -70,17 +70,12 @@ class AnwesenheitslisteViewSet(ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class AnwesenheitslisteContextView(APIView):
+class AnwesenheitslisteContextView(CachePolicyMixin, APIView):
     permission_classes = [
         permissions.IsAuthenticated,
         HasAnyRolePermission.with_roles("ADMIN", "ANWESENHEIT"),
     ]
+    cache_policy = CACHE_PRIVATE
 
     def get(self, request):
-        mitglieder = MitgliedSerializer(
-            Mitglied.objects.exclude(
-                dienststatus__in=[Mitglied.Dienststatus.ABGEMELDET, Mitglied.Dienststatus.RESERVE]
-            ),
-            many=True,
-        ).data
-        return Response({"mitglieder": mitglieder})
+        return Response({"mitglieder": mitglieder_snapshot("im_dienst")})
@@ -13,8 +13,7 @@ from .serializers import AtemschutzGeraetSerializer, AtemschutzGeraetProtokollSe
 from core_apps.common.permissions import HasAnyRolePermission
 from core_apps.fmd.models import FMD
 from core_apps.fmd.serializers import FMDSerializer
-from core_apps.mitglieder.models import Mitglied
-from core_apps.mitglieder.serializers import MitgliedSerializer
+from core_apps.mitglieder.directory import snapshot as mitglieder_snapshot
     
 class AtemschutzGeraeteViewSet(ModelViewSet):
     queryset = AtemschutzGeraet.objects.all().order_by("inv_nr")
@@ -142,10 +141,7 @@ class AtemschutzGeraeteViewSet(ModelViewSet):
             item["naechste_pruefung_10jahre"] = naechste_zehnjahre
 
         fmd = FMDSerializer(FMD.objects.all(), many=True).data
-        mitglieder = MitgliedSerializer(
-            Mitglied.objects.exclude(dienststatus=Mitglied.Dienststatus.RESERVE),
-            many=True,
-        ).data
+        mitglieder = mitglieder_snapshot("ohne_reserve")
         return Response({"main": geraete, "fmd": fmd, "mitglieder": mitglieder})
 
 class AtemschutzGeraeteProtokollViewSet(ModelViewSet):
@@ -224,8 +220,5 @@ class AtemschutzGeraeteDienstbuchViewSet(ModelViewSet):
 
     def list(self, request, *args, **kwargs):
         resp = super().list(request, *args, **kwargs)
-        mitglieder = MitgliedSerializer(
-            Mitglied.objects.exclude(dienststatus=Mitglied.Dienststatus.RESERVE),
-            many=True,
-        ).data
+        mitglieder = mitglieder_snapshot("ohne_reserve")
         return Response({"protokoll": resp.data, "mitglieder": mitglieder})
@@ -0,0 +1,164 @@
+import datetime
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+CATALOG_DIR_NAME = ".catalog"
+CATALOG_FORMAT_VERSION = 1
+
+ORDERING_FIELDS = ("created_at", "name", "size", "version")
+
+
+class HashingWriter:
+    """
+    Write-only Wrapper, der beim Schreiben sha256 mitrechnet. ZipFile erkennt die fehlende
+    seek()-Unterstützung und schreibt sequentiell (Data Descriptors), die Prüfsumme ist damit
+    ohne zweiten Lesedurchgang über das fertige Archiv verfügbar.
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+        self._digest = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self._digest.update(data)
+        return self._fp.write(data)
+
+    def flush(self) -> None:
+        self._fp.flush()
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def version_from_name(name: str) -> str:
+    """backup_<version>_<YYYYmmdd>_<HHMMSS>.zip -> <version> (Altbestand ohne Katalogeintrag)."""
+    tokens = name.split("_")
+    return tokens[1] if len(tokens) > 1 else ""
+
+
+class BackupCatalog:
+    """
+    Sidecar-Index <backup_path>/.catalog/index.json mit den Metadaten aller Backups
+    (Größe, Version, Zeitpunkt, Prüfsumme, Zeilen je Tabelle, Anzahl Mediendateien).
+
+    Bewusst keine DB-Tabelle: ein Restore überschreibt die Datenbank. Zips, die ohne Katalog
+    entstanden sind (Altbestand, manuell kopiert), werden beim Lesen nachgetragen bzw. entfernt –
+    aber nur, wenn sich die mtime des Backup-Verzeichnisses geändert hat, das Listing bleibt so
+    unabhängig von der Anzahl der Archive ein einzelner Dateizugriff.
+    """
+
+    def __init__(self, backup_dir: str):
+        self.backup_dir = Path(backup_dir)
+        # Eigenes Unterverzeichnis: Schreiben des Index ändert so nicht die mtime von backup_dir
+        self.root = self.backup_dir / CATALOG_DIR_NAME
+        self.path = self.root / "index.json"
+        self.lock_path = self.root / "catalog.lock"
+
+    @contextmanager
+    def _locked(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {"format": CATALOG_FORMAT_VERSION, "dir_mtime_ns": None, "backups": {}}
+        data.setdefault("backups", {})
+        return data
+
+    def _save(self, data: dict) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def _entry_from_file(self, name: str) -> dict:
+        stat = (self.backup_dir / name).stat()
+        return {
+            "name": name,
+            "size": stat.st_size,
+            "version": version_from_name(name),
+            "created_at": datetime.datetime.fromtimestamp(stat.st_mtime, tz=datetime.timezone.utc).isoformat(),
+            "checksum": None,
+            "row_counts": None,
+            "media_files": None,
+        }
+
+    def _reconcile(self, data: dict) -> bool:
+        """Gleicht den Katalog mit den Zips im Verzeichnis ab. Returns True, wenn sich etwas geändert hat."""
+        dir_mtime_ns = self.backup_dir.stat().st_mtime_ns
+        if data.get("dir_mtime_ns") == dir_mtime_ns:
+            return False
+
+        data["dir_mtime_ns"] = dir_mtime_ns
+        names = {name for name in os.listdir(self.backup_dir) if name.endswith(".zip") and not name.startswith(".")}
+        backups = data["backups"]
+        for name in set(backups) - names:
+            del backups[name]
+        for name in names - set(backups):
+            backups[name] = self._entry_from_file(name)
+        return True
+
+    def entries(self) -> list:
+        with self._locked():
+            data = self._load()
+            if self._reconcile(data):
+                self._save(data)
+        return list(data["backups"].values())
+
+    def get(self, name: str) -> Optional[dict]:
+        return next((entry for entry in self.entries() if entry["name"] == name), None)
+
+    def names(self) -> list:
+        return [entry["name"] for entry in self.sorted_entries()]
+
+    def sorted_entries(self, ordering: str = "-created_at") -> list:
+        field = ordering.lstrip("-")
+        if field not in ORDERING_FIELDS:
+            raise ValueError(f"Sortierung erlaubt: {', '.join(ORDERING_FIELDS)}")
+        return sorted(
+            self.entries(),
+            key=lambda entry: (entry.get(field) is not None, entry.get(field) if entry.get(field) is not None else "", entry["name"]),
+            reverse=ordering.startswith("-"),
+        )
+
+    def add(self, entry: dict) -> None:
+        with self._locked():
+            data = self._load()
+            self._reconcile(data)
+            data["backups"][entry["name"]] = entry
+            self._save(data)
+
+    def remove(self, name: str) -> None:
+        with self._locked():
+            data = self._load()
+            self._reconcile(data)
+            data["backups"].pop(name, None)
+            self._save(data)
+
+    def expired(self, keep_count: int = 0, max_age_days: int = 0) -> list:
+        """
+        Namen der Backups außerhalb der Aufbewahrung: alles jenseits der `keep_count` neuesten
+        und alles älter als `max_age_days` (0 = Regel aus). Das neueste Backup bleibt immer erhalten.
+        """
+        entries = self.sorted_entries("-created_at")
+        expired = set()
+        if keep_count > 0:
+            expired.update(entry["name"] for entry in entries[keep_count:])
+        if max_age_days > 0:
+            cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=max_age_days)
+            expired.update(
+                entry["name"] for entry in entries[1:]
+                if datetime.datetime.fromisoformat(entry["created_at"]) < cutoff
+            )
+        return [entry["name"] for entry in entries if entry["name"] in expired]
@@ -0,0 +1,205 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.db import connection
+from django.utils import timezone
+
+from core_apps.common.logging_utils import log_exception
+
+logger = logging.getLogger(__name__)
+LOG_SOURCE = "backup"
+
+JOBS_DIR_NAME = ".jobs"
+LOCK_FILENAME = "backup.lock"
+PROGRESS_SAVE_INTERVAL = 0.5
+MAX_KEPT_JOBS = 50
+
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_threads = {}
+
+
+class BackupJobBusy(Exception):
+    """Es läuft bereits ein Backup oder Restore (auch in einem anderen gunicorn Worker)."""
+
+
+class JobProgress:
+    """Fortschritt eines laufenden Jobs, wird gedrosselt in die Statusdatei geschrieben."""
+
+    def __init__(self, store: "BackupJobStore", job: dict):
+        self._store = store
+        self._job = job
+        self._last_save = 0.0
+
+    def phase(self, name: str, **totals) -> None:
+        self._job["phase"] = name
+        self._job["progress"].update(totals)
+        self.save(force=True)
+
+    def update(self, **values) -> None:
+        self._job["progress"].update(values)
+        self.save()
+
+    def add(self, **increments) -> None:
+        progress = self._job["progress"]
+        for key, value in increments.items():
+            progress[key] = progress.get(key, 0) + value
+        self.save()
+
+    def save(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if force or now - self._last_save >= PROGRESS_SAVE_INTERVAL:
+            self._last_save = now
+            self._store.save(self._job)
+
+
+class BackupJobStore:
+    """
+    Statusdateien für Backup-/Restore-Jobs unter <backup_path>/.jobs/<id>.json.
+
+    Bewusst keine DB-Tabelle: ein Restore leert und befüllt die Datenbank neu und würde den
+    eigenen Job-Eintrag überschreiben. Ein exklusiver flock auf .jobs/backup.lock stellt sicher,
+    dass prozessübergreifend immer nur ein Backup oder Restore läuft.
+    """
+
+    def __init__(self, backup_dir: str):
+        self.root = Path(backup_dir) / JOBS_DIR_NAME
+        self.lock_path = self.root / LOCK_FILENAME
+
+    def _path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.json"
+
+    def save(self, job: dict) -> None:
+        job["updated_at"] = timezone.now().isoformat()
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(job["id"])
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(job), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _acquire_lock(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    @staticmethod
+    def _release_lock(lock_file) -> None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+    def is_busy(self) -> bool:
+        lock_file = self._acquire_lock()
+        if lock_file is None:
+            return True
+        self._release_lock(lock_file)
+        return False
+
+    def get(self, job_id: str) -> Optional[dict]:
+        if not job_id or not all(c.isalnum() for c in job_id):
+            return None
+        try:
+            job = json.loads(self._path(job_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # "running" ohne gehaltenen Lock -> der Prozess ist während des Jobs gestorben
+        if job["status"] == STATUS_RUNNING and not self.is_busy():
+            job["status"] = STATUS_FAILED
+            job["error"] = "Job wurde unterbrochen."
+            job["finished_at"] = timezone.now().isoformat()
+            self.save(job)
+        return job
+
+    def list(self, limit: int = 20) -> list:
+        if not self.root.exists():
+            return []
+        paths = sorted(self.root.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        jobs = [self.get(path.stem) for path in paths[:limit]]
+        return [job for job in jobs if job is not None]
+
+    def start(self, kind: str, target: Callable[[JobProgress], dict], params: dict, background: bool) -> dict:
+        """
+        Startet `target(progress)` als Job. Mit `background` in einem eigenen Thread (Rückgabe sofort,
+        Status über `get`), sonst im aufrufenden Thread. Raises BackupJobBusy, wenn bereits ein Job läuft.
+        """
+        lock_file = self._acquire_lock()
+        if lock_file is None:
+            raise BackupJobBusy()
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": STATUS_RUNNING,
+            "phase": "",
+            "params": params,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "created_at": timezone.now().isoformat(),
+            "finished_at": None,
+        }
+        try:
+            self.save(job)
+        except BaseException:
+            self._release_lock(lock_file)
+            raise
+
+        def _execute():
+            try:
+                job["result"] = target(JobProgress(self, job))
+                job["status"] = STATUS_DONE
+            except Exception as e:
+                job["status"] = STATUS_FAILED
+                job["error"] = str(e) or e.__class__.__name__
+                log_exception(logger, LOG_SOURCE, "backup_job_failed", job_id=job["id"], kind=kind)
+            finally:
+                job["finished_at"] = timezone.now().isoformat()
+                try:
+                    self.save(job)
+                finally:
+                    self._release_lock(lock_file)
+                    if background:
+                        connection.close()
+                        # Fertige Threads nicht für die Lebensdauer des Workers festhalten
+                        _threads.pop(job["id"], None)
+
+        self._prune()
+        if not background:
+            _execute()
+            return job
+
+        snapshot = json.loads(json.dumps(job))
+        # Kein Daemon-Thread: ein laufender Restore soll einen geordneten Worker-Shutdown nicht abbrechen
+        thread = threading.Thread(target=_execute, name=f"backup-job-{job['id'][:8]}")
+        _threads[job["id"]] = thread
+        thread.start()
+        return snapshot
+
+    def _prune(self) -> None:
+        paths = sorted(self.root.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in paths[MAX_KEPT_JOBS:]:
+            path.unlink(missing_ok=True)
+
+
+def wait_for_job(job_id: str, timeout: Optional[float] = None) -> None:
+    """
+    Wartet auf einen im aktuellen Prozess gestarteten Hintergrund-Job (Tests, Management Commands).
+    Beendete Jobs sind nicht mehr registriert, dann kehrt der Aufruf sofort zurück.
+    """
+    thread = _threads.pop(job_id, None)
+    if thread is not None:
+        thread.join(timeout)
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Set, Tuple
+
+STORE_DIR_NAME = ".media_store"
+MANIFEST_ARCNAME = "media_manifest.json"
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class MissingMediaBlobs(Exception):
+    """Inkrementelles Backup verweist auf Blobs, die im Medienspeicher fehlen."""
+
+    def __init__(self, paths: list):
+        self.paths = paths
+        super().__init__(
+            f"Backup unvollständig: {len(paths)} Mediendateien fehlen im Medienspeicher "
+            f"({', '.join(paths[:5])}{', ...' if len(paths) > 5 else ''})."
+        )
+
+
+class MediaBlobStore:
+    """
+    Deduplizierter Speicher für Mediendateien über alle Backups hinweg.
+
+      <root>/blobs/ab/abcdef...   Dateiinhalt, adressiert über sha256 (jeder Inhalt nur einmal)
+      <root>/index.json           relpath -> size, mtime_ns, sha256 (spart Re-Hashing unveränderter Dateien)
+
+    Ein inkrementelles Backup enthält statt der Dateien nur ein Manifest (Pfad, Größe, mtime, Hash),
+    das beim Restore wieder auf die Blobs aufgelöst wird.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.index_path = self.root / "index.json"
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / digest
+
+    def _load_index(self) -> dict:
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self, index: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+
+    def _ingest(self, file_path: Path) -> Tuple[str, bool]:
+        """Hasht die Datei und legt sie (falls neu) im selben Lesedurchgang als Blob ab."""
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_name = tempfile.mkstemp(dir=self.blobs_dir, suffix=".tmp")
+        try:
+            with open(file_path, "rb") as source, os.fdopen(fd, "wb") as target:
+                for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    target.write(chunk)
+
+            sha = digest.hexdigest()
+            blob = self.blob_path(sha)
+            if blob.exists():
+                return sha, False
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_name, blob)
+            return sha, True
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+    def snapshot(self, media_dir: str, excluded_dirs: Iterable[str] = ()) -> Tuple[dict, dict]:
+        """
+        Erfasst den aktuellen Stand von `media_dir`. Returns (manifest, stats).
+        Nur neue/geänderte Dateien werden gelesen, nur unbekannte Inhalte belegen neuen Speicher.
+        """
+        index = self._load_index()
+        new_index = {}
+        files = []
+        stats = {"media_files": 0, "media_bytes": 0, "hashed_files": 0, "new_blobs": 0, "new_blob_bytes": 0}
+
+        for root, dirs, filenames in os.walk(media_dir):
+            if os.path.normpath(root) == os.path.normpath(media_dir):
+                dirs[:] = [d for d in dirs if d not in excluded_dirs]
+            for filename in filenames:
+                file_path = Path(root) / filename
+                relpath = file_path.relative_to(media_dir).as_posix()
+                stat = file_path.stat()
+
+                known = index.get(relpath)
+                if (
+                    known
+                    and known["size"] == stat.st_size
+                    and known["mtime_ns"] == stat.st_mtime_ns
+                    and self.blob_path(known["sha256"]).exists()
+                ):
+                    sha = known["sha256"]
+                else:
+                    sha, created = self._ingest(file_path)
+                    stats["hashed_files"] += 1
+                    if created:
+                        stats["new_blobs"] += 1
+                        stats["new_blob_bytes"] += stat.st_size
+
+                entry = {"path": relpath, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha}
+                new_index[relpath] = entry
+                files.append(entry)
+                stats["media_files"] += 1
+                stats["media_bytes"] += stat.st_size
+
+        self._save_index(new_index)
+        manifest = {"version": MANIFEST_VERSION, "files": files}
+        return manifest, stats
+
+    @staticmethod
+    def _unchanged(target: Path, entry: dict) -> bool:
+        try:
+            stat = target.stat()
+        except FileNotFoundError:
+            return False
+        return stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+    def missing(self, manifest: dict, media_dir: str) -> list:
+        """
+        Pfade des Manifests, die `restore` nicht herstellen könnte (weder unverändert vorhanden noch
+        als Blob gespeichert). Vor dem Restore prüfen, solange noch nichts überschrieben ist.
+        """
+        root = Path(media_dir).resolve()
+        missing = []
+        for entry in manifest.get("files", []):
+            target = Path(media_dir) / entry["path"]
+            if not target.resolve().is_relative_to(root):
+                missing.append(entry["path"])
+            elif not self._unchanged(target, entry) and not self.blob_path(entry["sha256"]).exists():
+                missing.append(entry["path"])
+        return missing
+
+    def restore(
+        self,
+        manifest: dict,
+        media_dir: str,
+        on_restored: Optional[Callable[[dict, bool], None]] = None,
+    ) -> Tuple[int, int, list]:
+        """
+        Stellt alle Dateien des Manifests in `media_dir` her. Dateien mit gleicher Größe und mtime
+        (setzt ein früherer Restore so) gelten als unverändert und werden nicht neu kopiert.
+        Returns (geschrieben, unverändert, fehlende Pfade).
+        `on_restored(entry, written)` wird nach jeder erledigten Datei aufgerufen (Fortschritt).
+        """
+        restored = 0
+        skipped = 0
+        missing = []
+        for entry in manifest.get("files", []):
+            relpath = entry["path"]
+            target = Path(media_dir) / relpath
+            if not target.resolve().is_relative_to(Path(media_dir).resolve()):
+                missing.append(relpath)
+                continue
+
+            if self._unchanged(target, entry):
+                skipped += 1
+                if on_restored is not None:
+                    on_restored(entry, False)
+                continue
+
+            blob = self.blob_path(entry["sha256"])
+            if not blob.exists():
+                missing.append(relpath)
+                continue
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Neue Datei statt Überschreiben: der Name kann ein Hardlink auf einen geteilten Blob sein
+            fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(blob, tmp_name)
+                os.utime(tmp_name, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+                os.replace(tmp_name, target)
+            finally:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
+            restored += 1
+            if on_restored is not None:
+                on_restored(entry, True)
+        return restored, skipped, missing
+
+    def collect_garbage(self, referenced: Set[str], min_age_seconds: int = 3600) -> int:
+        """
+        Löscht Blobs, die von keinem Manifest mehr referenziert werden.
+        Junge Blobs bleiben stehen, sie können zu einem gerade laufenden Backup gehören.
+        """
+        removed = 0
+        if not self.blobs_dir.exists():
+            return removed
+        cutoff = time.time() - min_age_seconds
+        for blob in self.blobs_dir.glob("*/*"):
+            if blob.is_file() and blob.name not in referenced and blob.stat().st_mtime < cutoff:
+                blob.unlink()
+                removed += 1
+        return removed
+
+
+def read_manifest(zipf: zipfile.ZipFile) -> Optional[dict]:
+    if MANIFEST_ARCNAME not in zipf.namelist():
+        return None
+    return json.loads(zipf.read(MANIFEST_ARCNAME).decode("utf-8"))
+
+
+def referenced_blobs(backup_dir: str) -> Set[str]:
+    referenced = set()
+    for name in os.listdir(backup_dir):
+        if not name.endswith(".zip"):
+            continue
+        # Fehler bewusst nicht abfangen: ein unlesbares Manifest darf nicht zum Löschen von Blobs führen
+        with zipfile.ZipFile(os.path.join(backup_dir, name)) as zipf:
+            manifest = read_manifest(zipf)
+        if manifest:
+            referenced.update(entry["sha256"] for entry in manifest.get("files", []))
+    return referenced
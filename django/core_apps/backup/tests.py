@@ -1,3 +1,5 @@
+import hashlib
+import io
 import os
 import subprocess
 import tempfile
@@ -6,9 +8,12 @@ from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import patch
 
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from core_apps.backup import jobs as backup_jobs
+from core_apps.backup.jobs import BackupJobStore, wait_for_job
 from core_apps.common.test_helpers import EndpointSmokeMixin
 
 
@@ -47,6 +52,8 @@ class BackupEndpointTests(EndpointSmokeMixin, APITestCase):
             "backup/restore/",
             "backup/file/",
             "backup/delete/",
+            "backup/jobs/",
+            "backup/catalog/",
         ]
 
         for endpoint in endpoints:
@@ -72,27 +79,66 @@ class BackupEndpointTests(EndpointSmokeMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("a.zip", response.data["backups"])
 
+    def _fake_pg_dump(self, output=b"-- sql dump", returncode=0):
+        def _popen(cmd, **kwargs):
+            return SimpleNamespace(stdout=io.BytesIO(output), wait=lambda: returncode)
+
+        return patch("core_apps.backup.views.subprocess.Popen", side_effect=_popen)
+
     def test_backup_post_creates_zip_backup(self):
         self.client.force_authenticate(user=self.admin)
         Path(self.tmp_uploads.name, "bild.png").write_bytes(b"img")
 
-        def _run_side_effect(cmd, **kwargs):
-            if "--file" in cmd:
-                sql_path = cmd[cmd.index("--file") + 1]
-                Path(sql_path).write_text("-- sql dump", encoding="utf-8")
-            return SimpleNamespace(stdout="")
-
-        with patch("core_apps.backup.views.subprocess.run", side_effect=_run_side_effect):
+        with self._fake_pg_dump():
             response = self.request_method("post", "backup/", data={})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("erfolgreich erstellt", response.data["msg"])
         self.assertTrue(any(name.endswith(".zip") for name in response.data["backups"]))
 
+    def test_backup_post_streams_dump_without_sql_file(self):
+        self.client.force_authenticate(user=self.admin)
+        dump = b"INSERT INTO x VALUES (1);\n" * 10000
+
+        with self._fake_pg_dump(output=dump):
+            response = self.request_method("post", "backup/", data={})
+
+        self.assertFalse(any(name.endswith(".sql") for name in os.listdir(self.tmp_backups.name)))
+        self.assertEqual(response.data["stats"]["sql_bytes"], len(dump))
+        zip_name = next(name for name in response.data["backups"] if name.endswith(".zip"))
+        with zipfile.ZipFile(Path(self.tmp_backups.name, zip_name)) as zipf:
+            sql_info = next(info for info in zipf.infolist() if info.filename.endswith(".sql"))
+            self.assertEqual(sql_info.compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(zipf.read(sql_info), dump)
+
+    def test_backup_post_removes_partial_zip_on_pg_dump_failure(self):
+        self.client.force_authenticate(user=self.admin)
+
+        with self._fake_pg_dump(output=b"partial", returncode=1):
+            response = self.request_method("post", "backup/", data={})
+
+        self.assertIn("Fehler beim Erstellen des Backups", response.data["msg"])
+        self.assertEqual([name for name in os.listdir(self.tmp_backups.name) if not name.startswith(".")], [])
+
+    def test_backup_post_skips_media_cache_dir(self):
+        self.client.force_authenticate(user=self.admin)
+        Path(self.tmp_uploads.name, "bild.png").write_bytes(b"img")
+        Path(self.tmp_uploads.name, "cache", "pdf").mkdir(parents=True)
+        Path(self.tmp_uploads.name, "cache", "pdf", "x.pdf").write_bytes(b"%PDF")
+
+        with self._fake_pg_dump():
+            self.request_method("post", "backup/", data={})
+
+        zip_name = next(name for name in os.listdir(self.tmp_backups.name) if name.endswith(".zip"))
+        with zipfile.ZipFile(Path(self.tmp_backups.name, zip_name)) as zipf:
+            names = zipf.namelist()
+        self.assertIn("uploaded_files/bild.png", names)
+        self.assertFalse(any(name.startswith("uploaded_files/cache/") for name in names))
+
     def test_backup_post_handles_pg_dump_error(self):
         self.client.force_authenticate(user=self.admin)
 
-        with patch("core_apps.backup.views.subprocess.run", side_effect=subprocess.CalledProcessError(1, "pg_dump")):
+        with patch("core_apps.backup.views.subprocess.Popen", side_effect=subprocess.CalledProcessError(1, "pg_dump")):
             response = self.request_method("post", "backup/", data={})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -165,6 +211,271 @@ class BackupEndpointTests(EndpointSmokeMixin, APITestCase):
         self.assertIn("erfolgreich wiederhergestellt", response.data["msg"])
         self.assertTrue(Path(self.tmp_uploads.name, "sub", "file.txt").exists())
 
+    def test_restore_media_is_differential(self):
+        self.client.force_authenticate(user=self.admin)
+        uploads = Path(self.tmp_uploads.name)
+        (uploads / "news").mkdir()
+        (uploads / "news" / "same.jpg").write_bytes(b"same")
+        (uploads / "news" / "changed.jpg").write_bytes(b"old!")
+        (uploads / "news" / "extra.jpg").write_bytes(b"not in backup")
+        os.utime(uploads / "news" / "same.jpg", (1, 1))
+
+        backup_name = "backup_test_20260106.zip"
+        with zipfile.ZipFile(Path(self.tmp_backups.name, backup_name), "w") as zipf:
+            zipf.writestr("uploaded_files/news/same.jpg", b"same")
+            zipf.writestr("uploaded_files/news/changed.jpg", b"new!")
+            zipf.writestr("uploaded_files/news/added.jpg", b"added")
+            zipf.writestr("uploaded_files/../escape.txt", b"x")
+
+        response = self.request_method("post", "backup/restore/", data={"backup": backup_name, "background": True})
+        wait_for_job(response.data["job"]["id"], timeout=10)
+        job = self.request_method("get", f"backup/jobs/{response.data['job']['id']}/").data
+
+        self.assertEqual(job["status"], "done")
+        self.assertNotIn(job["id"], backup_jobs._threads)
+        self.assertEqual(job["progress"]["files_total"], 3)
+        self.assertEqual(job["progress"]["files_skipped"], 1)
+        self.assertEqual((uploads / "news" / "same.jpg").stat().st_mtime, 1)
+        self.assertEqual((uploads / "news" / "changed.jpg").read_bytes(), b"new!")
+        self.assertEqual((uploads / "news" / "added.jpg").read_bytes(), b"added")
+        self.assertFalse((uploads / "news" / "extra.jpg").exists())
+        self.assertFalse(Path(self.tmp_uploads.name).parent.joinpath("escape.txt").exists())
+
+    def test_incremental_backup_stores_each_blob_once_and_restores(self):
+        self.client.force_authenticate(user=self.admin)
+        Path(self.tmp_uploads.name, "news").mkdir()
+        Path(self.tmp_uploads.name, "news", "a.jpg").write_bytes(b"photo-a")
+        Path(self.tmp_uploads.name, "news", "copy.jpg").write_bytes(b"photo-a")
+
+        with self._fake_pg_dump():
+            first = self.request_method("post", "backup/", data={"media_mode": "incremental"})
+        self.assertEqual(first.data["stats"]["new_blobs"], 1)
+        first_zip = next(name for name in first.data["backups"] if name.endswith(".zip"))
+        Path(self.tmp_backups.name, first_zip).rename(Path(self.tmp_backups.name, "backup_test_1.zip"))
+
+        Path(self.tmp_uploads.name, "news", "b.jpg").write_bytes(b"photo-b")
+        with self._fake_pg_dump():
+            second = self.request_method("post", "backup/", data={"media_mode": "incremental"})
+
+        self.assertEqual(second.data["stats"]["hashed_files"], 1)
+        self.assertEqual(second.data["stats"]["new_blobs"], 1)
+        self.assertNotIn(".media_store", second.data["backups"])
+        blobs = [p for p in Path(self.tmp_backups.name, ".media_store", "blobs").glob("*/*")]
+        self.assertEqual(len(blobs), 2)
+
+        def _run_side_effect(cmd, **kwargs):
+            return SimpleNamespace(stdout="")
+
+        with patch("core_apps.backup.views.subprocess.run", side_effect=_run_side_effect):
+            response = self.request_method("post", "backup/restore/", data={"backup": "backup_test_1.zip"})
+
+        self.assertIn("erfolgreich wiederhergestellt", response.data["msg"])
+        self.assertEqual(Path(self.tmp_uploads.name, "news", "copy.jpg").read_bytes(), b"photo-a")
+        self.assertFalse(Path(self.tmp_uploads.name, "news", "b.jpg").exists())
+
+        with patch("core_apps.backup.media_store.shutil.copyfile") as copyfile, patch(
+            "core_apps.backup.views.subprocess.run", side_effect=_run_side_effect
+        ):
+            self.request_method("post", "backup/restore/", data={"backup": "backup_test_1.zip"})
+        copyfile.assert_not_called()
+
+    def test_incremental_restore_refuses_missing_blobs_before_touching_database(self):
+        self.client.force_authenticate(user=self.admin)
+        Path(self.tmp_uploads.name, "news").mkdir()
+        Path(self.tmp_uploads.name, "news", "a.jpg").write_bytes(b"photo-a")
+        with self._fake_pg_dump():
+            created = self.request_method("post", "backup/", data={"media_mode": "incremental"})
+        created_name = next(name for name in created.data["backups"] if name.endswith(".zip"))
+        backup_name = "backup_test_1.zip"
+        Path(self.tmp_backups.name, created_name).rename(Path(self.tmp_backups.name, backup_name))
+        for blob in Path(self.tmp_backups.name, ".media_store", "blobs").glob("*/*"):
+            blob.unlink()
+        Path(self.tmp_uploads.name, "news", "a.jpg").unlink()
+
+        with patch("core_apps.backup.views._truncate_tables") as truncate, patch(
+            "core_apps.backup.views.subprocess.run"
+        ) as run:
+            response = self.request_method("post", "backup/restore/", data={"backup": backup_name})
+
+        self.assertIn("Fehler beim Wiederherstellen", response.data["msg"])
+        self.assertIn("news/a.jpg", response.data["msg"])
+        truncate.assert_not_called()
+        run.assert_not_called()
+
+    def test_deleting_backup_collects_unreferenced_blobs(self):
+        self.client.force_authenticate(user=self.admin)
+        Path(self.tmp_uploads.name, "a.jpg").write_bytes(b"photo-a")
+
+        with self._fake_pg_dump():
+            response = self.request_method("post", "backup/", data={"media_mode": "incremental"})
+        zip_name = next(name for name in response.data["backups"] if name.endswith(".zip"))
+        blob = next(Path(self.tmp_backups.name, ".media_store", "blobs").glob("*/*"))
+        os.utime(blob, (1, 1))
+
+        self.request_method("post", "backup/delete/", data={"backup": zip_name})
+
+        self.assertFalse(blob.exists())
+
+    def test_background_backup_job_reports_progress(self):
+        self.client.force_authenticate(user=self.admin)
+        Path(self.tmp_uploads.name, "bild.png").write_bytes(b"img")
+        dump = b"COPY public.a (id) FROM stdin;\n1\n\\.\n\nCOPY public.b (id) FROM stdin;\n\\.\n"
+
+        # Der Job-Thread hat eine eigene DB-Verbindung, die offene Test-Transaktion sperrt SQLite-Tabellen
+        with self._fake_pg_dump(output=dump), patch("core_apps.backup.views._table_row_counts", return_value={}):
+            response = self.request_method("post", "backup/", data={"background": True})
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            job_id = response.data["job"]["id"]
+            wait_for_job(job_id, timeout=10)
+
+        job = self.request_method("get", f"backup/jobs/{job_id}/").data
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["kind"], "backup")
+        self.assertEqual(job["progress"]["bytes_done"], len(dump))
+        self.assertEqual(job["progress"]["tables_done"], 2)
+        self.assertEqual(job["progress"]["files_done"], 1)
+        self.assertTrue(Path(self.tmp_backups.name, job["result"]["backup"]).exists())
+        self.assertEqual(self.request_method("get", "backup/jobs/").data["jobs"][0]["id"], job_id)
+
+    def test_restore_is_rejected_while_another_job_runs(self):
+        self.client.force_authenticate(user=self.admin)
+        backup_name = "backup_test_20260104.zip"
+        with zipfile.ZipFile(Path(self.tmp_backups.name, backup_name), "w") as zipf:
+            zipf.writestr("dump.sql", "-- sql")
+
+        store = BackupJobStore(self.tmp_backups.name)
+        lock_file = store._acquire_lock()
+        try:
+            self.assertTrue(self.request_method("get", "backup/jobs/").data["busy"])
+            response = self.request_method("post", "backup/restore/", data={"backup": backup_name})
+        finally:
+            store._release_lock(lock_file)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_interrupted_job_is_reported_as_failed(self):
+        self.client.force_authenticate(user=self.admin)
+        store = BackupJobStore(self.tmp_backups.name)
+        store.save({"id": "abc123", "kind": "restore", "status": "running", "progress": {}})
+
+        job = self.request_method("get", "backup/jobs/abc123/").data
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(self.request_method("get", "backup/jobs/unknown/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_custom_format_backup_is_stored_uncompressed(self):
+        self.client.force_authenticate(user=self.admin)
+
+        with self._fake_pg_dump(output=b"PGDMP-archive") as popen:
+            response = self.request_method("post", "backup/", data={"dump_format": "custom"})
+
+        self.assertIn("--format=custom", popen.call_args.args[0])
+        self.assertEqual(response.data["stats"]["dump_format"], "custom")
+        with zipfile.ZipFile(Path(self.tmp_backups.name, response.data["stats"]["backup"])) as zipf:
+            dump_info = next(info for info in zipf.infolist() if info.filename.endswith(".dump"))
+            self.assertEqual(dump_info.compress_type, zipfile.ZIP_STORED)
+
+    def test_restore_custom_format_uses_parallel_pg_restore(self):
+        self.client.force_authenticate(user=self.admin)
+        backup_name = "backup_test_20260105.zip"
+        with zipfile.ZipFile(Path(self.tmp_backups.name, backup_name), "w") as zipf:
+            zipf.writestr("backup_test_20260105.dump", b"PGDMP-archive")
+
+        toc = (
+            ";\n; Archive created at 2026-01-05\n"
+            "3361; 0 16410 TABLE DATA public users_user postgres\n"
+            "3362; 0 16420 TABLE DATA public auth_group postgres\n"
+            "3363; 0 16430 TABLE DATA public news_news postgres\n"
+        )
+        commands = []
+
+        def _run_side_effect(cmd, **kwargs):
+            commands.append(cmd)
+            if "SELECT tablename FROM pg_tables" in " ".join(cmd):
+                return SimpleNamespace(stdout="users_user\nnews_news\nauth_group\n")
+            if cmd[:2] == ["pg_restore", "--list"]:
+                return SimpleNamespace(stdout=toc)
+            return SimpleNamespace(stdout="")
+
+        restored_lists = []
+
+        def _popen(cmd, **kwargs):
+            restored_lists.append(Path(cmd[cmd.index("--use-list") + 1]).read_text(encoding="utf-8"))
+            stderr = io.StringIO(
+                'pg_restore: processing data for table "public.users_user"\n'
+                'pg_restore: processing data for table "public.news_news"\n'
+            )
+            return SimpleNamespace(stderr=stderr, wait=lambda: 0, cmd=cmd)
+
+        with patch("core_apps.backup.views.subprocess.run", side_effect=_run_side_effect), patch(
+            "core_apps.backup.views.subprocess.Popen", side_effect=_popen
+        ) as popen, patch("core_apps.backup.views.restore_jobs", 3):
+            response = self.request_method(
+                "post", "backup/restore/", data={"backup": backup_name, "background": True}
+            )
+            wait_for_job(response.data["job"]["id"], timeout=10)
+
+        job = self.request_method("get", f"backup/jobs/{response.data['job']['id']}/").data
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["progress"]["tables_total"], 2)
+        self.assertEqual(job["progress"]["tables_done"], 2)
+        pg_restore_cmd = popen.call_args.args[0]
+        self.assertEqual(pg_restore_cmd[pg_restore_cmd.index("--jobs") + 1], "3")
+        self.assertNotIn("auth_group", restored_lists[0])
+        self.assertIn("news_news", restored_lists[0])
+        self.assertTrue(any("RESTART IDENTITY" in " ".join(cmd) for cmd in commands))
+        self.assertEqual([name for name in os.listdir(self.tmp_backups.name) if not name.startswith(".")], [backup_name])
+
+    def test_backup_is_recorded_in_catalog_and_listed_paginated(self):
+        self.client.force_authenticate(user=self.admin)
+        Path(self.tmp_uploads.name, "bild.png").write_bytes(b"img")
+        Path(self.tmp_backups.name, "backup_test_20200101_000000.zip").write_bytes(b"legacy")
+        os.utime(Path(self.tmp_backups.name, "backup_test_20200101_000000.zip"), (1, 1))
+
+        with self._fake_pg_dump():
+            created = self.request_method("post", "backup/", data={})
+
+        name = created.data["stats"]["backup"]
+        response = self.request_method("get", "backup/catalog/?page_size=1")
+        self.assertEqual(response.data["count"], 2)
+        entry = response.data["results"][0]
+        self.assertEqual(entry["name"], name)
+        self.assertEqual(entry["size"], Path(self.tmp_backups.name, name).stat().st_size)
+        self.assertEqual(
+            entry["checksum"],
+            "sha256:" + hashlib.sha256(Path(self.tmp_backups.name, name).read_bytes()).hexdigest(),
+        )
+        self.assertEqual(entry["media_files"], 1)
+        self.assertIn("users_user", entry["row_counts"])
+
+        legacy = self.request_method("get", "backup/catalog/?ordering=created_at&page_size=1").data["results"][0]
+        self.assertEqual((legacy["version"], legacy["checksum"]), ("test", None))
+        self.assertEqual(self.request_method("get", "backup/catalog/?ordering=bogus").status_code, 400)
+
+        self.request_method("post", "backup/delete/", data={"backup": name})
+        self.assertEqual(self.request_method("get", "backup/catalog/").data["count"], 1)
+
+    def test_retention_prunes_oldest_backups_after_create(self):
+        self.client.force_authenticate(user=self.admin)
+        for day in ("01", "02"):
+            path = Path(self.tmp_backups.name, f"backup_test_202001{day}_000000.zip")
+            path.write_bytes(b"old")
+            os.utime(path, (int(day), int(day)))
+
+        with self._fake_pg_dump(), patch("core_apps.backup.views.retention_count", 2):
+            response = self.request_method("post", "backup/", data={})
+
+        self.assertEqual(response.data["stats"]["pruned"], ["backup_test_20200101_000000.zip"])
+        self.assertEqual(len(response.data["backups"]), 2)
+        self.assertFalse(Path(self.tmp_backups.name, "backup_test_20200101_000000.zip").exists())
+
+    def test_backup_post_rejects_unknown_media_mode(self):
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.request_method("post", "backup/", data={"media_mode": "delta"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_backup_get_file_rejects_non_zip(self):
         self.client.force_authenticate(user=self.admin)
 
@@ -183,6 +494,30 @@ class BackupEndpointTests(EndpointSmokeMixin, APITestCase):
         self.assertEqual(response["Content-Type"], "application/octet-stream")
         response.close()
 
+    def test_backup_get_file_serves_byte_ranges(self):
+        self.client.force_authenticate(user=self.admin)
+        Path(self.tmp_backups.name, "archive.zip").write_bytes(b"0123456789")
+        url = self.build_api_url("backup/file/archive.zip")
+
+        response = self.client.get(url, HTTP_RANGE="bytes=4-")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(response.streaming_content), b"456789")
+        self.assertEqual(response["Content-Range"], "bytes 4-9/10")
+
+        response = self.client.get(url, HTTP_RANGE="bytes=20-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_backup_get_file_uses_accel_redirect_behind_nginx(self):
+        self.client.force_authenticate(user=self.admin)
+        Path(self.tmp_backups.name, "archive.zip").write_bytes(b"zip")
+
+        with override_settings(FILE_ACCEL_REDIRECT=True, FILE_ACCEL_LOCATIONS={self.tmp_backups.name: "/internal/backups/"}):
+            response = self.request_method("post", "backup/file/", data={"backup": "archive.zip"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Accel-Redirect"], "/internal/backups/archive.zip")
+        self.assertEqual(response.content, b"")
+
     def test_backup_get_file_rejects_missing_zip_path(self):
         self.client.force_authenticate(user=self.admin)
 
@@ -1,10 +1,22 @@
 from django.urls import path
 
-from .views import BackupGetPostView, RestorePostView, BackupGetFileView, BackupDeleteView
+from .views import (
+    BackupGetPostView,
+    RestorePostView,
+    BackupGetFileView,
+    BackupDeleteView,
+    BackupCatalogView,
+    BackupJobListView,
+    BackupJobDetailView,
+)
 
 urlpatterns = [
     path("", BackupGetPostView.as_view(), name="backup-list-create"),
     path("restore/", RestorePostView.as_view(), name="backup-restore"),
     path("file/", BackupGetFileView.as_view(), name="backup-get"),
+    path("file/<str:filename>", BackupGetFileView.as_view(), name="backup-get-file"),
     path("delete/", BackupDeleteView.as_view(), name="backup-delete"),
+    path("catalog/", BackupCatalogView.as_view(), name="backup-catalog"),
+    path("jobs/", BackupJobListView.as_view(), name="backup-job-list"),
+    path("jobs/<str:job_id>/", BackupJobDetailView.as_view(), name="backup-job-detail"),
 ]
@@ -1,13 +1,30 @@
-import os, datetime, subprocess, environ, zipfile, shutil, logging
+import os, datetime, subprocess, environ, zipfile, shutil, logging, tempfile, time, json, threading, zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
 
-from rest_framework import permissions
-from rest_framework.exceptions import ValidationError
+from rest_framework import permissions, status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.http import FileResponse
+from django.db import connection
+from django.utils import timezone
 from dj_rest_auth.app_settings import api_settings as rest_auth_settings
+from core_apps.common.file_responses import serve_file
 from core_apps.common.logging_utils import log_event, log_exception
 from core_apps.common.permissions import HasAnyRolePermission
+from core_apps.media.file_index import MediaFileIndex
+from core_apps.mitglieder.directory import directory_state, reset_directory
+from .catalog import ORDERING_FIELDS, BackupCatalog, HashingWriter
+from .jobs import STATUS_DONE, BackupJobBusy, BackupJobStore, JobProgress
+from .media_store import (
+    MANIFEST_ARCNAME,
+    STORE_DIR_NAME,
+    MediaBlobStore,
+    MissingMediaBlobs,
+    read_manifest,
+    referenced_blobs,
+)
 
 env = environ.Env()
 logger = logging.getLogger(__name__)
@@ -17,6 +34,28 @@ backup_path = "/app/backups/"
 uploaded_files_dir = "/app/mediafiles/"
 version = env('VERSION')
 
+MEDIA_MODE_FULL = "full"
+MEDIA_MODE_INCREMENTAL = "incremental"
+MEDIA_MODES = (MEDIA_MODE_FULL, MEDIA_MODE_INCREMENTAL)
+default_media_mode = env("BACKUP_MEDIA_MODE", default=MEDIA_MODE_FULL)
+
+# "plain": SQL-Skript, Restore über psql (single-threaded)
+# "custom": pg_dump Archivformat, Restore über pg_restore --jobs (parallel je Tabelle)
+DUMP_FORMAT_PLAIN = "plain"
+DUMP_FORMAT_CUSTOM = "custom"
+DUMP_FORMATS = (DUMP_FORMAT_PLAIN, DUMP_FORMAT_CUSTOM)
+DUMP_EXTENSIONS = {DUMP_FORMAT_PLAIN: ".sql", DUMP_FORMAT_CUSTOM: ".dump"}
+default_dump_format = env("BACKUP_DUMP_FORMAT", default=DUMP_FORMAT_PLAIN)
+restore_jobs = env.int("BACKUP_RESTORE_JOBS", default=min(4, os.cpu_count() or 1))
+restore_media_workers = env.int("BACKUP_RESTORE_MEDIA_WORKERS", default=4)
+
+CATALOG_PAGE_SIZE = 20
+CATALOG_MAX_PAGE_SIZE = 200
+
+# Aufbewahrung nach jedem erfolgreichen Backup (0 = Regel deaktiviert)
+retention_count = env.int("BACKUP_RETENTION_COUNT", default=0)
+retention_days = env.int("BACKUP_RETENTION_DAYS", default=0)
+
 # Tabelle, die nicht exportiert werden sollen
 excluded_tables = [
     "account_emailaddress",
@@ -34,59 +73,618 @@ excluded_tables = [
     "socialaccount_socialtoken"
 ]
 
-class BackupGetPostView(APIView):
-    permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN")]
-
-    def get(self, request, *args, **kwargs):
-        backups = os.listdir(backup_path)
-        return Response({'backups': backups})
+STREAM_CHUNK_SIZE = 1024 * 1024
+COPY_MARKER = b"\nCOPY "
 
-    def post(self, request, *args, **kwargs):
-        try:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            sql_filename = f"backup_{version}_{timestamp}.sql"
-            sql_path = os.path.join(backup_path, sql_filename)
+# Regenerierbare Caches unter MEDIA_ROOT, nicht ins Backup aufnehmen
+excluded_media_dirs = [
+    "cache",
+    # Blobs der ContentAddressedStorage: Inhalte stecken bereits in den verlinkten Dateinamen
+    "blobs",
+]
 
-            pg_dump_cmd = [
-                "pg_dump",
-                "--host", env("POSTGRES_HOST"),
-                "--username", env("POSTGRES_USER"),
-                "--dbname", env("POSTGRES_DB"),
-                "--encoding=UTF8",
-                "--data-only",        
-                "--no-owner",           
-                "--no-acl"              
-            ]
 
-            for table in excluded_tables:
-                pg_dump_cmd.extend(["--exclude-table", f"public.{table}"])
+def _pg_env():
+    return {"PGPASSWORD": env("POSTGRES_PASSWORD")}
+
+
+def _pg_dump_cmd(dump_format=DUMP_FORMAT_PLAIN):
+    pg_dump_cmd = [
+        "pg_dump",
+        "--host", env("POSTGRES_HOST"),
+        "--username", env("POSTGRES_USER"),
+        "--dbname", env("POSTGRES_DB"),
+        "--encoding=UTF8",
+        "--data-only",
+        "--no-owner",
+        "--no-acl",
+        f"--format={dump_format}",
+    ]
+
+    for table in excluded_tables:
+        pg_dump_cmd.extend(["--exclude-table", f"public.{table}"])
+
+    return pg_dump_cmd
+
+
+def _stream_pg_dump_into_zip(
+    zipf: zipfile.ZipFile,
+    arcname: str,
+    progress: Optional[JobProgress] = None,
+    dump_format: str = DUMP_FORMAT_PLAIN,
+) -> int:
+    """
+    Schreibt die stdout von pg_dump direkt in einen Zip-Eintrag, ohne den Dump auf Platte
+    zwischenzuspeichern. Returns Anzahl geschriebener Dump-Bytes.
+    Fortschritt: geschriebene Bytes und (nur plain) Tabellen, ein COPY-Block je Tabelle.
+    """
+    pg_dump_cmd = _pg_dump_cmd(dump_format)
+    info = zipfile.ZipInfo(arcname, date_time=datetime.datetime.now().timetuple()[:6])
+    # Das custom-Format ist bereits komprimiert, ein zweites Deflate kostet nur CPU
+    info.compress_type = zipfile.ZIP_STORED if dump_format == DUMP_FORMAT_CUSTOM else zipfile.ZIP_DEFLATED
+    count_tables = dump_format == DUMP_FORMAT_PLAIN
+
+    written = 0
+    tables = 0
+    tail = b"\n"  # COPY in der ersten Zeile mitzählen
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(pg_dump_cmd, stdout=subprocess.PIPE, stderr=stderr_file, env=_pg_env())
+        try:
+            with zipf.open(info, 'w', force_zip64=True) as target:
+                for chunk in iter(lambda: process.stdout.read(STREAM_CHUNK_SIZE), b""):
+                    target.write(chunk)
+                    written += len(chunk)
+                    if progress is not None and count_tables:
+                        # tail überbrückt Chunk-Grenzen, ist kürzer als der Marker -> keine Doppelzählung
+                        window = tail + chunk
+                        tables += window.count(COPY_MARKER)
+                        tail = window[-(len(COPY_MARKER) - 1):]
+                        progress.update(bytes_done=written, tables_done=tables)
+                    elif progress is not None:
+                        progress.update(bytes_done=written)
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+
+        if returncode != 0:
+            stderr_file.seek(0)
+            raise subprocess.CalledProcessError(returncode, pg_dump_cmd, stderr=stderr_file.read())
+
+    return written
+
+
+def _write_media_into_zip(zipf: zipfile.ZipFile, progress: Optional[JobProgress] = None):
+    """Returns (Anzahl Dateien, Bytes)."""
+    files_count = 0
+    files_bytes = 0
+    for root, dirs, files in os.walk(uploaded_files_dir):
+        if os.path.normpath(root) == os.path.normpath(uploaded_files_dir):
+            dirs[:] = [d for d in dirs if d not in excluded_media_dirs]
+        for file in files:
+            file_path = os.path.join(root, file)
+            arcname = os.path.join("uploaded_files", os.path.relpath(file_path, uploaded_files_dir))
+            zipf.write(file_path, arcname)
+            files_count += 1
+            files_bytes += os.path.getsize(file_path)
+            if progress is not None:
+                progress.update(files_done=files_count, media_bytes_done=files_bytes)
+    return files_count, files_bytes
+
+
+def _media_store() -> MediaBlobStore:
+    return MediaBlobStore(Path(backup_path) / STORE_DIR_NAME)
+
+
+def _catalog() -> BackupCatalog:
+    return BackupCatalog(backup_path)
+
+
+def _list_backups():
+    """Backup-Namen aus dem Katalog, neueste zuerst."""
+    return _catalog().names()
+
+
+def _write_media_manifest_into_zip(zipf: zipfile.ZipFile) -> dict:
+    """Inkrementeller Modus: Dateien landen dedupliziert im Blob-Speicher, ins Zip kommt nur das Manifest."""
+    manifest, stats = _media_store().snapshot(uploaded_files_dir, excluded_media_dirs)
+    zipf.writestr(MANIFEST_ARCNAME, json.dumps(manifest), compress_type=zipfile.ZIP_DEFLATED)
+    return stats
+
+
+def _media_files_on_disk() -> dict:
+    """relpath (posix) -> absoluter Pfad aller Dateien unter uploaded_files_dir."""
+    on_disk = {}
+    for root, dirs, files in os.walk(uploaded_files_dir):
+        if os.path.normpath(root) == os.path.normpath(uploaded_files_dir):
+            # Caches sind nicht im Backup und dürfen beim Restore nicht gelöscht werden
+            dirs[:] = [d for d in dirs if d not in excluded_media_dirs]
+        for f in files:
+            file_path = os.path.join(root, f)
+            on_disk[Path(os.path.relpath(file_path, uploaded_files_dir)).as_posix()] = file_path
+    return on_disk
+
+
+def _remove_files_not_in_backup(wanted) -> int:
+    removed = 0
+    for relpath, file_path in _media_files_on_disk().items():
+        if relpath not in wanted:
+            os.remove(file_path)
+            removed += 1
+    return removed
+
+
+def _file_matches(path: str, size: int, crc: int) -> bool:
+    """True, wenn die Datei bereits Größe und CRC32 des Zip-Eintrags hat (Größe zuerst, spart das Lesen)."""
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        value = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b""):
+                value = zlib.crc32(chunk, value)
+    except OSError:
+        return False
+    return value == crc
+
+
+def _extract_changed_members(zip_path: str, members: list, progress: Optional[JobProgress] = None):
+    """
+    Schreibt nur Einträge, deren Datei fehlt oder sich (Größe/CRC) unterscheidet.
+    Vergleich und Extraktion laufen im Thread-Pool, jeder Thread liest über ein eigenes ZipFile.
+    Returns (geschrieben, unverändert).
+    """
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+
+    def _zip() -> zipfile.ZipFile:
+        if not hasattr(local, "zipf"):
+            local.zipf = zipfile.ZipFile(zip_path, 'r')
+            with handles_lock:
+                handles.append(local.zipf)
+        return local.zipf
+
+    def _restore_member(member: zipfile.ZipInfo) -> bool:
+        target_path = os.path.join(uploaded_files_dir, member.filename[len("uploaded_files/"):])
+        if _file_matches(target_path, member.file_size, member.CRC):
+            return False
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        # Neue Datei statt Überschreiben: der Name kann ein Hardlink auf einen geteilten Blob sein
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target_path), suffix=".tmp")
+        try:
+            with _zip().open(member, 'r') as source_file, os.fdopen(fd, 'wb') as target_file:
+                shutil.copyfileobj(source_file, target_file)
+            os.replace(tmp_path, target_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return True
+
+    written = skipped = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, restore_media_workers), thread_name_prefix="backup-restore") as pool:
+            for member, changed in zip(members, pool.map(_restore_member, members)):
+                if changed:
+                    written += 1
+                else:
+                    skipped += 1
+                if progress is not None:
+                    progress.add(files_done=1, files_skipped=0 if changed else 1, media_bytes_done=member.file_size)
+    finally:
+        for handle in handles:
+            handle.close()
+    return written, skipped
+
+
+def _restore_media_from_zip(zipf: zipfile.ZipFile, backupname: str, progress: Optional[JobProgress] = None) -> None:
+    """
+    Differentieller Restore: gelöscht werden nur Dateien, die nicht im Backup sind,
+    geschrieben nur fehlende oder geänderte Dateien.
+    """
+    manifest = read_manifest(zipf)
+    if manifest is not None:
+        entries = manifest.get("files", [])
+        removed = _remove_files_not_in_backup({entry["path"] for entry in entries})
+        on_restored = None
+        if progress is not None:
+            progress.phase("media", files_total=len(entries), files_done=0, files_skipped=0)
+            on_restored = lambda entry, written: progress.add(
+                files_done=1, files_skipped=0 if written else 1, media_bytes_done=entry["size"]
+            )
+        restored, skipped, missing = _media_store().restore(manifest, uploaded_files_dir, on_restored=on_restored)
+        log_event(
+            logger, LOG_SOURCE, "backup_media_restored",
+            backup=backupname, files=restored, unchanged=skipped, removed=removed, missing=len(missing),
+        )
+        if missing:
+            # Datenbank ist bereits zurückgespielt: Job als fehlgeschlagen melden statt "done"
+            log_event(logger, LOG_SOURCE, "backup_media_blobs_missing", level="error", backup=backupname, paths=missing[:20])
+            raise MissingMediaBlobs(missing)
+        return
+
+    media_root = Path(uploaded_files_dir).resolve()
+    directories = []
+    files = []
+    for member in zipf.infolist():
+        relative_path = member.filename[len("uploaded_files/"):]
+        if not member.filename.startswith("uploaded_files/") or not relative_path:
+            continue
+        if not (media_root / relative_path).resolve().is_relative_to(media_root):
+            log_event(logger, LOG_SOURCE, "backup_media_entry_skipped", level="warning", backup=backupname, entry=member.filename)
+            continue
+        (directories if member.is_dir() else files).append(member)
+
+    removed = _remove_files_not_in_backup({m.filename[len("uploaded_files/"):] for m in files})
+    for member in directories:
+        os.makedirs(os.path.join(uploaded_files_dir, member.filename[len("uploaded_files/"):]), exist_ok=True)
+
+    if progress is not None:
+        progress.phase("media", files_total=len(files), files_done=0, files_skipped=0)
+    written, skipped = _extract_changed_members(zipf.filename, files, progress)
+    log_event(
+        logger, LOG_SOURCE, "backup_media_restored",
+        backup=backupname, files=written, unchanged=skipped, removed=removed,
+    )
+
+
+def _collect_media_garbage() -> None:
+    try:
+        removed = _media_store().collect_garbage(referenced_blobs(backup_path))
+    except (zipfile.BadZipFile, OSError, ValueError, KeyError) as e:
+        log_exception(logger, LOG_SOURCE, "backup_media_gc_skipped", error=str(e))
+        return
+    if removed:
+        log_event(logger, LOG_SOURCE, "backup_media_gc", removed_blobs=removed)
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "ja", "y", "j"}
+    return bool(value)
+
+
+def _job_store() -> BackupJobStore:
+    return BackupJobStore(backup_path)
+
+
+def _busy_response():
+    return Response(
+        {'msg': "Es läuft bereits ein Backup oder Restore, bitte warten."},
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def _backup_tables():
+    return [t for t in connection.introspection.table_names() if t not in excluded_tables]
+
+
+def _table_row_counts(tables) -> dict:
+    counts = {}
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+            counts[table] = cursor.fetchone()[0]
+    return counts
+
+
+def _apply_retention() -> list:
+    """Löscht Backups außerhalb der Aufbewahrung (BACKUP_RETENTION_COUNT / _DAYS). Returns gelöschte Namen."""
+    catalog = _catalog()
+    pruned = []
+    for name in catalog.expired(keep_count=retention_count, max_age_days=retention_days):
+        try:
+            os.remove(os.path.join(backup_path, name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log_exception(logger, LOG_SOURCE, "backup_retention_failed", backup=name, error=str(e))
+            continue
+        catalog.remove(name)
+        pruned.append(name)
+
+    if pruned:
+        log_event(logger, LOG_SOURCE, "backup_retention_pruned", backups=pruned)
+        _collect_media_garbage()
+    return pruned
+
+
+def _create_backup(progress: JobProgress, media_mode: str, dump_format: str = DUMP_FORMAT_PLAIN) -> dict:
+    """Erstellt das Backup-Zip (Datenbank + Medien), trägt es in den Katalog ein. Returns Statistik inkl. Dateiname."""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    dump_filename = f"backup_{version}_{timestamp}{DUMP_EXTENSIONS[dump_format]}"
+    zip_filename = f"backup_{version}_{timestamp}.zip"
+    zip_path = os.path.join(backup_path, zip_filename)
+
+    tables = _backup_tables()
+    created_at = timezone.now()
+    started = time.monotonic()
+    try:
+        row_counts = _table_row_counts(tables)
+        with open(zip_path, 'wb') as raw_file:
+            writer = HashingWriter(raw_file)
+            with zipfile.ZipFile(writer, 'w', allowZip64=True) as zipf:
+                progress.phase("database", tables_total=len(tables), tables_done=0, bytes_done=0)
+                sql_bytes = _stream_pg_dump_into_zip(zipf, dump_filename, progress, dump_format)
+
+                progress.phase("media", files_done=0, media_bytes_done=0)
+                if media_mode == MEDIA_MODE_INCREMENTAL:
+                    stats = _write_media_manifest_into_zip(zipf)
+                else:
+                    media_files, media_bytes = _write_media_into_zip(zipf, progress)
+                    stats = {"media_files": media_files, "media_bytes": media_bytes}
+    except Exception as e:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+        log_exception(logger, LOG_SOURCE, "backup_create_failed", error=str(e))
+        raise
+
+    zip_bytes = os.path.getsize(zip_path)
+    _catalog().add({
+        "name": zip_filename,
+        "size": zip_bytes,
+        "version": version,
+        "created_at": created_at.isoformat(),
+        "checksum": f"sha256:{writer.hexdigest()}",
+        "row_counts": row_counts,
+        "media_files": stats["media_files"],
+        "media_mode": media_mode,
+        "dump_format": dump_format,
+    })
+
+    stats.update({
+        "backup": zip_filename,
+        "media_mode": media_mode,
+        "dump_format": dump_format,
+        "sql_bytes": sql_bytes,
+        "zip_bytes": zip_bytes,
+        "duration_s": round(time.monotonic() - started, 2),
+    })
+    log_event(logger, LOG_SOURCE, "backup_created", **stats)
+    stats["pruned"] = _apply_retention()
+    return stats
+
+
+def _list_tables_to_truncate():
+    list_tables_cmd = [
+        "psql",
+        "--host", env("POSTGRES_HOST"),
+        "--username", env("POSTGRES_USER"),
+        "--dbname", env("POSTGRES_DB"),
+        "--no-align",
+        "--tuples-only",
+        "--command", "SELECT tablename FROM pg_tables WHERE schemaname = 'public';"
+    ]
+    list_result = subprocess.run(
+        list_tables_cmd,
+        capture_output=True,
+        text=True,
+        env={"PGPASSWORD": env("POSTGRES_PASSWORD")}
+    )
+    all_tables = list_result.stdout.strip().split("\n")
+    all_tables = [t.strip() for t in all_tables if t.strip()]
+    return [t for t in all_tables if t not in excluded_tables]
+
+
+def _truncate_tables(tables_to_truncate):
+    if not tables_to_truncate:
+        return
+    truncate_sql = (
+        "TRUNCATE TABLE "
+        + ", ".join(f"\"public\".\"{t}\"" for t in tables_to_truncate)
+        + " RESTART IDENTITY CASCADE;"
+    )
+    subprocess.run([
+        "psql",
+        "--host", env("POSTGRES_HOST"),
+        "--username", env("POSTGRES_USER"),
+        "--dbname", env("POSTGRES_DB"),
+        "--command", truncate_sql
+    ],
+    check=True,
+    env={"PGPASSWORD": env("POSTGRES_PASSWORD")})
+
+
+def _load_sql_file(local_sql_path):
+    subprocess.run([
+        "psql",
+        "--host", env("POSTGRES_HOST"),
+        "--username", env("POSTGRES_USER"),
+        "--dbname", env("POSTGRES_DB"),
+        "--file", local_sql_path
+    ],
+    check=True,
+    env={"PGPASSWORD": env("POSTGRES_PASSWORD")})
+
+
+def _write_restore_list(local_dump_path, list_path) -> int:
+    """
+    Schreibt das Inhaltsverzeichnis des Archivs ohne die excluded_tables als --use-list Datei.
+    Returns Anzahl der wiederherzustellenden Tabellen (TABLE DATA Einträge).
+    """
+    toc = subprocess.run(
+        ["pg_restore", "--list", local_dump_path],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    kept = []
+    tables = 0
+    for line in toc.splitlines():
+        # z.B. "3361; 0 16410 TABLE DATA public users_user postgres"
+        if " TABLE DATA " in line and not line.startswith(";"):
+            tokens = line.split(" TABLE DATA ", 1)[1].split()
+            if len(tokens) >= 2 and tokens[1] in excluded_tables:
+                continue
+            tables += 1
+        kept.append(line)
+
+    Path(list_path).write_text("\n".join(kept) + "\n", encoding="utf-8")
+    return tables
+
+
+def _pg_restore_file(local_dump_path, progress: JobProgress) -> None:
+    """
+    Lädt ein custom-Format Archiv mit pg_restore --jobs (eine Verbindung je Job, parallel je Tabelle).
+    Der Fortschritt wird aus der --verbose Ausgabe ("processing data for table ...") gezählt.
+    """
+    list_path = f"{local_dump_path}.list"
+    try:
+        tables_total = _write_restore_list(local_dump_path, list_path)
+        progress.phase("load", tables_total=tables_total, tables_done=0)
+
+        pg_restore_cmd = [
+            "pg_restore",
+            "--host", env("POSTGRES_HOST"),
+            "--username", env("POSTGRES_USER"),
+            "--dbname", env("POSTGRES_DB"),
+            "--data-only",
+            "--no-owner",
+            "--no-acl",
+            "--verbose",
+            "--jobs", str(max(1, restore_jobs)),
+            "--use-list", list_path,
+            local_dump_path,
+        ]
+        process = subprocess.Popen(
+            pg_restore_cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=_pg_env(),
+        )
+        errors = []
+        for line in process.stderr:
+            if "processing data for table" in line:
+                progress.add(tables_done=1)
+            elif "error" in line.lower():
+                errors.append(line.strip())
+        process.stderr.close()
+        returncode = process.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, pg_restore_cmd, stderr="\n".join(errors[-20:]))
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+
+def _mitglieder_directory_version() -> int:
+    try:
+        return directory_state().version
+    except Exception as e:
+        log_exception(logger, LOG_SOURCE, "mitglieder_directory_state_failed", error=str(e))
+        return 0
+
+
+def _reset_mitglieder_directory(previous_version: int) -> None:
+    """Gecachte Mitgliederverzeichnisse und Client-Deltas beziehen sich auf den Stand vor dem Restore."""
+    try:
+        reset_directory(previous_version)
+    except Exception as e:
+        # Datenbank ist bereits zurückgespielt; ohne Reset gelten alte Cache-Einträge bis zur nächsten Änderung
+        log_exception(logger, LOG_SOURCE, "mitglieder_directory_reset_failed", error=str(e))
+
+
+def _restore_backup(progress: JobProgress, backupname: str) -> dict:
+    """Spielt Datenbank und Medien aus dem Backup-Zip zurück."""
+    backup_zip_path = os.path.join(backup_path, backupname)
+    try:
+        with zipfile.ZipFile(backup_zip_path, 'r') as zipf:
+            # Fehlende Blobs vor Entpacken und Truncate erkennen, sonst zeigen DB-Zeilen auf nicht vorhandene Medien
+            manifest = read_manifest(zipf)
+            missing = _media_store().missing(manifest, uploaded_files_dir) if manifest is not None else []
+            if missing:
+                log_event(logger, LOG_SOURCE, "backup_media_blobs_missing", level="error", backup=backupname, paths=missing[:20])
+                raise MissingMediaBlobs(missing)
+
+            extracted_items = zipf.namelist()
+            dump_filename = next(
+                (f for f in extracted_items if f.endswith(tuple(DUMP_EXTENSIONS.values()))),
+                None,
+            )
+            local_dump_path = None
+
+            if dump_filename:
+                local_dump_path = os.path.join(backup_path, os.path.basename(dump_filename))
+                progress.phase("database", bytes_total=zipf.getinfo(dump_filename).file_size, bytes_done=0)
+
+                with zipf.open(dump_filename, 'r') as source, open(local_dump_path, 'wb') as target:
+                    for chunk in iter(lambda: source.read(STREAM_CHUNK_SIZE), b""):
+                        target.write(chunk)
+                        progress.add(bytes_done=len(chunk))
+
+            if local_dump_path and os.path.exists(local_dump_path):
+                mitglieder_version = _mitglieder_directory_version()
+                try:
+                    tables_to_truncate = _list_tables_to_truncate()
+                    progress.phase("truncate", tables_total=len(tables_to_truncate), tables_done=0)
+                    _truncate_tables(tables_to_truncate)
+
+                    if local_dump_path.endswith(DUMP_EXTENSIONS[DUMP_FORMAT_CUSTOM]):
+                        _pg_restore_file(local_dump_path, progress)
+                    else:
+                        progress.phase("load")
+                        _load_sql_file(local_dump_path)
+                        progress.update(tables_done=len(tables_to_truncate))
+                    _reset_mitglieder_directory(mitglieder_version)
+                finally:
+                    os.remove(local_dump_path)
+
+            _restore_media_from_zip(zipf, backupname, progress)
+            MediaFileIndex(uploaded_files_dir).invalidate()
+    except Exception as e:
+        log_exception(logger, LOG_SOURCE, "backup_restore_failed", backup=backupname, error=str(e))
+        raise
+
+    log_event(logger, LOG_SOURCE, "backup_restored", backup=backupname)
+    return {"backup": backupname}
 
-            pg_dump_cmd.extend(["--file", sql_path])
 
-            subprocess.run(pg_dump_cmd, check=True, env={"PGPASSWORD": env("POSTGRES_PASSWORD")})
+class BackupGetPostView(APIView):
+    permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN")]
 
+    def get(self, request, *args, **kwargs):
+        backups = _list_backups()
+        return Response({'backups': backups})
 
-            zip_filename = f"backup_{version}_{timestamp}.zip"
-            zip_path = os.path.join(backup_path, zip_filename)
+    def post(self, request, *args, **kwargs):
+        """
+        media_mode "full": Mediendateien werden ins Zip kopiert (eigenständiges Archiv).
+        media_mode "incremental": nur ein Manifest im Zip, Inhalte dedupliziert unter .media_store.
+        dump_format "plain" (SQL) oder "custom" (pg_restore --jobs beim Restore).
+        background true: Backup läuft als Job weiter, Antwort 202 mit Job (Status über backup/jobs/<id>/).
+        """
+        media_mode = request.data.get("media_mode") or default_media_mode
+        if media_mode not in MEDIA_MODES:
+            raise ValidationError(f"Ungültiger media_mode: {media_mode}")
+        dump_format = request.data.get("dump_format") or default_dump_format
+        if dump_format not in DUMP_FORMATS:
+            raise ValidationError(f"Ungültiges dump_format: {dump_format}")
+        background = _as_bool(request.data.get("background", False))
 
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                zipf.write(sql_path, os.path.basename(sql_path))
+        try:
+            job = _job_store().start(
+                "backup",
+                lambda progress: _create_backup(progress, media_mode, dump_format),
+                params={"media_mode": media_mode, "dump_format": dump_format},
+                background=background,
+            )
+        except BackupJobBusy:
+            return _busy_response()
 
-                for root, _, files in os.walk(uploaded_files_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.join("uploaded_files", os.path.relpath(file_path, uploaded_files_dir))
-                        zipf.write(file_path, arcname)
+        if background:
+            return Response({'msg': "Backup wurde gestartet.", 'job': job}, status=status.HTTP_202_ACCEPTED)
 
-            os.remove(sql_path)
-            msg = f"Backup {zip_filename} wurde erfolgreich erstellt!"
-            log_event(logger, LOG_SOURCE, "backup_created", backup=zip_filename)
-        except subprocess.CalledProcessError as e:
-            msg = f"Fehler beim Erstellen des Backups: {str(e)}"
-            log_exception(logger, LOG_SOURCE, "backup_create_failed", error=str(e))
+        stats = job["result"]
+        if job["status"] == STATUS_DONE:
+            msg = f"Backup {stats['backup']} wurde erfolgreich erstellt!"
+        else:
+            msg = f"Fehler beim Erstellen des Backups: {job['error']}"
 
-        backups = os.listdir(backup_path)
-        return Response({'msg': msg, 'backups': backups})
+        backups = _list_backups()
+        return Response({'msg': msg, 'backups': backups, 'stats': stats})
 
 
 class RestorePostView(APIView):
@@ -94,101 +692,32 @@ class RestorePostView(APIView):
 
     def post(self, request, *args, **kwargs):
         version = env('VERSION')
-        msg = ""
         backupname = request.data['backup']
-        backups = os.listdir(backup_path)
-        backup_tokens = backupname.split('_')
-        backup_version = backup_tokens[1] if len(backup_tokens) > 1 else ""
+        entry = _catalog().get(backupname)
 
-        if backupname in backups and backupname.endswith('.zip') and backup_version == version:
-            backup_zip_path = os.path.join(backup_path, backupname)
-            try:
-                for root, _, files in os.walk(uploaded_files_dir):
-                    for f in files:
-                        os.remove(os.path.join(root, f))
-
-                with zipfile.ZipFile(backup_zip_path, 'r') as zipf:
-                    extracted_items = zipf.namelist()
-                    sql_filename = next((f for f in extracted_items if f.endswith('.sql')), None)
-                    local_sql_path = None
-
-                    if sql_filename:
-                        local_sql_path = os.path.join(backup_path, os.path.basename(sql_filename))
-
-                        with zipf.open(sql_filename, 'r') as source, open(local_sql_path, 'wb') as target:
-                            shutil.copyfileobj(source, target)
-
-                    if local_sql_path and os.path.exists(local_sql_path):
-                        list_tables_cmd = [
-                            "psql",
-                            "--host", env("POSTGRES_HOST"),
-                            "--username", env("POSTGRES_USER"),
-                            "--dbname", env("POSTGRES_DB"),
-                            "--no-align",
-                            "--tuples-only",
-                            "--command", "SELECT tablename FROM pg_tables WHERE schemaname = 'public';"
-                        ]
-                        list_result = subprocess.run(
-                            list_tables_cmd,
-                            capture_output=True,
-                            text=True,
-                            env={"PGPASSWORD": env("POSTGRES_PASSWORD")}
-                        )
-                        all_tables = list_result.stdout.strip().split("\n")
-                        all_tables = [t.strip() for t in all_tables if t.strip()]
-                        tables_to_truncate = [t for t in all_tables if t not in excluded_tables]
-
-                        if tables_to_truncate:
-                            truncate_sql = (
-                                "TRUNCATE TABLE "
-                                + ", ".join(f"\"public\".\"{t}\"" for t in tables_to_truncate)
-                                + " RESTART IDENTITY CASCADE;"
-                            )
-                            subprocess.run([
-                                "psql",
-                                "--host", env("POSTGRES_HOST"),
-                                "--username", env("POSTGRES_USER"),
-                                "--dbname", env("POSTGRES_DB"),
-                                "--command", truncate_sql
-                            ],
-                            check=True,
-                            env={"PGPASSWORD": env("POSTGRES_PASSWORD")})
-
-                        subprocess.run([
-                            "psql",
-                            "--host", env("POSTGRES_HOST"),
-                            "--username", env("POSTGRES_USER"),
-                            "--dbname", env("POSTGRES_DB"),
-                            "--file", local_sql_path
-                        ],
-                        check=True,
-                        env={"PGPASSWORD": env("POSTGRES_PASSWORD")})
-
-                        os.remove(local_sql_path)
-
-                    for member in zipf.infolist():
-                        if member.filename.startswith("uploaded_files/"):
-                            relative_path = member.filename[len("uploaded_files/"):]
-                            if not relative_path:
-                                continue
-
-                            target_path = os.path.join(uploaded_files_dir, relative_path)
-
-                            if member.is_dir():
-                                os.makedirs(target_path, exist_ok=True)
-                            else:
-                                os.makedirs(os.path.dirname(target_path), exist_ok=True)
-                                with zipf.open(member, 'r') as source_file, open(target_path, 'wb') as target_file:
-                                    shutil.copyfileobj(source_file, target_file)
-
-                msg = f"Backup {backupname} wurde erfolgreich wiederhergestellt!"
-                log_event(logger, LOG_SOURCE, "backup_restored", backup=backupname)
-            except subprocess.CalledProcessError as e:
-                msg = f"Fehler beim Wiederherstellen des Backups: {str(e)}"
-                log_exception(logger, LOG_SOURCE, "backup_restore_failed", backup=backupname, error=str(e))
-        else:
+        if not (entry and entry["version"] == version):
             raise ValidationError(f"Backup nicht gefunden oder ungültig: {backupname}")
 
+        background = _as_bool(request.data.get("background", False))
+        try:
+            job = _job_store().start(
+                "restore",
+                lambda progress: _restore_backup(progress, backupname),
+                params={"backup": backupname},
+                background=background,
+            )
+        except BackupJobBusy:
+            return _busy_response()
+
+        if background:
+            # Cookies bleiben gültig, damit der Status abgefragt werden kann; Abmelden erst nach Abschluss
+            return Response({'msg': "Wiederherstellung wurde gestartet.", 'job': job}, status=status.HTTP_202_ACCEPTED)
+
+        if job["status"] == STATUS_DONE:
+            msg = f"Backup {backupname} wurde erfolgreich wiederhergestellt!"
+        else:
+            msg = f"Fehler beim Wiederherstellen des Backups: {job['error']}"
+
         response =  Response({
             'msg': msg,
         })
@@ -212,25 +741,73 @@ class RestorePostView(APIView):
         return response
 
 
+class BackupCatalogView(APIView):
+    """
+    Backups mit Metadaten aus dem Katalog.
+    Query: ordering (created_at, name, size, version; "-" = absteigend), page, page_size
+    """
+    permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN")]
+
+    def get(self, request, *args, **kwargs):
+        ordering = request.query_params.get("ordering") or "-created_at"
+        if ordering.lstrip("-") not in ORDERING_FIELDS:
+            raise ValidationError({"ordering": f"Erlaubt: {', '.join(ORDERING_FIELDS)}"})
+        try:
+            page = max(1, int(request.query_params.get("page", 1)))
+            page_size = min(CATALOG_MAX_PAGE_SIZE, max(1, int(request.query_params.get("page_size", CATALOG_PAGE_SIZE))))
+        except ValueError:
+            raise ValidationError("page und page_size müssen Zahlen sein.")
+
+        entries = _catalog().sorted_entries(ordering)
+        start = (page - 1) * page_size
+        return Response({
+            'count': len(entries),
+            'page': page,
+            'page_size': page_size,
+            'results': entries[start:start + page_size],
+        })
+
+
+class BackupJobListView(APIView):
+    permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN")]
+
+    def get(self, request, *args, **kwargs):
+        store = _job_store()
+        return Response({'jobs': store.list(), 'busy': store.is_busy()})
+
+
+class BackupJobDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN")]
+
+    def get(self, request, job_id, *args, **kwargs):
+        job = _job_store().get(job_id)
+        if job is None:
+            raise NotFound(f"Job nicht gefunden: {job_id}")
+        return Response(job)
+
+
 class BackupGetFileView(APIView):
+    """
+    Download eines Backups: POST backup/file/ {"backup": "<name>.zip"} oder
+    GET backup/file/<name>.zip (fortsetzbar per Range, z.B. durch den Browser-Downloadmanager).
+    """
     permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN")]
 
-    def post(self, request, *args, **kwargs):
-        filename = request.data['backup']
-        if filename.endswith(".zip"):
-            dateipfad = os.path.join(backup_path, filename)
-        
-            if os.path.isfile(dateipfad):
-                log_event(logger, LOG_SOURCE, "backup_download", path=dateipfad)
-                file = open(os.path.join(backup_path, filename), 'rb')
-                response = FileResponse(file, content_type='application/octet-stream')
-                response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                return response
-            else:
-                raise ValidationError("Die .zip-Datei existiert nicht im angegebenen Pfad.")
-        else:
+    def _download(self, request, filename):
+        if not filename.endswith(".zip"):
             raise ValidationError("Die angegebene Datei ist keine .zip-Datei.")
-        
+        if filename not in _list_backups():
+            raise ValidationError("Die .zip-Datei existiert nicht im angegebenen Pfad.")
+
+        dateipfad = os.path.join(backup_path, filename)
+        log_event(logger, LOG_SOURCE, "backup_download", path=dateipfad, range=request.headers.get("Range", ""))
+        return serve_file(request, dateipfad, as_attachment=True, content_type="application/octet-stream")
+
+    def get(self, request, filename, *args, **kwargs):
+        return self._download(request, filename)
+
+    def post(self, request, *args, **kwargs):
+        return self._download(request, request.data.get('backup', ''))
 
 
 class BackupDeleteView(APIView):
@@ -238,19 +815,21 @@ class BackupDeleteView(APIView):
 
     def post(self, request, *args, **kwargs):
         backupname = request.data.get('backup', '')
-        backups = os.listdir(backup_path)
+        backups = _list_backups()
 
         if backupname in backups:
             backup_path_to_delete = os.path.join(backup_path, backupname)
             try:
                 os.remove(backup_path_to_delete)
+                _catalog().remove(backupname)
                 msg = f"Backup {backupname} wurde erfolgreich gelöscht!"
                 log_event(logger, LOG_SOURCE, "backup_deleted", backup=backupname)
+                _collect_media_garbage()
             except OSError as e:
                 msg = f"Fehler beim Löschen des Backups: {str(e)}"
                 log_exception(logger, LOG_SOURCE, "backup_delete_failed", backup=backupname, error=str(e))
         else:
             raise ValidationError(f"Backup nicht gefunden: {backupname}")
 
-        updated_backups = os.listdir(backup_path)
+        updated_backups = _list_backups()
         return Response({'msg': msg, 'backups': updated_backups})
@@ -0,0 +1,117 @@
+import mimetypes
+import re
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _accel_location(path: Path) -> Optional[str]:
+    """Interne nginx-Location für `path` laut FILE_ACCEL_LOCATIONS, None wenn kein Root passt."""
+    for root, location in getattr(settings, "FILE_ACCEL_LOCATIONS", {}).items():
+        root_path = Path(root).resolve()
+        if path.is_relative_to(root_path):
+            relative = path.relative_to(root_path).as_posix()
+            return f"{location.rstrip('/')}/{quote(relative)}"
+    return None
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Einzelner Byte-Bereich aus dem Range-Header als (start, end) inklusive.
+    Returns None für nicht unterstützte Angaben (mehrere Bereiche, andere Einheit) -> ganze Datei,
+    raises ValueError, wenn der Bereich nicht erfüllbar ist (416).
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if length == 0:
+            raise ValueError("Leerer Suffix-Bereich")
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError("Bereich außerhalb der Datei")
+    return start, end
+
+
+def _iter_range(path: Path, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, path, *, as_attachment: bool = False, filename: Optional[str] = None,
+               content_type: Optional[str] = None):
+    """
+    Liefert eine Datei aus, mit ETag/Last-Modified (304 auf bedingte Requests) und einzelnen Byte-Bereichen (Range).
+
+    Mit FILE_ACCEL_REDIRECT übernimmt nginx die Auslieferung per X-Accel-Redirect (inkl. Range und
+    If-Modified-Since), der Worker ist nach der Berechtigungsprüfung sofort wieder frei. Ohne nginx
+    (Entwicklung, Tests) wird in Python gestreamt.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    filename = filename or path.name
+    content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    last_modified = http_date(stat.st_mtime)
+
+    accel_location = _accel_location(path) if getattr(settings, "FILE_ACCEL_REDIRECT", False) else None
+    if accel_location is not None:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = accel_location
+        response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+        return response
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    if request.method in ("GET", "HEAD"):
+        not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+        if not_modified is not None:
+            return not_modified
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and (not if_range or if_range in (etag, last_modified)):
+        try:
+            byte_range = _parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            response["Accept-Ranges"] = "bytes"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, "rb"), as_attachment=as_attachment, filename=filename,
+                                content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_iter_range(path, start, length), status=206, content_type=content_type)
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+
+    response["Last-Modified"] = last_modified
+    response["ETag"] = etag
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,47 @@
+from django.conf import settings
+
+# Cache-Policies je Route; ohne Policy bleibt es bei no-store (APICacheControlMiddleware)
+CACHE_NO_STORE = "no-store"
+CACHE_PUBLIC = "public"
+CACHE_PRIVATE = "private"
+CACHE_MEDIA = "media"
+CACHE_MEDIA_PUBLIC = "media-public"
+
+NO_STORE_HEADER = "no-store, no-cache, must-revalidate, proxy-revalidate"
+
+
+def cache_control_for(policy: str) -> str:
+    """
+    Cache-Control Header einer Policy (Laufzeiten aus den Settings).
+
+    Medien-URLs sind nicht versioniert: beim Ersetzen eines Fotos (z.B. inventar/<id>.jpg) bleibt
+    die URL gleich, der Inhalt ändert sich. Daher kein `immutable`, sondern Revalidierung per
+    ETag/Last-Modified (304 ohne Body).
+    """
+    if policy == CACHE_PUBLIC:
+        return f"public, max-age={getattr(settings, 'HTTP_CACHE_PUBLIC_MAX_AGE', 60)}, must-revalidate"
+    if policy == CACHE_MEDIA_PUBLIC:
+        return f"public, max-age={getattr(settings, 'HTTP_CACHE_MEDIA_MAX_AGE', 300)}, must-revalidate"
+    if policy in (CACHE_MEDIA, CACHE_PRIVATE):
+        # private: Browser darf cachen, geteilte Caches (Proxy) nicht - Daten hinter Login;
+        # no-cache: vor jeder Verwendung revalidieren (ETag/304), Änderungen sind sofort sichtbar
+        return "private, no-cache"
+    return NO_STORE_HEADER
+
+
+class CachePolicyMixin:
+    """
+    Für APIViews/ViewSets: setzt `cache_policy` als Cache-Control auf erfolgreiche (auch 206/304) GET/HEAD
+    Antworten. ETag und 304 für bedingte Requests übernimmt die APICacheControlMiddleware.
+    """
+    cache_policy = CACHE_NO_STORE
+
+    def get_cache_policy(self) -> str:
+        return self.cache_policy
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        policy = self.get_cache_policy()
+        if policy != CACHE_NO_STORE and request.method in ("GET", "HEAD") and response.status_code in (200, 206, 304):
+            response["Cache-Control"] = cache_control_for(policy)
+        return response
@@ -1,20 +1,23 @@
 from pathlib import Path
 
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.management.base import BaseCommand, CommandError
-from django.db.utils import OperationalError, ProgrammingError
 
 from core_apps.inventar.models import Inventar
+from core_apps.media.file_index import MediaFileIndex
+from core_apps.media.references import folder_refs, safe_refset
+from core_apps.media.registry import media_folders
 from core_apps.news.models import News
 
 
 class Command(BaseCommand):
-    help = "Findet (und optional löscht) verwaiste Mediendateien für News/Inventar."
+    help = "Findet (und optional löscht) verwaiste Mediendateien aller FileFields/ImageFields."
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--target",
-            choices=["all", "news", "inventar"],
+            choices=["all", *media_folders()],
             default="all",
             help="Zu prüfender Bereich (Standard: all)",
         )
@@ -33,6 +36,17 @@ class Command(BaseCommand):
             action="store_true",
             help="Löschung trotz fehlender DB-Tabellen erlauben (unsicher)",
         )
+        parser.add_argument(
+            "--rebuild-index",
+            action="store_true",
+            help="Dateiindex neu aufbauen (z.B. nach manuell kopierten Dateien)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Parallele Ordner-Scans beim Indexaufbau (Standard: MEDIA_INDEX_SCAN_WORKERS)",
+        )
 
     def handle(self, *args, **options):
         target = options["target"]
@@ -40,11 +54,8 @@ class Command(BaseCommand):
         auto_confirm = options["yes"]
         allow_missing_db = options["allow_missing_db"]
 
-        checks = []
-        if target in ("all", "news"):
-            checks.append(("news", self._news_refs))
-        if target in ("all", "inventar"):
-            checks.append(("inventar", self._inventar_refs))
+        folders = media_folders()
+        checks = [(folder, self._refs_loader(folder)) for folder in (folders if target == "all" else [target])]
 
         total_files = 0
         total_refs = 0
@@ -56,16 +67,24 @@ class Command(BaseCommand):
         if not media_root.exists():
             raise CommandError(f"MEDIA_ROOT existiert nicht: {media_root}")
 
+        index = MediaFileIndex(media_root)
+        if options["rebuild_index"] or not index.is_built():
+            count = index.rebuild(folders, options["workers"])
+            self.stdout.write(f"Dateiindex aufgebaut: {count} Dateien")
+        else:
+            changed = index.reconcile(folders)
+            self.stdout.write(f"Dateiindex abgeglichen: {changed} geänderte Verzeichnisse")
+
         for folder_name, ref_loader in checks:
             folder_path = media_root / folder_name
             if not folder_path.exists():
                 self.stdout.write(self.style.WARNING(f"Übersprungen (Ordner fehlt): {folder_path}"))
                 continue
 
-            files = {file_path.name for file_path in folder_path.iterdir() if file_path.is_file()}
+            files = index.files(folder_name)
             refs, missing_db = ref_loader()
             has_missing_db = has_missing_db or missing_db
-            orphans = sorted(files - refs)
+            orphans = sorted(index.existing(folder_name, files - refs))
 
             total_files += len(files)
             total_refs += len(refs)
@@ -93,13 +112,14 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.WARNING("Abgebrochen – keine Datei gelöscht."))
                     return
 
-            deleted = 0
+            deleted = []
             for folder_name, filename in all_orphans:
                 path = media_root / folder_name / filename
                 if path.exists() and path.is_file():
-                    path.unlink()
-                    deleted += 1
-            self.stdout.write(self.style.SUCCESS(f"Gelöscht: {deleted} Dateien"))
+                    default_storage.delete(f"{folder_name}/{filename}")
+                    deleted.append(f"{folder_name}/{filename}")
+            index.remove(deleted)
+            self.stdout.write(self.style.SUCCESS(f"Gelöscht: {len(deleted)} Dateien"))
         elif should_delete:
             self.stdout.write(self.style.SUCCESS("Keine verwaisten Dateien zum Löschen gefunden."))
         else:
@@ -109,22 +129,24 @@ class Command(BaseCommand):
             f"Summary: files={total_files}, refs={total_refs}, orphan={total_orphans}"
         )
 
+    def _refs_loader(self, folder):
+        return getattr(self, f"_{folder}_refs", None) or (lambda: self._folder_refs(folder))
+
     def _news_refs(self):
         return self._safe_refset(News, "foto")
 
     def _inventar_refs(self):
         return self._safe_refset(Inventar, "foto")
 
-    def _safe_refset(self, model_class, image_field):
-        try:
-            values = model_class.objects.exclude(**{f"{image_field}__isnull": True}).exclude(
-                **{image_field: ""}
-            ).values_list(image_field, flat=True)
-            return {Path(value).name for value in values if value}, False
-        except (OperationalError, ProgrammingError):
+    def _folder_refs(self, folder):
+        return folder_refs(folder, refset=self._safe_refset)
+
+    def _safe_refset(self, model_class, image_field, subdirectory=None):
+        refs, missing = safe_refset(model_class, image_field, subdirectory)
+        if missing:
             self.stdout.write(
                 self.style.WARNING(
                     f"Tabelle für {model_class.__name__} nicht verfügbar – Referenzen werden als leer behandelt."
                 )
             )
-            return set(), True
+        return refs, missing
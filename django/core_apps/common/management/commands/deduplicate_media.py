@@ -0,0 +1,54 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core_apps.media.registry import media_folders
+from core_apps.media.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = (
+        "Übernimmt bestehende Mediendateien in den inhaltsadressierten Blob-Speicher "
+        "(gleiche Inhalte nur einmal) und löscht Blobs ohne Referenz."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            choices=["all", *media_folders()],
+            default="all",
+            help="Zu prüfender Bereich (Standard: all)",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Blobs ohne Referenz erst ab diesem Alter in Sekunden löschen (Standard: 3600)",
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError("Der Default-Storage ist keine ContentAddressedStorage (STORAGES prüfen).")
+
+        media_root = Path(settings.MEDIA_ROOT)
+        if not media_root.exists():
+            raise CommandError(f"MEDIA_ROOT existiert nicht: {media_root}")
+
+        target = options["target"]
+        folders = media_folders() if target == "all" else [target]
+        names = [
+            file_path.relative_to(media_root).as_posix()
+            for folder in folders
+            for file_path in (media_root / folder).rglob("*")
+            if file_path.is_file()
+        ]
+
+        stats = default_storage.deduplicate(names)
+        removed = default_storage.collect_garbage(options["min_age"])
+
+        self.stdout.write(
+            f"Summary: files={stats['files']}, linked={stats['linked']}, "
+            f"saved_bytes={stats['saved_bytes']}, blobs_removed={removed}"
+        )
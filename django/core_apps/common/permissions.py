@@ -1,5 +1,19 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from core_apps.users.roles import normalize_role_keys
+from core_apps.users.tokens import role_claims
+
+
+def _has_any_role(request, roles) -> bool:
+    """Rollen aus den JWT-Claims, solange deren Stand bestätigt ist, sonst über den Benutzer (DB/Cache)."""
+    claimed = role_claims(getattr(request, "auth", None))
+    if claimed is not None:
+        return not claimed.isdisjoint(normalize_role_keys(roles))
+
+    user = request.user
+    return user.is_authenticated and hasattr(user, "has_any_role") and user.has_any_role(*roles)
+
+
 class HasAnyRolePermission(BasePermission):
     """
     Erlaubt Zugriff, wenn der Benutzer mindestens eine der angegebenen Rollen hat.
@@ -10,14 +24,8 @@ class HasAnyRolePermission(BasePermission):
         self.allowed_roles = roles
 
     def has_permission(self, request, view):
-        user = request.user
         allowed = getattr(self, "allowed_roles", ())
-        result = (
-            user.is_authenticated
-            and hasattr(user, "has_any_role")
-            and user.has_any_role(*allowed)
-        )
-        return result
+        return _has_any_role(request, allowed)
 
     @classmethod
     def with_roles(cls, *roles):
@@ -48,15 +56,9 @@ class HasReadOnlyRolePermission(BasePermission):
         self.allowed_roles = roles
 
     def has_permission(self, request, view):
-        user = request.user
-
         # Nur Lesezugriffe prüfen
         if request.method in SAFE_METHODS:
-            return (
-                user.is_authenticated
-                and hasattr(user, "has_any_role")
-                and user.has_any_role(*self.allowed_roles)
-            )
+            return _has_any_role(request, self.allowed_roles)
 
         # Schreibzugriff nie erlaubt
         return False
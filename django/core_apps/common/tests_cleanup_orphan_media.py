@@ -121,6 +121,22 @@ class CleanupOrphanMediaCommandTests(TestCase):
         self.assertIn("[inventar]", text)
         self.assertIn("orphan=1", text)
 
+    def test_index_picks_up_files_added_without_signal(self):
+        media_root = self._prepare_media(news_files=["first.png"])
+
+        with override_settings(MEDIA_ROOT=media_root):
+            call_command("cleanup_orphan_media", target="news", stdout=StringIO())
+            (Path(media_root) / "news" / "copied.png").write_bytes(b"x")
+            cached = StringIO()
+            call_command("cleanup_orphan_media", target="news", stdout=cached)
+            rebuilt = StringIO()
+            call_command("cleanup_orphan_media", target="news", rebuild_index=True, workers=2, stdout=rebuilt)
+
+        self.assertIn("Dateiindex abgeglichen", cached.getvalue())
+        self.assertIn("Summary: files=2, refs=0, orphan=2", cached.getvalue())
+        self.assertIn("Dateiindex aufgebaut: 2 Dateien", rebuilt.getvalue())
+        self.assertIn("Summary: files=2, refs=0, orphan=2", rebuilt.getvalue())
+
     def test_safe_refset_handles_operational_error(self):
         command = Command()
 
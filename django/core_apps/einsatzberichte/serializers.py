@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
 from core_apps.fahrzeuge.models import Fahrzeug
+from core_apps.media.derivatives import derivative_urls
+from core_apps.media.uploads import normalize_image_upload
 from core_apps.mitglieder.models import Mitglied
 
 from .models import Einsatzbericht, EinsatzberichtFoto, MitalarmierteStelle
@@ -8,11 +10,12 @@ from .models import Einsatzbericht, EinsatzberichtFoto, MitalarmierteStelle
 
 class EinsatzberichtFotoSerializer(serializers.ModelSerializer):
     foto_url = serializers.SerializerMethodField(read_only=True)
+    foto_urls = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = EinsatzberichtFoto
-        fields = ["id", "foto", "foto_url", "dokument_typ", "created_at"]
-        read_only_fields = ["id", "foto_url", "created_at"]
+        fields = ["id", "foto", "foto_url", "foto_urls", "dokument_typ", "created_at"]
+        read_only_fields = ["id", "foto_url", "foto_urls", "created_at"]
 
     def get_foto_url(self, obj):
         f = getattr(obj, "foto", None)
@@ -21,6 +24,9 @@ class EinsatzberichtFotoSerializer(serializers.ModelSerializer):
         except Exception:
             return None
 
+    def get_foto_urls(self, obj):
+        return derivative_urls(getattr(obj, "foto", None))
+
 
 class EinsatzberichtSerializer(serializers.ModelSerializer):
     fahrzeuge = serializers.PrimaryKeyRelatedField(queryset=Fahrzeug.objects.all(), many=True, required=False)
@@ -97,7 +103,7 @@ class EinsatzberichtSerializer(serializers.ModelSerializer):
             for f in request.FILES.getlist(key):
                 EinsatzberichtFoto.objects.create(
                     einsatzbericht=instance,
-                    foto=f,
+                    foto=normalize_image_upload(f),
                     dokument_typ=dokument_typ,
                 )
 
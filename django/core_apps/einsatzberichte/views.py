@@ -10,12 +10,13 @@ from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from core_apps.common.http_cache import CACHE_NO_STORE, CACHE_PRIVATE, CachePolicyMixin
 from core_apps.common.logging_utils import log_event, log_exception
 from core_apps.common.permissions import HasAnyRolePermission
 from core_apps.fahrzeuge.models import Fahrzeug
 from core_apps.konfiguration.models import Konfiguration
 from core_apps.konfiguration.serializers import KonfigurationSerializer
-from core_apps.mitglieder.models import Mitglied
+from core_apps.mitglieder.directory import snapshot as mitglieder_snapshot
 from core_apps.modul_konfiguration.models import ModulKonfiguration
 from core_apps.modul_konfiguration.serializers import ModulKonfigurationSerializer
 
@@ -26,7 +27,7 @@ logger = logging.getLogger(__name__)
 LOG_SOURCE = "einsatzberichte"
 
 
-class EinsatzberichtViewSet(ModelViewSet):
+class EinsatzberichtViewSet(CachePolicyMixin, ModelViewSet):
     queryset = Einsatzbericht.objects.prefetch_related("fahrzeuge", "mitglieder", "mitalarmierte_stellen", "fotos").all()
     serializer_class = EinsatzberichtSerializer
     permission_classes = [
@@ -40,6 +41,10 @@ class EinsatzberichtViewSet(ModelViewSet):
     ordering_fields = ["created_at", "einsatz_datum", "status", "alarmstichwort"]
     ordering = ["-created_at"]
 
+    def get_cache_policy(self):
+        # Kontext (Mitglieder, Fahrzeuge, Stellen) per ETag/304 revalidieren, Berichte bleiben no-store
+        return CACHE_PRIVATE if getattr(self, "action", None) == "context" else CACHE_NO_STORE
+
     def get_permissions(self):
         if getattr(self, "action", None) == "destroy":
             permission_classes = [
@@ -137,17 +142,10 @@ class EinsatzberichtViewSet(ModelViewSet):
             for f in Fahrzeug.objects.all().order_by("name")
         ]
 
+        # Nur Namen, keine Stammdaten (svnr, geburtsdatum) an Berichtsschreiber
         mitglieder = [
-            {
-                "pkid": m.pkid,
-                "id": str(m.id),
-                "stbnr": m.stbnr,
-                "vorname": m.vorname,
-                "nachname": m.nachname,
-            }
-            for m in Mitglied.objects.exclude(
-                dienststatus__in=[Mitglied.Dienststatus.ABGEMELDET, Mitglied.Dienststatus.RESERVE]
-            ).order_by("stbnr")
+            {key: m[key] for key in ("pkid", "id", "stbnr", "vorname", "nachname")}
+            for m in mitglieder_snapshot("im_dienst")
         ]
 
         mitalarmiert_stellen = [
@@ -297,9 +295,7 @@ class EinsatzberichtViewSet(ModelViewSet):
             return []
 
         # Alle Mitglieder laden für Matching
-        all_members = Mitglied.objects.exclude(
-            dienststatus__in=[Mitglied.Dienststatus.ABGEMELDET, Mitglied.Dienststatus.RESERVE]
-        ).values_list("pkid", "vorname", "nachname")
+        all_members = [(m["pkid"], m["vorname"], m["nachname"]) for m in mitglieder_snapshot("im_dienst")]
 
         matched_ids = []
         for bls_name in confirmed_names:
@@ -3,6 +3,9 @@ import re
 
 from rest_framework import serializers
 
+from core_apps.media.derivatives import derivative_urls
+from core_apps.media.uploads import normalize_image_upload
+
 from .models import Fahrzeug, FahrzeugRaum, RaumItem, FahrzeugCheckItem
 
 
@@ -14,6 +17,10 @@ def _foto_url(obj) -> str | None:
         return None
 
 
+def _foto_urls(obj) -> dict | None:
+    return derivative_urls(getattr(obj, "foto", None))
+
+
 def _sanitize_upload_filename(file):
     if not file:
         return file
@@ -48,10 +55,14 @@ def _validate_date_window(attrs, instance, from_key: str, to_key: str):
 # =========================
 class FahrzeugListSerializer(serializers.ModelSerializer):
     foto_url = serializers.SerializerMethodField(read_only=True)
+    foto_urls = serializers.SerializerMethodField(read_only=True)
 
     def get_foto_url(self, obj):
         return _foto_url(obj)
 
+    def get_foto_urls(self, obj):
+        return _foto_urls(obj)
+
     class Meta:
         model = Fahrzeug
         fields = [
@@ -62,6 +73,7 @@ class FahrzeugListSerializer(serializers.ModelSerializer):
             "service_zuletzt_am",
             "service_naechstes_am",
             "foto_url",
+            "foto_urls",
         ]
 
 
@@ -152,22 +164,30 @@ class RaumItemSerializer(serializers.ModelSerializer):
 class FahrzeugRaumSerializer(serializers.ModelSerializer):
     items = RaumItemSerializer(many=True, read_only=True)
     foto_url = serializers.SerializerMethodField(read_only=True)
+    foto_urls = serializers.SerializerMethodField(read_only=True)
 
     def get_foto_url(self, obj):
         return _foto_url(obj)
 
+    def get_foto_urls(self, obj):
+        return _foto_urls(obj)
+
     class Meta:
         model = FahrzeugRaum
-        fields = ["id", "name", "reihenfolge", "foto_url", "items"]
+        fields = ["id", "name", "reihenfolge", "foto_url", "foto_urls", "items"]
 
 
 class FahrzeugDetailSerializer(serializers.ModelSerializer):
     raeume = FahrzeugRaumSerializer(many=True, read_only=True)
     foto_url = serializers.SerializerMethodField(read_only=True)
+    foto_urls = serializers.SerializerMethodField(read_only=True)
 
     def get_foto_url(self, obj):
         return _foto_url(obj)
 
+    def get_foto_urls(self, obj):
+        return _foto_urls(obj)
+
     class Meta:
         model = Fahrzeug
         fields = [
@@ -179,6 +199,7 @@ class FahrzeugDetailSerializer(serializers.ModelSerializer):
             "service_zuletzt_am",
             "service_naechstes_am",
             "foto_url",
+            "foto_urls",
             "raeume",
         ]
 
@@ -189,13 +210,17 @@ class FahrzeugDetailSerializer(serializers.ModelSerializer):
 class FahrzeugCrudSerializer(serializers.ModelSerializer):
     foto = serializers.ImageField(required=False, allow_null=True)
     foto_url = serializers.SerializerMethodField(read_only=True)
+    foto_urls = serializers.SerializerMethodField(read_only=True)
     remove_foto = serializers.BooleanField(required=False, write_only=True, default=False)
 
     def get_foto_url(self, obj):
         return _foto_url(obj)
 
+    def get_foto_urls(self, obj):
+        return _foto_urls(obj)
+
     def validate_foto(self, file):
-        return _sanitize_upload_filename(file)
+        return normalize_image_upload(_sanitize_upload_filename(file))
 
     def validate(self, attrs):
         _validate_date_window(attrs, self.instance, "service_zuletzt_am", "service_naechstes_am")
@@ -237,6 +262,7 @@ class FahrzeugCrudSerializer(serializers.ModelSerializer):
             "service_naechstes_am",
             "foto",
             "foto_url",
+            "foto_urls",
             "remove_foto",
         ]
 
@@ -244,13 +270,17 @@ class FahrzeugCrudSerializer(serializers.ModelSerializer):
 class FahrzeugRaumCrudSerializer(serializers.ModelSerializer):
     foto = serializers.ImageField(required=False, allow_null=True)
     foto_url = serializers.SerializerMethodField(read_only=True)
+    foto_urls = serializers.SerializerMethodField(read_only=True)
     remove_foto = serializers.BooleanField(required=False, write_only=True, default=False)
 
     def get_foto_url(self, obj):
         return _foto_url(obj)
 
+    def get_foto_urls(self, obj):
+        return _foto_urls(obj)
+
     def validate_foto(self, file):
-        return _sanitize_upload_filename(file)
+        return normalize_image_upload(_sanitize_upload_filename(file))
 
     def create(self, validated_data):
         foto = validated_data.pop("foto", None)
@@ -279,7 +309,7 @@ class FahrzeugRaumCrudSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = FahrzeugRaum
-        fields = ["id", "name", "reihenfolge", "foto", "foto_url", "remove_foto"]
+        fields = ["id", "name", "reihenfolge", "foto", "foto_url", "foto_urls", "remove_foto"]
 
 
 class RaumItemCrudSerializer(serializers.ModelSerializer):
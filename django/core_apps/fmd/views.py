@@ -6,9 +6,9 @@ from rest_framework.viewsets import ModelViewSet
 
 from .models import FMD
 from .serializers import FMDSerializer
+from core_apps.common.http_cache import CACHE_PRIVATE, CachePolicyMixin
 from core_apps.common.permissions import HasAnyRolePermission
-from core_apps.mitglieder.models import Mitglied
-from core_apps.mitglieder.serializers import MitgliedSerializer
+from core_apps.mitglieder.directory import snapshot as mitglieder_snapshot
 from core_apps.modul_konfiguration.models import ModulKonfiguration
 from core_apps.modul_konfiguration.serializers import ModulKonfigurationSerializer
 from core_apps.konfiguration.models import Konfiguration
@@ -24,14 +24,12 @@ class FMDViewSet(ModelViewSet):
     pagination_class = None 
 
 
-class FMDContextView(APIView):
+class FMDContextView(CachePolicyMixin, APIView):
     permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN", "FMD")]
+    cache_policy = CACHE_PRIVATE
 
     def get(self, request):
-        mitglieder = MitgliedSerializer(
-            Mitglied.objects.exclude(dienststatus=Mitglied.Dienststatus.RESERVE),
-            many=True,
-        ).data
+        mitglieder = mitglieder_snapshot("ohne_reserve")
         modul_konfig = ModulKonfigurationSerializer(ModulKonfiguration.objects.all(), many=True).data
         konfig = KonfigurationSerializer(Konfiguration.objects.all(), many=True).data
         return Response({"mitglieder": mitglieder, "modul_konfig": modul_konfig, "konfig": konfig})
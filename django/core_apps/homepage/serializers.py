@@ -3,6 +3,8 @@ import logging
 
 from rest_framework import serializers
 
+from core_apps.media.derivatives import derivative_urls
+from core_apps.media.uploads import normalize_image_upload
 from core_apps.mitglieder.models import Mitglied
 from .models import HomepageDienstposten
 
@@ -44,6 +46,7 @@ def dienstgrad_to_image_filename(dienstgrad: str | None) -> str:
 class HomepageDienstpostenSerializer(serializers.ModelSerializer):
     photo = serializers.ImageField(required=False, allow_null=True, write_only=True)
     photo_url = serializers.SerializerMethodField(read_only=True)
+    photo_urls = serializers.SerializerMethodField(read_only=True)
     remove_photo = serializers.BooleanField(required=False, default=False, write_only=True)
     mitglied_id = serializers.PrimaryKeyRelatedField(
         source="mitglied",
@@ -72,6 +75,7 @@ class HomepageDienstpostenSerializer(serializers.ModelSerializer):
             "mitglied_name",
             "photo",
             "photo_url",
+            "photo_urls",
             "remove_photo",
             "fallback_name",
             "fallback_dienstgrad",
@@ -95,6 +99,12 @@ class HomepageDienstpostenSerializer(serializers.ModelSerializer):
             logger.exception("Homepage photo URL konnte nicht ermittelt werden.")
             return None
 
+    def get_photo_urls(self, obj: HomepageDienstposten) -> dict | None:
+        return derivative_urls(getattr(obj, "photo", None))
+
+    def validate_photo(self, file):
+        return normalize_image_upload(file)
+
     def get_photo_preview(self, obj: HomepageDienstposten) -> str:
         photo_url = self.get_photo_url(obj)
         if photo_url:
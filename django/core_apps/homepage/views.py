@@ -10,9 +10,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
+from core_apps.common.http_cache import CACHE_PRIVATE, CACHE_PUBLIC, CachePolicyMixin
 from core_apps.common.permissions import HasAnyRolePermission
-from core_apps.mitglieder.models import Mitglied
-from core_apps.mitglieder.serializers import MitgliedSerializer
+from core_apps.mitglieder.directory import snapshot as mitglieder_snapshot
 
 from .models import HomepageDienstposten
 from .serializers import HomepageDienstpostenSerializer, dienstgrad_to_image_filename
@@ -161,10 +161,11 @@ class HomepageDienstpostenViewSet(ModelViewSet):
         super().perform_destroy(instance)
 
 
-class PublicHomepageViewSet(ReadOnlyModelViewSet):
+class PublicHomepageViewSet(CachePolicyMixin, ReadOnlyModelViewSet):
     queryset = HomepageDienstposten.objects.select_related("mitglied").all()
     serializer_class = HomepageDienstpostenSerializer
     permission_classes = [permissions.AllowAny]
+    cache_policy = CACHE_PUBLIC
     lookup_field = "id"
     pagination_class = None
     filter_backends = [filters.OrderingFilter]
@@ -176,17 +177,12 @@ class PublicHomepageViewSet(ReadOnlyModelViewSet):
         return Response(_build_public_sections(queryset), status=status.HTTP_200_OK)
 
 
-class HomepageContextView(APIView):
+class HomepageContextView(CachePolicyMixin, APIView):
     permission_classes = [
         permissions.IsAuthenticated,
         HasAnyRolePermission.with_roles("ADMIN", "VERWALTUNG"),
     ]
+    cache_policy = CACHE_PRIVATE
 
     def get(self, request):
-        mitglieder = MitgliedSerializer(
-            Mitglied.objects.exclude(
-                dienststatus__in=[Mitglied.Dienststatus.ABGEMELDET, Mitglied.Dienststatus.RESERVE]
-            ),
-            many=True,
-        ).data
-        return Response({"mitglieder": mitglieder}, status=status.HTTP_200_OK)
+        return Response({"mitglieder": mitglieder_snapshot("im_dienst")}, status=status.HTTP_200_OK)
@@ -3,11 +3,15 @@ from datetime import date
 
 from rest_framework import serializers
 
+from core_apps.media.derivatives import derivative_urls
+from core_apps.media.uploads import normalize_image_upload
+
 from .models import Inventar
 
 class InventarSerializer(serializers.ModelSerializer):
     foto = serializers.ImageField(required=False, allow_null=True)
     foto_url = serializers.SerializerMethodField(read_only=True)
+    foto_urls = serializers.SerializerMethodField(read_only=True)
 
     def get_foto_url(self, obj):
         f = getattr(obj, "foto", None)
@@ -16,6 +20,9 @@ class InventarSerializer(serializers.ModelSerializer):
         except Exception:
             return None
 
+    def get_foto_urls(self, obj):
+        return derivative_urls(getattr(obj, "foto", None))
+
     def validate_foto(self, file):
         if not file:
             return file
@@ -32,7 +39,7 @@ class InventarSerializer(serializers.ModelSerializer):
             base = os.path.basename(name)
             base = re.sub(r"[^\w.\-]+", "_", base)
             file.name = base
-        return file
+        return normalize_image_upload(file)
 
     def _parse_bis_value(self, value, field_name: str) -> str | None:
         if value in (None, ""):
@@ -39,7 +39,7 @@ class KonfigurationEndpointTests(EndpointSmokeMixin, APITestCase):
 
     def test_konfiguration_list_admin_returns_backups_and_roles(self):
         self.client.force_authenticate(user=self.admin)
-        with patch("core_apps.konfiguration.views.os.listdir", return_value=["backup-a.sql"]):
+        with patch("core_apps.konfiguration.views.BackupCatalog.names", return_value=["backup-a.zip"]):
             response = self.request_method("get", "konfiguration/")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
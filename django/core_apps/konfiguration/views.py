@@ -1,4 +1,3 @@
-import os
 from datetime import date
 
 from django.core.exceptions import ValidationError
@@ -13,6 +12,7 @@ from .models import Konfiguration
 from .serializers import KonfigurationSerializer
 from core_apps.common.permissions import HasAnyRolePermission, HasReadOnlyRolePermission, any_of
 from core_apps.common.email import send_account_invite_email, send_service_reminder_email
+from core_apps.backup.catalog import BackupCatalog
 from core_apps.backup.views import backup_path
 from core_apps.users.models import Role
 from core_apps.users.serializers import RoleSerializer
@@ -27,13 +27,13 @@ class KonfigurationViewSet(ModelViewSet):
     pagination_class = None 
     
     def _has_role(self, user, role_name: str) -> bool:
-        return user.is_authenticated and user.roles.filter(key=role_name).exists()
+        return user.is_authenticated and user.has_role(role_name)
 
     def list(self, request, *args, **kwargs):
         resp = super().list(request, *args, **kwargs)
 
         if request.user.has_role("ADMIN"):
-            backups = os.listdir(backup_path)
+            backups = BackupCatalog(backup_path).names()
             rollen = RoleSerializer(Role.objects.all(), many=True).data
             return Response({"main": resp.data, "backups": backups, "rollen": rollen})
 
@@ -6,3 +6,8 @@ class MediaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core_apps.media"
     verbose_name = _("Media")
+
+    def ready(self):
+        from core_apps.media.signals import connect_file_index_signals
+
+        connect_file_index_signals()
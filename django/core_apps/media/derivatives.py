@@ -0,0 +1,118 @@
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.utils.encoding import filepath_to_uri
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from core_apps.common.logging_utils import log_event
+
+logger = logging.getLogger(__name__)
+LOG_SOURCE = "media"
+
+# Größe -> längste Kante in Pixel
+DERIVATIVE_SIZES = {
+    "thumb": 320,
+    "medium": 1280,
+}
+
+# Unterhalb von MEDIA_ROOT/cache/ (regenerierbar, nicht im Backup, nicht im Orphan-Cleanup)
+DERIVATIVE_DIR = Path("cache") / "derivatives"
+DERIVATIVE_URL_PREFIX = "derivatives"
+
+FORMAT_EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+
+
+def _output_format() -> str:
+    fmt = str(getattr(settings, "MEDIA_DERIVATIVE_FORMAT", "WEBP")).upper()
+    return fmt if fmt in FORMAT_EXTENSIONS else "WEBP"
+
+
+def _quality() -> int:
+    return int(getattr(settings, "MEDIA_DERIVATIVE_QUALITY", 80))
+
+
+def derivative_path(name: str, size: str) -> Path:
+    """MEDIA_ROOT/cache/derivatives/<original>/<size>.<ext>, z.B. .../inventar/<id>.jpg/thumb.webp"""
+    ext = FORMAT_EXTENSIONS[_output_format()]
+    return Path(settings.MEDIA_ROOT) / DERIVATIVE_DIR / name / f"{size}.{ext}"
+
+
+def _render(source: Path, target: Path, max_edge: int) -> None:
+    fmt = _output_format()
+    with Image.open(source) as img:
+        # JPEG direkt verkleinert dekodieren (DCT-Scaling), spart bei Handyfotos Zeit und Speicher
+        img.draft("RGB", (max_edge, max_edge))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                img.save(tmp_file, format=fmt, quality=_quality(), optimize=fmt == "JPEG")
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+def ensure_derivative(name: str, size: str) -> Optional[Path]:
+    """
+    Pfad des Derivats `size` für die Mediendatei `name` (relativ zu MEDIA_ROOT). Wird beim ersten
+    Abruf erzeugt und neu gerechnet, wenn das Original neuer ist. None, wenn das Original fehlt
+    oder kein lesbares Bild ist.
+    """
+    if size not in DERIVATIVE_SIZES:
+        return None
+
+    media_root = Path(settings.MEDIA_ROOT).resolve()
+    # Innerhalb des Ordners des ersten Segments bleiben (news/../einsatzberichte/... ist ungültig)
+    folder = (media_root / Path(name).parts[0]).resolve() if Path(name).parts else media_root
+    source = (media_root / name).resolve()
+    if not source.is_relative_to(folder) or source.is_relative_to(media_root / DERIVATIVE_DIR):
+        return None
+    try:
+        source_mtime = source.stat().st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    target = derivative_path(source.relative_to(media_root).as_posix(), size)
+    try:
+        if target.stat().st_mtime_ns >= source_mtime:
+            return target
+    except FileNotFoundError:
+        pass
+
+    try:
+        _render(source, target, DERIVATIVE_SIZES[size])
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        log_event(logger, LOG_SOURCE, "media_derivative_failed", level="warning", name=name, size=size, error=str(e))
+        return None
+    return target
+
+
+def derivative_urls(file) -> Optional[dict]:
+    """
+    URLs je Größe für ein FieldFile: {"original": ..., "thumb": ..., "medium": ...}.
+    Die Derivate entstehen erst beim ersten Abruf der URL (MediaDerivativeGetFileView).
+    """
+    name = getattr(file, "name", "") if file else ""
+    if not name:
+        return None
+    try:
+        urls = {"original": file.url}
+    except Exception:
+        return None
+
+    base = f"{settings.MEDIA_URL}{DERIVATIVE_URL_PREFIX}"
+    for size in DERIVATIVE_SIZES:
+        urls[size] = f"{base}/{size}/{filepath_to_uri(name)}"
+    return urls
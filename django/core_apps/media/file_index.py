@@ -0,0 +1,194 @@
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+
+from core_apps.common.logging_utils import log_event
+
+logger = logging.getLogger(__name__)
+LOG_SOURCE = "media"
+
+INDEX_RELATIVE_PATH = Path("cache") / "media_index.sqlite3"
+# mtime-Auflösung des Dateisystems: so junge Verzeichnisse beim nächsten Abgleich erneut listen
+RECENT_MTIME_NS = 2_000_000_000
+
+
+def _scan_folder(root: Path, folder: str, known_dirs=frozenset()) -> tuple:
+    """
+    Dateien (relpath, size, mtime_ns) und Verzeichnisse (relpath, mtime_ns) unter root/folder,
+    rekursiv per os.scandir. Unterverzeichnisse aus `known_dirs` werden nicht betreten.
+    """
+    files, dirs = [], []
+    stack = [root / folder]
+    while stack:
+        directory = stack.pop()
+        try:
+            # mtime vor dem Listing: was währenddessen dazukommt, erkennt der nächste Abgleich
+            mtime_ns = directory.stat().st_mtime_ns
+            if time.time_ns() - mtime_ns < RECENT_MTIME_NS:
+                mtime_ns = -1
+            dirs.append((directory.relative_to(root).as_posix(), mtime_ns))
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relpath = Path(entry.path).relative_to(root).as_posix()
+                    if entry.is_dir(follow_symlinks=False):
+                        if relpath not in known_dirs:
+                            stack.append(Path(entry.path))
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((relpath, stat.st_size, stat.st_mtime_ns))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return files, dirs
+
+
+class MediaFileIndex:
+    """
+    Persistenter Index der Dateien unter MEDIA_ROOT (SQLite unter cache/, dadurch nicht im Backup).
+
+    Einmal aufgebaut (`rebuild`, Ordner parallel gescannt), halten post_save/post_delete der
+    registrierten FileFields den Index aktuell. Dateien ohne gespeichertes Model (Rollback nach dem
+    Upload, fehlgeschlagener Serializer) holt `reconcile` über die Verzeichnis-mtimes nach. Der
+    Orphan-Cleanup muss so nicht den ganzen Medienbaum durchlaufen. Ohne Index ist `add` ein No-op.
+    """
+
+    def __init__(self, media_root=None):
+        self.root = Path(media_root or settings.MEDIA_ROOT)
+        self.path = self.root / INDEX_RELATIVE_PATH
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER)")
+        conn.execute("CREATE TABLE IF NOT EXISTS dirs (name TEXT PRIMARY KEY, mtime_ns INTEGER)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        return conn
+
+    def is_built(self) -> bool:
+        if not self.path.exists():
+            return False
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM meta WHERE key = 'built_at'").fetchone() is not None
+
+    def rebuild(self, folders: Iterable[str], workers: Optional[int] = None) -> int:
+        """Scannt `folders` (parallel, ein Task je Ordner) und ersetzt den Index. Returns Anzahl Dateien."""
+        folders = [folder for folder in folders if (self.root / folder).is_dir()]
+        workers = workers or getattr(settings, "MEDIA_INDEX_SCAN_WORKERS", 4)
+        started = time.monotonic()
+        rows, dirs = [], []
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(folders) or 1))) as pool:
+            for files, found_dirs in pool.map(lambda folder: _scan_folder(self.root, folder), folders):
+                rows.extend(files)
+                dirs.extend(found_dirs)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM dirs")
+            conn.executemany("INSERT OR REPLACE INTO files (name, size, mtime_ns) VALUES (?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO dirs (name, mtime_ns) VALUES (?, ?)", dirs)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built_at', ?)", (str(time.time()),))
+
+        log_event(
+            logger, LOG_SOURCE, "media_index_rebuilt",
+            files=len(rows), folders=len(folders), duration_s=round(time.monotonic() - started, 2),
+        )
+        return len(rows)
+
+    def ensure_built(self, folders: Iterable[str], workers: Optional[int] = None) -> None:
+        """Baut den Index beim ersten Mal auf, danach nur noch Abgleich geänderter Verzeichnisse."""
+        if not self.is_built():
+            self.rebuild(folders, workers)
+        else:
+            self.reconcile(folders)
+
+    def reconcile(self, folders: Iterable[str]) -> int:
+        """
+        Gleicht den Index mit dem Dateisystem ab, ohne alles zu scannen (wie der BackupCatalog): je
+        bekanntem Verzeichnis ein stat, neu gelistet werden nur Verzeichnisse mit geänderter mtime
+        (Datei angelegt/gelöscht) und neue Unterverzeichnisse. Returns Anzahl gelisteter Verzeichnisse.
+        """
+        with closing(self._connect()) as conn:
+            known = dict(conn.execute("SELECT name, mtime_ns FROM dirs"))
+
+        changed, gone = [], []
+        for name in sorted({*known, *folders}):
+            try:
+                mtime_ns = (self.root / name).stat().st_mtime_ns
+            except (FileNotFoundError, NotADirectoryError):
+                if name in known:
+                    gone.append(name)
+                continue
+            if mtime_ns != known.get(name):
+                changed.append(name)
+
+        rows, dirs = [], []
+        for name in changed:
+            files, found_dirs = _scan_folder(self.root, name, known_dirs=known.keys())
+            rows.extend(files)
+            dirs.extend(found_dirs)
+
+        if not changed and not gone:
+            return 0
+        with closing(self._connect()) as conn, conn:
+            for name in gone:
+                prefix = f"{name}/"
+                conn.execute("DELETE FROM files WHERE substr(name, 1, ?) = ?", (len(prefix), prefix))
+                conn.execute(
+                    "DELETE FROM dirs WHERE name = ? OR substr(name, 1, ?) = ?", (name, len(prefix), prefix)
+                )
+            for name in changed:
+                # direkte Einträge neu aus dem Listing, bekannte Unterverzeichnisse gleichen sich selbst ab
+                prefix = f"{name}/"
+                conn.execute(
+                    "DELETE FROM files WHERE substr(name, 1, ?) = ? AND instr(substr(name, ?), '/') = 0",
+                    (len(prefix), prefix, len(prefix) + 1),
+                )
+            conn.executemany("INSERT OR REPLACE INTO files (name, size, mtime_ns) VALUES (?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO dirs (name, mtime_ns) VALUES (?, ?)", dirs)
+        return len(changed)
+
+    def add(self, names: Iterable[str]) -> None:
+        names = [name for name in names if name]
+        if not names or not self.is_built():
+            return
+        rows = []
+        for name in names:
+            try:
+                stat = (self.root / name).stat()
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            rows.append((name, stat.st_size, stat.st_mtime_ns))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO files (name, size, mtime_ns) VALUES (?, ?, ?)", rows)
+
+    def remove(self, names: Iterable[str]) -> None:
+        names = [(name,) for name in names if name]
+        if not names or not self.path.exists():
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM files WHERE name = ?", names)
+
+    def files(self, folder: str) -> set:
+        """Pfade relativ zu `folder` laut Index (ohne Dateisystemzugriff)."""
+        prefix = f"{folder.strip('/')}/"
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT name FROM files WHERE substr(name, 1, ?) = ?", (len(prefix), prefix))
+            return {row[0][len(prefix):] for row in rows}
+
+    def existing(self, folder: str, relative_names: Iterable[str]) -> list:
+        """Filtert Kandidaten auf tatsächlich vorhandene Dateien, veraltete Einträge werden entfernt."""
+        present, stale = [], []
+        for name in relative_names:
+            (present if (self.root / folder / name).is_file() else stale).append(name)
+        self.remove(f"{folder}/{name}" for name in stale)
+        return present
+
+    def invalidate(self) -> None:
+        """Index verwerfen (z.B. nach einem Restore); der nächste Cleanup baut ihn neu auf."""
+        self.path.unlink(missing_ok=True)
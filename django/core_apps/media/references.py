@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from django.db.utils import OperationalError, ProgrammingError
+
+from core_apps.media.registry import fields_for_folder
+
+
+def safe_refset(model_class, image_field, subdirectory=None):
+    """
+    Dateinamen, die `model_class.image_field` referenziert (relativ zu `subdirectory`).
+    Returns (Referenzen, True wenn die Tabelle fehlt).
+    """
+    prefix = f"{str(subdirectory).strip('/')}/" if subdirectory else ""
+
+    try:
+        values = model_class.objects.exclude(**{f"{image_field}__isnull": True}).exclude(
+            **{image_field: ""}
+        ).values_list(image_field, flat=True)
+
+        references = set()
+        for value in values:
+            if not value:
+                continue
+
+            normalized = str(value).replace("\\", "/").lstrip("/")
+            if prefix and normalized.startswith(prefix):
+                references.add(normalized[len(prefix):])
+                continue
+
+            if prefix:
+                references.add(normalized if "/" in normalized else Path(normalized).name)
+                continue
+
+            references.add(Path(normalized).name)
+
+        return references, False
+    except (OperationalError, ProgrammingError):
+        return set(), True
+
+
+def folder_refs(folder, refset=None):
+    """Referenzen aller registrierten FileFields, die nach `folder` hochladen (relativ zum Ordner)."""
+    refset = refset or safe_refset
+    references, missing_db = set(), False
+    for ref in fields_for_folder(folder):
+        refs, missing = refset(ref.model, ref.field_name, folder)
+        references |= refs
+        missing_db = missing_db or missing
+    return references, missing_db
@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from django.apps import apps
+from django.db import models
+
+# Regenerierbare Dateien (PDF-Jobs, Derivate, Index) sind nie verwaist im Sinne des Cleanups
+EXCLUDED_FOLDERS = {"cache"}
+
+
+class MediaFieldRef(NamedTuple):
+    model: type
+    field_name: str
+    folder: str
+
+
+def _upload_folder(model, field) -> Optional[str]:
+    """Oberster Ordner unter MEDIA_ROOT, in den `field` hochlädt (upload_to mit leerer Instanz ausgewertet)."""
+    upload_to = field.upload_to
+    if callable(upload_to):
+        try:
+            name = upload_to(model(), "probe.jpg")
+        except Exception:
+            return None
+    else:
+        name = str(upload_to or "")
+
+    folder = str(name).replace("\\", "/").lstrip("/").split("/", 1)[0]
+    if not folder or "/" not in str(name).replace("\\", "/").lstrip("/"):
+        return None
+    return folder
+
+
+@lru_cache(maxsize=1)
+def media_file_fields() -> tuple:
+    """Alle FileField/ImageField der installierten Apps mit ihrem Upload-Ordner."""
+    refs = []
+    for model in apps.get_models():
+        if model._meta.abstract or model._meta.proxy:
+            continue
+        for field in model._meta.get_fields():
+            if not isinstance(field, models.FileField):
+                continue
+            folder = _upload_folder(model, field)
+            if folder and folder not in EXCLUDED_FOLDERS:
+                refs.append(MediaFieldRef(model, field.name, folder))
+    return tuple(refs)
+
+
+def media_folders() -> list:
+    return sorted({ref.folder for ref in media_file_fields()})
+
+
+def fields_for_folder(folder: str) -> list:
+    return [ref for ref in media_file_fields() if ref.folder == folder]
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save
+
+from core_apps.media.file_index import MediaFileIndex
+from core_apps.media.registry import media_file_fields
+
+
+def _file_names(instance, field_names) -> list:
+    names = []
+    for field_name in field_names:
+        file = getattr(instance, field_name, None)
+        name = getattr(file, "name", "") if file else ""
+        if name:
+            names.append(name)
+    return names
+
+
+def _make_handlers(field_names):
+    def on_save(sender, instance, **kwargs):
+        MediaFileIndex().add(_file_names(instance, field_names))
+
+    def on_delete(sender, instance, **kwargs):
+        # Datei bleibt beim Löschen der Zeile meist liegen (dann Orphan), nur gelöschte Dateien austragen
+        index = MediaFileIndex()
+        index.remove(name for name in _file_names(instance, field_names) if not (index.root / name).exists())
+
+    return on_save, on_delete
+
+
+def connect_file_index_signals() -> None:
+    fields_by_model = {}
+    for ref in media_file_fields():
+        fields_by_model.setdefault(ref.model, []).append(ref.field_name)
+
+    for model, field_names in fields_by_model.items():
+        on_save, on_delete = _make_handlers(tuple(field_names))
+        uid = f"media_file_index_{model._meta.label_lower}"
+        post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f"{uid}_save")
+        post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f"{uid}_delete")
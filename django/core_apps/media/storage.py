@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+from core_apps.common.logging_utils import log_event
+
+logger = logging.getLogger(__name__)
+LOG_SOURCE = "media"
+
+BLOB_DIR_NAME = "blobs"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage mit inhaltsadressierter Ablage: jeder Inhalt liegt genau einmal unter
+    MEDIA_ROOT/blobs/ab/cd/<sha256>. Die öffentlichen Namen (z.B. fahrzeuge/12.jpg) bleiben
+    unverändert und sind Hardlinks auf den Blob - URLs, X-Accel-Redirect, Derivate und Backups
+    arbeiten weiter mit den gewohnten Pfaden.
+
+    Referenzzähler ist die Linkanzahl des Blobs (Blob selbst + je ein Link pro Name). `delete`
+    entfernt den Namen und den Blob erst, wenn keine weitere Referenz mehr besteht. Kann nicht
+    gelinkt werden (Dateisystem ohne Hardlinks), wird wie bei FileSystemStorage kopiert.
+    """
+
+    @property
+    def blobs_root(self) -> Path:
+        return Path(self.location) / BLOB_DIR_NAME
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_root / digest[:2] / digest[2:4] / digest
+
+    def _enabled(self) -> bool:
+        return getattr(settings, "MEDIA_DEDUPLICATE", True)
+
+    def _store_blob(self, content) -> Path:
+        """Schreibt den Inhalt beim Hashen in eine Temp-Datei und übernimmt sie nur, wenn der Blob neu ist."""
+        self.blobs_root.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_name = tempfile.mkstemp(dir=self.blobs_root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as target:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    target.write(chunk)
+
+            blob = self.blob_path(digest.hexdigest())
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_name, self.file_permissions_mode)
+                os.replace(tmp_name, blob)
+            return blob
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+    def _link(self, blob: Path, name: str) -> str:
+        while True:
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            try:
+                os.link(blob, full_path)
+            except FileExistsError:
+                name = self.get_available_name(name)
+                continue
+            return str(name).replace("\\", "/")
+
+    def _save(self, name, content):
+        if not self._enabled():
+            return super()._save(name, content)
+        try:
+            return self._link(self._store_blob(content), name)
+        except OSError as e:
+            log_event(logger, LOG_SOURCE, "media_blob_link_failed", level="warning", name=name, error=str(e))
+            return super()._save(name, content)
+
+    def _blob_for(self, path) -> Optional[Path]:
+        blob = self.blob_path(_file_digest(path))
+        try:
+            return blob if os.path.samefile(blob, path) else None
+        except FileNotFoundError:
+            return None
+
+    def delete(self, name):
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        path = self.path(name)
+        try:
+            links = os.stat(path).st_nlink
+        except FileNotFoundError:
+            return
+        # Nur beim letzten Namen (Name + Blob = 2 Links) muss der Blob gesucht werden
+        blob = self._blob_for(path) if links == 2 else None
+        super().delete(name)
+        if blob is not None:
+            self._release(blob)
+
+    def _release(self, blob: Path) -> None:
+        try:
+            if blob.stat().st_nlink == 1:
+                blob.unlink()
+        except FileNotFoundError:
+            pass
+
+    def deduplicate(self, names: Iterable[str]) -> dict:
+        """
+        Übernimmt bestehende (vor der Umstellung oder per Restore geschriebene) Dateien in den
+        Blob-Speicher: gleiche Inhalte werden durch einen Link auf den vorhandenen Blob ersetzt.
+        """
+        stats = {"files": 0, "linked": 0, "saved_bytes": 0}
+        for name in names:
+            path = Path(self.path(name))
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            stats["files"] += 1
+            if stat.st_nlink > 1:
+                continue
+
+            blob = self.blob_path(_file_digest(path))
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.link(path, blob)
+                continue
+
+            # Atomar ersetzen: erst Link neben der Datei anlegen, dann darüber verschieben
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            os.link(blob, tmp_path)
+            os.replace(tmp_path, path)
+            stats["linked"] += 1
+            stats["saved_bytes"] += stat.st_size
+        return stats
+
+    def collect_garbage(self, min_age_seconds: int = 3600) -> int:
+        """
+        Löscht Blobs ohne Referenz (Linkanzahl 1), z.B. nach dem Orphan-Cleanup oder einem Restore.
+        Junge Blobs bleiben stehen, sie können zu einem gerade laufenden Upload gehören.
+        """
+        removed = 0
+        if not self.blobs_root.exists():
+            return removed
+        cutoff = time.time() - min_age_seconds
+        for root, _, filenames in os.walk(self.blobs_root):
+            for filename in filenames:
+                blob = Path(root) / filename
+                try:
+                    stat = blob.stat()
+                except FileNotFoundError:
+                    continue
+                if stat.st_nlink == 1 and stat.st_mtime < cutoff:
+                    blob.unlink(missing_ok=True)
+                    removed += 1
+        if removed:
+            log_event(logger, LOG_SOURCE, "media_blobs_collected", removed=removed)
+        return removed
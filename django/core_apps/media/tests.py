@@ -1,14 +1,27 @@
+import hashlib
+import io
+import os
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.db.utils import OperationalError
 from django.test import override_settings
+from PIL import Image
 from rest_framework.test import APITestCase
 
 from core_apps.common.test_helpers import EndpointSmokeMixin
 from core_apps.media.apps import MediaConfig
-from core_apps.media.views import _as_bool, _safe_refset
+from core_apps.media.file_index import MediaFileIndex
+from core_apps.media.references import safe_refset
+from core_apps.media.registry import media_folders
+from core_apps.media.storage import ContentAddressedStorage
+from core_apps.media.uploads import normalize_image_upload
+from core_apps.media.views import _as_bool
+from core_apps.news.models import News
 from core_apps.users.models import Role, User
 
 
@@ -96,6 +109,85 @@ class MediaEndpointTests(EndpointSmokeMixin, APITestCase):
 
         self.assertEqual(response.status_code, 200)
 
+    def test_media_news_honours_if_modified_since(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            news_dir = Path(tmp) / "news"
+            news_dir.mkdir(parents=True, exist_ok=True)
+            (news_dir / "ok.txt").write_bytes(b"ok")
+
+            with override_settings(MEDIA_ROOT=tmp):
+                response = self.request_method("get", "files/news/ok.txt")
+                last_modified = response["Last-Modified"]
+                response.close()
+                response = self.client.get(self.build_api_url("files/news/ok.txt"), HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["Cache-Control"], "public, max-age=300, must-revalidate")
+
+    def test_media_replaced_under_same_name_is_revalidated(self):
+        user = self.create_user("media_revalidate")
+        self.client.force_authenticate(user=user)
+        with tempfile.TemporaryDirectory() as tmp:
+            inventar_dir = Path(tmp) / "inventar"
+            inventar_dir.mkdir(parents=True, exist_ok=True)
+            file_path = inventar_dir / "item.jpg"
+            file_path.write_bytes(b"alt")
+
+            with override_settings(MEDIA_ROOT=tmp):
+                first = self.request_method("get", "files/inventar/item.jpg")
+                first.close()
+                # Foto ersetzt: gleicher Name, neuer Inhalt
+                file_path.write_bytes(b"neues foto")
+                second = self.client.get(
+                    self.build_api_url("files/inventar/item.jpg"), HTTP_IF_NONE_MATCH=first["ETag"]
+                )
+                body = b"".join(second.streaming_content)
+
+        self.assertEqual(first["Cache-Control"], "private, no-cache")
+        self.assertNotIn("immutable", first["Cache-Control"])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(body, b"neues foto")
+
+    def test_media_derivative_is_generated_on_first_request(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            news_dir = Path(tmp) / "news"
+            news_dir.mkdir(parents=True, exist_ok=True)
+            Image.new("RGB", (2000, 1000), "red").save(news_dir / "foto.jpg", format="JPEG")
+
+            with override_settings(MEDIA_ROOT=tmp):
+                response = self.request_method("get", "files/derivatives/thumb/news/foto.jpg")
+                body = b"".join(response.streaming_content)
+                cached = Path(tmp, "cache", "derivatives", "news", "foto.jpg", "thumb.webp").exists()
+                unknown = self.request_method("get", "files/derivatives/huge/news/foto.jpg")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertEqual(Image.open(io.BytesIO(body)).size, (320, 160))
+        self.assertTrue(cached)
+        self.assertEqual(unknown.status_code, 404)
+
+    def test_media_derivative_requires_authentication_for_internal_folders(self):
+        self.assert_requires_authentication("files/derivatives/thumb/inventar/foto.jpg")
+
+    def test_media_derivative_rejects_traversal_out_of_public_folder(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, "news").mkdir()
+            Path(tmp, "einsatzberichte").mkdir()
+            Image.new("RGB", (800, 600), "blue").save(Path(tmp, "einsatzberichte", "geheim.jpg"), format="JPEG")
+
+            with override_settings(MEDIA_ROOT=tmp):
+                encoded = self.request_method("get", "files/derivatives/thumb/news/%2e%2e/einsatzberichte/geheim.jpg")
+                plain = self.request_method("get", "files/derivatives/thumb/news/../einsatzberichte/geheim.jpg")
+                self.client.force_authenticate(user=self.create_user("media_traversal"))
+                authenticated = self.request_method("get", "files/derivatives/thumb/news/%2e%2e/einsatzberichte/geheim.jpg")
+                rendered = Path(tmp, "cache", "derivatives", "einsatzberichte").exists()
+
+        self.assertEqual(encoded.status_code, 404)
+        self.assertEqual(plain.status_code, 404)
+        self.assertEqual(authenticated.status_code, 404)
+        self.assertNotIn("public", encoded.get("Cache-Control", ""))
+        self.assertFalse(rendered)
+
     def test_media_app_config_values(self):
         self.assertEqual(MediaConfig.name, "core_apps.media")
         self.assertEqual(MediaConfig.default_auto_field, "django.db.models.BigAutoField")
@@ -189,7 +281,7 @@ class MediaEndpointTests(EndpointSmokeMixin, APITestCase):
             (news_dir / "old.png").write_bytes(b"x")
 
             with override_settings(MEDIA_ROOT=tmp):
-                with patch("core_apps.media.views._safe_refset", return_value=(set(), True)):
+                with patch("core_apps.media.references.safe_refset", return_value=(set(), True)):
                     blocked = self.request_method(
                         "post",
                         "files/cleanup-orphans/",
@@ -225,6 +317,32 @@ class MediaEndpointTests(EndpointSmokeMixin, APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(any(item.get("skipped") for item in response.data.get("items", [])))
 
+    def test_media_cleanup_reconciles_index_with_changed_directories(self):
+        admin = self.create_user("media_admin_index", ("ADMIN",))
+        self.client.force_authenticate(user=admin)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            news_dir = Path(tmp) / "news"
+            news_dir.mkdir(parents=True, exist_ok=True)
+            (news_dir / "first.png").write_bytes(b"x")
+
+            with override_settings(MEDIA_ROOT=tmp):
+                first = self.request_method("post", "files/cleanup-orphans/", data={"target": "news"})
+                # Ohne Signal (z.B. manuell kopiert): der Abgleich über die Ordner-mtime findet die Datei
+                (news_dir / "copied.png").write_bytes(b"x")
+                cached = self.request_method("post", "files/cleanup-orphans/", data={"target": "news"})
+                rebuilt = self.request_method(
+                    "post",
+                    "files/cleanup-orphans/",
+                    data={"target": "news", "rebuild_index": "ja"},
+                )
+
+            self.assertTrue((Path(tmp) / "cache" / "media_index.sqlite3").exists())
+
+        self.assertEqual(first.data["summary"]["orphan"], 1)
+        self.assertEqual(cached.data["summary"]["orphan"], 2)
+        self.assertEqual(rebuilt.data["summary"]["orphan"], 2)
+
 
 class MediaCleanupHelpersTests(APITestCase):
     def test_as_bool_variants(self):
@@ -244,7 +362,7 @@ class MediaCleanupHelpersTests(APITestCase):
         class FakeModel:
             objects = FakeQuerySet()
 
-        refs, missing = _safe_refset(FakeModel, "foto")
+        refs, missing = safe_refset(FakeModel, "foto")
 
         self.assertFalse(missing)
         self.assertEqual(refs, {"a.png", "b.jpg"})
@@ -266,7 +384,7 @@ class MediaCleanupHelpersTests(APITestCase):
         class FakeModel:
             objects = FakeQuerySet()
 
-        refs, missing = _safe_refset(FakeModel, "foto", "einsatzberichte")
+        refs, missing = safe_refset(FakeModel, "foto", "einsatzberichte")
 
         self.assertFalse(missing)
         self.assertEqual(refs, {"12/a.png", "13/fotos/b.jpg", "c.pdf"})
@@ -282,7 +400,163 @@ class MediaCleanupHelpersTests(APITestCase):
         class FakeModel:
             objects = FakeQuerySet()
 
-        refs, missing = _safe_refset(FakeModel, "foto")
+        refs, missing = safe_refset(FakeModel, "foto")
 
         self.assertEqual(refs, set())
         self.assertTrue(missing)
+
+
+class MediaFileIndexTests(APITestCase):
+    def test_registry_discovers_upload_folders(self):
+        folders = media_folders()
+
+        for folder in ("news", "inventar", "homepage", "einsatzberichte", "anwesenheitsliste", "fahrzeuge"):
+            self.assertIn(folder, folders)
+        self.assertNotIn("cache", folders)
+
+    def test_index_tracks_saved_and_deleted_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(MEDIA_ROOT=tmp):
+                index = MediaFileIndex()
+                index.rebuild(media_folders())
+
+                news = News.objects.create(
+                    title="Index",
+                    text="Text",
+                    foto=SimpleUploadedFile("index.gif", b"GIF89a", content_type="image/gif"),
+                )
+                self.assertEqual(index.files("news"), {Path(news.foto.name).name})
+
+                news.foto.storage.delete(news.foto.name)
+                news.delete()
+                self.assertEqual(index.files("news"), set())
+
+    def test_existing_drops_stale_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "news").mkdir()
+            (Path(tmp) / "news" / "a.png").write_bytes(b"x")
+            (Path(tmp) / "news" / "b.png").write_bytes(b"x")
+            index = MediaFileIndex(tmp)
+            index.rebuild(["news"])
+            (Path(tmp) / "news" / "b.png").unlink()
+
+            self.assertEqual(index.existing("news", ["a.png", "b.png"]), ["a.png"])
+            self.assertEqual(index.files("news"), {"a.png"})
+
+
+    def test_reconcile_picks_up_files_written_without_model_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "news" / "alt").mkdir(parents=True)
+            (root / "news" / "a.png").write_bytes(b"x")
+            (root / "news" / "alt" / "b.png").write_bytes(b"x")
+            (root / "inventar").mkdir()
+            for directory in (root / "news" / "alt", root / "news", root / "inventar"):
+                os.utime(directory, (1, 1))
+            index = MediaFileIndex(tmp)
+            index.rebuild(["news", "inventar"])
+
+            self.assertEqual(index.reconcile(["news", "inventar"]), 0)
+
+            # Upload ohne gespeichertes Model (z.B. Rollback) und manuell entfernter Ordner
+            (root / "news" / "neu").mkdir()
+            (root / "news" / "neu" / "c.png").write_bytes(b"x")
+            (root / "news" / "alt" / "b.png").unlink()
+            (root / "news" / "alt").rmdir()
+
+            self.assertEqual(index.reconcile(["news", "inventar"]), 1)
+            self.assertEqual(index.files("news"), {"a.png", "neu/c.png"})
+
+
+class ContentAddressedStorageTests(APITestCase):
+    def test_identical_uploads_share_one_blob_until_last_delete(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = ContentAddressedStorage(location=tmp)
+            first = storage.save("fahrzeuge/1.jpg", ContentFile(b"same-photo"))
+            second = storage.save("fahrzeuge/raeume/7.jpg", ContentFile(b"same-photo"))
+            blob = storage.blob_path(hashlib.sha256(b"same-photo").hexdigest())
+
+            self.assertEqual((first, second), ("fahrzeuge/1.jpg", "fahrzeuge/raeume/7.jpg"))
+            self.assertEqual(blob.stat().st_nlink, 3)
+            self.assertTrue(os.path.samefile(storage.path(first), storage.path(second)))
+
+            storage.delete(first)
+            self.assertTrue(blob.exists())
+            self.assertEqual(storage.open(second).read(), b"same-photo")
+
+            storage.delete(second)
+            self.assertFalse(blob.exists())
+
+    def test_name_collision_keeps_stable_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = ContentAddressedStorage(location=tmp)
+            first = storage.save("news/a.png", ContentFile(b"one"))
+            second = storage.save("news/a.png", ContentFile(b"two"))
+
+            self.assertEqual(first, "news/a.png")
+            self.assertNotEqual(second, first)
+            self.assertEqual(storage.open(first).read(), b"one")
+            self.assertEqual(storage.open(second).read(), b"two")
+
+    @override_settings(MEDIA_DEDUPLICATE=False)
+    def test_disabled_deduplication_writes_plain_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = ContentAddressedStorage(location=tmp)
+            name = storage.save("news/a.png", ContentFile(b"plain"))
+
+            self.assertEqual(os.stat(storage.path(name)).st_nlink, 1)
+            self.assertFalse(storage.blobs_root.exists())
+
+    def test_deduplicate_command_links_existing_copies_and_collects_garbage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "news").mkdir()
+            (Path(tmp) / "inventar").mkdir()
+            (Path(tmp) / "news" / "a.png").write_bytes(b"copy")
+            (Path(tmp) / "inventar" / "b.png").write_bytes(b"copy")
+            storage = ContentAddressedStorage(location=tmp)
+            orphan_blob = storage.blob_path("ff" * 32)
+            orphan_blob.parent.mkdir(parents=True)
+            orphan_blob.write_bytes(b"unreferenced")
+
+            with override_settings(MEDIA_ROOT=tmp):
+                out = io.StringIO()
+                call_command("deduplicate_media", min_age=0, stdout=out)
+
+            self.assertIn("files=2, linked=1, saved_bytes=4, blobs_removed=1", out.getvalue())
+            self.assertTrue(os.path.samefile(Path(tmp) / "news" / "a.png", Path(tmp) / "inventar" / "b.png"))
+            self.assertFalse(orphan_blob.exists())
+
+
+class MediaUploadNormalizationTests(APITestCase):
+    def _jpeg_upload(self, size, orientation=None):
+        buffer = io.BytesIO()
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        Image.new("RGB", size, "blue").save(buffer, format="JPEG", quality=100, exif=exif)
+        return SimpleUploadedFile("handy foto.jpeg", buffer.getvalue(), content_type="image/jpeg")
+
+    @override_settings(MEDIA_UPLOAD_MAX_EDGE=400)
+    def test_large_photo_is_downscaled_rotated_and_stripped(self):
+        upload = self._jpeg_upload((1200, 800), orientation=6)
+
+        result = normalize_image_upload(upload)
+
+        self.assertIsNot(result, upload)
+        self.assertEqual(result.name, "handy foto.jpg")
+        self.assertLess(result.size, upload.size)
+        with Image.open(result) as img:
+            self.assertEqual(img.size, (267, 400))
+            self.assertFalse(img.getexif())
+
+    def test_small_png_without_metadata_is_kept(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (10, 10), "red").save(buffer, format="PNG")
+        upload = SimpleUploadedFile("klein.png", buffer.getvalue(), content_type="image/png")
+
+        self.assertIs(normalize_image_upload(upload), upload)
+
+    def test_non_image_is_returned_unchanged(self):
+        upload = SimpleUploadedFile("kaputt.png", b"abc", content_type="image/png")
+
+        self.assertIs(normalize_image_upload(upload), upload)
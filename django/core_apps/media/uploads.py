@@ -0,0 +1,109 @@
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from core_apps.common.logging_utils import log_event
+
+logger = logging.getLogger(__name__)
+LOG_SOURCE = "media"
+
+# Pillow-Format -> (Ausgabeformat, Endung, Content-Type); andere Formate (GIF, SVG, ...) bleiben unverändert
+NORMALIZED_FORMATS = {
+    "JPEG": ("JPEG", "jpg", "image/jpeg"),
+    "MPO": ("JPEG", "jpg", "image/jpeg"),
+    "WEBP": ("WEBP", "webp", "image/webp"),
+    "PNG": ("PNG", "png", "image/png"),
+}
+
+EXIF_ORIENTATION_TAG = 0x0112
+XMP_INFO_KEYS = ("xmp", "XML:com.adobe.xmp")
+
+
+def _rewind(file) -> None:
+    try:
+        file.seek(0)
+    except (AttributeError, OSError):
+        pass
+
+
+def normalize_image_upload(file):
+    """
+    Verkleinert ein hochgeladenes Foto auf MEDIA_UPLOAD_MAX_EDGE (längste Kante), wendet die
+    EXIF-Orientierung an und speichert ohne Metadaten (GPS, Kamera) neu. JPEG/WebP werden auf
+    MEDIA_UPLOAD_QUALITY rekomprimiert; bereits kleine Dateien ohne Metadaten bleiben unverändert.
+
+    Pillow liest direkt aus dem Upload (bei großen Dateien die TemporaryUploadedFile auf der Platte),
+    JPEGs werden per draft() bereits verkleinert dekodiert. Das Ergebnis landet in einer
+    SpooledTemporaryFile, die ab FILE_UPLOAD_MAX_MEMORY_SIZE auf die Platte ausweicht.
+    Nicht lesbare oder nicht unterstützte Dateien werden unverändert zurückgegeben.
+    """
+    if not file or not hasattr(file, "read") or not getattr(settings, "MEDIA_UPLOAD_NORMALIZE", True):
+        return file
+
+    max_edge = int(getattr(settings, "MEDIA_UPLOAD_MAX_EDGE", 2560))
+    quality = int(getattr(settings, "MEDIA_UPLOAD_QUALITY", 85))
+    original_bytes = getattr(file, "size", None)
+
+    _rewind(file)
+    try:
+        with Image.open(file) as img:
+            target = NORMALIZED_FORMATS.get(img.format)
+            # Animationen (GIF/WebP) nicht anfassen, MPO ist ein JPEG mit eingebetteter Vorschau
+            if target is None or (getattr(img, "n_frames", 1) > 1 and img.format != "MPO"):
+                _rewind(file)
+                return file
+            fmt, ext, content_type = target
+
+            exif = img.getexif()
+            rotated = exif.get(EXIF_ORIENTATION_TAG, 1) not in (None, 1)
+            too_large = max(img.size) > max_edge
+            has_metadata = bool(exif) or any(key in img.info for key in XMP_INFO_KEYS)
+            if not too_large and not has_metadata and (fmt == "PNG" or original_bytes is None):
+                _rewind(file)
+                return file
+
+            original_size = img.size
+            img.draft("RGB", (max_edge, max_edge))
+            result = ImageOps.exif_transpose(img)
+            result.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            if fmt == "JPEG" and result.mode not in ("RGB", "L"):
+                result = result.convert("RGB")
+
+            if fmt == "PNG":
+                save_kwargs = {"optimize": True}
+            elif fmt == "JPEG":
+                save_kwargs = {"quality": quality, "optimize": True, "progressive": True}
+            else:
+                save_kwargs = {"quality": quality}
+
+            output = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+            result.save(output, format=fmt, **save_kwargs)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        log_event(logger, LOG_SOURCE, "media_upload_normalize_skipped", level="warning",
+                  name=getattr(file, "name", ""), error=str(e))
+        _rewind(file)
+        return file
+
+    size = output.tell()
+    # Reine Rekomprimierung ohne Gewinn und ohne zu entfernende Metadaten: Original behalten
+    if not too_large and not rotated and not has_metadata and size >= original_bytes:
+        output.close()
+        _rewind(file)
+        return file
+
+    output.seek(0)
+    base, _ = os.path.splitext(os.path.basename(getattr(file, "name", "") or "upload"))
+    name = f"{base}.{ext}"
+    log_event(
+        logger, LOG_SOURCE, "media_upload_normalized",
+        name=name,
+        original_size=f"{original_size[0]}x{original_size[1]}",
+        size=f"{result.size[0]}x{result.size[1]}",
+        original_bytes=original_bytes,
+        bytes=size,
+    )
+    return UploadedFile(file=output, name=name, content_type=content_type, size=size)
@@ -6,6 +6,7 @@ from .views import (
     MediaEinsatzberichteGetFileView,
     MediaAnwesenheitslisteGetFileView,
     MediaCleanupOrphansView,
+    MediaDerivativeGetFileView,
 )
 
 
@@ -15,5 +16,6 @@ urlpatterns = [
     path("inventar/<path:filename>", MediaInventarGetFileView.as_view(), name="inventar-file-get"),
     path("einsatzberichte/<path:filename>", MediaEinsatzberichteGetFileView.as_view(), name="einsatzberichte-file-get"),
     path("anwesenheitsliste/<path:filename>", MediaAnwesenheitslisteGetFileView.as_view(), name="anwesenheitsliste-file-get"),
+    path("derivatives/<str:size>/<path:filename>", MediaDerivativeGetFileView.as_view(), name="media-derivative-get"),
     path("cleanup-orphans/", MediaCleanupOrphansView.as_view(), name="media-cleanup-orphans"),
 ]
@@ -2,18 +2,19 @@ import os
 from pathlib import Path
 
 from django.conf import settings
-from django.http import FileResponse, Http404
-from django.db.utils import OperationalError, ProgrammingError
+from django.core.files.storage import default_storage
+from django.http import Http404
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core_apps.common.file_responses import serve_file
+from core_apps.common.http_cache import CACHE_MEDIA, CACHE_MEDIA_PUBLIC, CachePolicyMixin
 from core_apps.common.permissions import HasAnyRolePermission
-from core_apps.anwesenheitsliste.models import AnwesenheitslisteFoto
-from core_apps.einsatzberichte.models import EinsatzberichtFoto
-from core_apps.homepage.models import HomepageDienstposten
-from core_apps.inventar.models import Inventar
-from core_apps.news.models import News
+from core_apps.media.derivatives import ensure_derivative
+from core_apps.media.file_index import MediaFileIndex
+from core_apps.media.references import folder_refs
+from core_apps.media.registry import media_folders
 
 
 def _as_bool(value):
@@ -24,46 +25,10 @@ def _as_bool(value):
     return bool(value)
 
 
-def _safe_refset(model_class, image_field, subdirectory=None):
-    prefix = f"{str(subdirectory).strip('/')}/" if subdirectory else ""
-
-    try:
-        values = model_class.objects.exclude(**{f"{image_field}__isnull": True}).exclude(
-            **{image_field: ""}
-        ).values_list(image_field, flat=True)
-
-        references = set()
-        for value in values:
-            if not value:
-                continue
-
-            normalized = str(value).replace("\\", "/").lstrip("/")
-            if prefix and normalized.startswith(prefix):
-                references.add(normalized[len(prefix):])
-                continue
-
-            if prefix:
-                references.add(normalized if "/" in normalized else Path(normalized).name)
-                continue
-
-            references.add(Path(normalized).name)
-
-        return references, False
-    except (OperationalError, ProgrammingError):
-        return set(), True
-
-
-def _collect_media_files(base_folder):
-    return {
-        file_path.relative_to(base_folder).as_posix()
-        for file_path in base_folder.rglob("*")
-        if file_path.is_file()
-    }
-
-
-class BaseMediaGetFileView(APIView):
+class BaseMediaGetFileView(CachePolicyMixin, APIView):
     """Basisklasse für den Dateiabruf von Mediendateien."""
     permission_classes = [permissions.IsAuthenticated]
+    cache_policy = CACHE_MEDIA
     subdirectory = ""
 
     def _resolve_file_path(self, filename: str) -> Path:
@@ -82,18 +47,20 @@ class BaseMediaGetFileView(APIView):
         if not file_path.exists() or not file_path.is_file():
             raise Http404("Datei nicht gefunden!")
 
-        return FileResponse(open(file_path, "rb"), as_attachment=False, filename=file_path.name)
+        return serve_file(request, file_path)
 
 
 class MediaNewsGetFileView(BaseMediaGetFileView):
     """Abruf von News-Mediendateien."""
     permission_classes = [permissions.AllowAny]
+    cache_policy = CACHE_MEDIA_PUBLIC
     subdirectory = "news"
 
 
 class MediaHomepageGetFileView(BaseMediaGetFileView):
     """Abruf von Homepage-Mediendateien."""
     permission_classes = [permissions.AllowAny]
+    cache_policy = CACHE_MEDIA_PUBLIC
     subdirectory = "homepage"
 
 class MediaInventarGetFileView(BaseMediaGetFileView):
@@ -111,35 +78,79 @@ class MediaAnwesenheitslisteGetFileView(BaseMediaGetFileView):
     subdirectory = "anwesenheitsliste"
 
 
+class MediaDerivativeGetFileView(CachePolicyMixin, APIView):
+    """
+    Verkleinerte Varianten (thumb/medium) von Mediendateien, beim ersten Abruf erzeugt.
+    Berechtigung wie beim Original: news/ und homepage/ öffentlich, alles andere nur angemeldet.
+    """
+    public_subdirectories = {"news", "homepage"}
+    subdirectories = {"news", "homepage", "inventar", "einsatzberichte", "anwesenheitsliste", "fahrzeuge"}
+    media_subdirectory = None
+
+    def _resolve_subdirectory(self, filename: str) -> str:
+        """
+        Ordner (erstes Segment) des angefragten Originals. Vor der Berechtigungsprüfung, damit
+        z.B. news/../einsatzberichte/... nicht als öffentlicher Pfad durchgeht.
+        """
+        parts = str(filename).replace("\\", "/").split("/")
+        if len(parts) < 2 or parts[0] not in self.subdirectories or any(p in ("", ".", "..") for p in parts):
+            raise Http404("Ungültiger Dateipfad!")
+
+        base_dir = (Path(settings.MEDIA_ROOT).resolve() / parts[0]).resolve()
+        if not (base_dir / "/".join(parts[1:])).resolve().is_relative_to(base_dir):
+            raise Http404("Ungültiger Dateipfad!")
+        return parts[0]
+
+    def initial(self, request, *args, **kwargs):
+        self.media_subdirectory = self._resolve_subdirectory(kwargs.get("filename", ""))
+        super().initial(request, *args, **kwargs)
+
+    def _is_public(self) -> bool:
+        return self.media_subdirectory in self.public_subdirectories
+
+    def get_permissions(self):
+        if self._is_public():
+            return [permissions.AllowAny()]
+        return [permissions.IsAuthenticated()]
+
+    def get_cache_policy(self):
+        return CACHE_MEDIA_PUBLIC if self._is_public() else CACHE_MEDIA
+
+    def get(self, request, size, filename, *args, **kwargs):
+        file_path = ensure_derivative(filename, size)
+        if file_path is None:
+            raise Http404("Datei nicht gefunden!")
+
+        return serve_file(request, file_path)
+
+
 class MediaCleanupOrphansView(APIView):
     permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN")]
 
     def post(self, request, *args, **kwargs):
         target = request.data.get("target", "all")
-        valid_targets = {"all", "news", "homepage", "inventar", "einsatzberichte", "anwesenheitsliste"}
+        folders = media_folders()
+        valid_targets = {"all", *folders}
         if target not in valid_targets:
             allowed = ", ".join(sorted(valid_targets))
             return Response({"detail": f"target muss einer der folgenden Werte sein: {allowed}."}, status=status.HTTP_400_BAD_REQUEST)
 
         should_delete = _as_bool(request.data.get("delete", False))
         allow_missing_db = _as_bool(request.data.get("allow_missing_db", False))
-
-        checks = []
-        if target in ("all", "news"):
-            checks.append(("news", lambda: _safe_refset(News, "foto")))
-        if target in ("all", "homepage"):
-            checks.append(("homepage", lambda: _safe_refset(HomepageDienstposten, "photo", "homepage")))
-        if target in ("all", "inventar"):
-            checks.append(("inventar", lambda: _safe_refset(Inventar, "foto")))
-        if target in ("all", "einsatzberichte"):
-            checks.append(("einsatzberichte", lambda: _safe_refset(EinsatzberichtFoto, "foto", "einsatzberichte")))
-        if target in ("all", "anwesenheitsliste"):
-            checks.append(("anwesenheitsliste", lambda: _safe_refset(AnwesenheitslisteFoto, "foto", "anwesenheitsliste")))
+        rebuild_index = _as_bool(request.data.get("rebuild_index", False))
 
         media_root = Path(settings.MEDIA_ROOT)
         if not media_root.exists():
             return Response({"detail": f"MEDIA_ROOT existiert nicht: {media_root}"}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Dateien aus dem persistenten Index statt rglob; Aufbau nur beim ersten Lauf oder auf Anfrage,
+        # sonst Abgleich der Verzeichnisse mit geänderter mtime (auch Dateien ohne gespeichertes Model)
+        index = MediaFileIndex(media_root)
+        if rebuild_index:
+            index.rebuild(folders)
+        else:
+            index.ensure_built(folders)
+
         summary = {
             "files": 0,
             "refs": 0,
@@ -155,7 +166,7 @@ class MediaCleanupOrphansView(APIView):
 
         all_orphans = []
 
-        for folder_name, ref_loader in checks:
+        for folder_name in folders if target == "all" else [target]:
             folder_path = media_root / folder_name
             if not folder_path.exists():
                 result["items"].append(
@@ -171,9 +182,9 @@ class MediaCleanupOrphansView(APIView):
                 )
                 continue
 
-            files = _collect_media_files(folder_path)
-            refs, missing_db = ref_loader()
-            orphans = sorted(files - refs)
+            files = index.files(folder_name)
+            refs, missing_db = folder_refs(folder_name)
+            orphans = sorted(index.existing(folder_name, files - refs))
 
             summary["files"] += len(files)
             summary["refs"] += len(refs)
@@ -202,13 +213,15 @@ class MediaCleanupOrphansView(APIView):
             )
 
         if should_delete:
-            deleted = 0
+            deleted = []
             for folder_name, filename in all_orphans:
                 file_path = media_root / folder_name / filename
                 if file_path.exists() and file_path.is_file():
-                    file_path.unlink()
-                    deleted += 1
-            result["deleted"] = deleted
+                    # Über den Storage löschen, damit nicht mehr referenzierte Blobs mit entfernt werden
+                    default_storage.delete(f"{folder_name}/{filename}")
+                    deleted.append(f"{folder_name}/{filename}")
+            index.remove(deleted)
+            result["deleted"] = len(deleted)
             result["dry_run"] = False
 
         return Response(result)
\ No newline at end of file
@@ -6,3 +6,6 @@ class MitgliederConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core_apps.mitglieder"
     verbose_name = _("Mitglieder")
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,160 @@
+import uuid
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Mitglied, MitgliederVerzeichnis, MitgliedLoeschung
+
+VERZEICHNIS_PKID = 1
+
+# Datumsformat wie im MitgliedSerializer (REST_FRAMEWORK["DATE_FORMAT"]), das Frontend zerlegt "TT.MM.JJJJ"
+_DATE_FIELD = serializers.DateField()
+
+# Kompakte Projektion für Auswahllisten und Zuordnungen in den Modulen (ohne Zeitstempel)
+DIRECTORY_FIELDS = (
+    "pkid",
+    "id",
+    "stbnr",
+    "vorname",
+    "nachname",
+    "dienstgrad",
+    "svnr",
+    "geburtsdatum",
+    "hauptberuflich",
+    "dienststatus",
+)
+
+# Bereich -> ausgeschlossene Dienststatus
+SCOPES = {
+    "alle": (),
+    "ohne_reserve": (Mitglied.Dienststatus.RESERVE,),
+    "im_dienst": (Mitglied.Dienststatus.ABGEMELDET, Mitglied.Dienststatus.RESERVE),
+}
+
+
+class DirectoryState(NamedTuple):
+    epoch: str
+    version: int
+    basis_version: int
+
+    def etag(self, scope: str) -> str:
+        return f'"{self.epoch}-{self.version}-{scope}"'
+
+
+def directory_state() -> DirectoryState:
+    row = (
+        MitgliederVerzeichnis.objects.filter(pkid=VERZEICHNIS_PKID)
+        .values_list("id", "version", "basis_version")
+        .first()
+    )
+    if row is None:
+        return DirectoryState("0", 0, 0)
+    epoch, version, basis_version = row
+    return DirectoryState(epoch.hex, version, basis_version)
+
+
+def bump_version() -> int:
+    """Erhöht den Verzeichnisstand und liefert den neuen Wert (Zeilensperre bis zum Commit)."""
+    with transaction.atomic(savepoint=False):
+        rows = MitgliederVerzeichnis.objects.filter(pkid=VERZEICHNIS_PKID)
+        if not rows.update(version=F("version") + 1):
+            MitgliederVerzeichnis.objects.get_or_create(pkid=VERZEICHNIS_PKID)
+            rows.update(version=F("version") + 1)
+        return rows.values_list("version", flat=True).get()
+
+
+def reset_directory(min_version: int = 0) -> None:
+    """
+    Nach einem Datenbank-Restore: neue Epoche und ein Stand oberhalb aller bisher vergebenen,
+    damit weder Cache-Einträge noch Client-Deltas aus der Zeit vor dem Restore weiterverwendet werden.
+    """
+    with transaction.atomic():
+        verzeichnis, _ = MitgliederVerzeichnis.objects.select_for_update().get_or_create(pkid=VERZEICHNIS_PKID)
+        verzeichnis.version = max(verzeichnis.version, min_version) + 1
+        verzeichnis.basis_version = verzeichnis.version
+        verzeichnis.id = uuid.uuid4()
+        verzeichnis.save(update_fields=["version", "basis_version", "id", "updated_at"])
+        MitgliedLoeschung.objects.filter(version__lte=verzeichnis.basis_version).delete()
+
+
+def prune_deletions() -> int:
+    """
+    Löscht Löschmarken älter als MITGLIEDER_DIRECTORY_TOMBSTONE_DAYS und hebt `basis_version` auf
+    die jüngste davon: Deltas ab einem älteren Stand bekommen dann die volle Liste. Returns Anzahl.
+    """
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "MITGLIEDER_DIRECTORY_TOMBSTONE_DAYS", 30))
+    newest = MitgliedLoeschung.objects.filter(created_at__lt=cutoff).aggregate(newest=Max("version"))["newest"]
+    if newest is None:
+        return 0
+    with transaction.atomic(savepoint=False):
+        MitgliederVerzeichnis.objects.filter(pkid=VERZEICHNIS_PKID, basis_version__lt=newest).update(
+            basis_version=newest
+        )
+        count, _ = MitgliedLoeschung.objects.filter(version__lte=newest).delete()
+    return count
+
+
+def record_deletion(member: Mitglied) -> None:
+    MitgliedLoeschung.objects.create(mitglied_id=member.id, mitglied_pkid=member.pkid, version=bump_version())
+    prune_deletions()
+
+
+def _entry(row: dict) -> dict:
+    row["id"] = str(row["id"])
+    row["geburtsdatum"] = _DATE_FIELD.to_representation(row["geburtsdatum"]) if row["geburtsdatum"] else None
+    return row
+
+
+def _in_scope(dienststatus: str, scope: str) -> bool:
+    return dienststatus not in SCOPES[scope]
+
+
+def _cache_key(state: DirectoryState, scope: str) -> str:
+    return f"mitglieder:verzeichnis:{state.epoch}:{scope}:{state.version}"
+
+
+def snapshot(scope: str, state: Optional[DirectoryState] = None) -> list:
+    """Alle Mitglieder des Bereichs als kompakte Projektion, je Verzeichnisstand einmal gecacht."""
+    state = state or directory_state()
+    key = _cache_key(state, scope)
+    members = cache.get(key)
+    if members is None:
+        members = [
+            _entry(row)
+            for row in Mitglied.objects.exclude(dienststatus__in=SCOPES[scope])
+            .order_by("stbnr")
+            .values(*DIRECTORY_FIELDS)
+        ]
+        cache.set(key, members, getattr(settings, "MITGLIEDER_DIRECTORY_CACHE_TIMEOUT", 3600))
+    return members
+
+
+def delta(scope: str, since: int, state: DirectoryState) -> Optional[dict]:
+    """
+    Änderungen seit `since`: geänderte Mitglieder des Bereichs und gelöschte bzw. aus dem Bereich
+    gefallene Mitglieder. None, wenn `since` nicht (mehr) zum Verzeichnisstand passt.
+    """
+    if since < state.basis_version or since > state.version:
+        return None
+
+    changed = []
+    removed = []
+    for row in Mitglied.objects.filter(version__gt=since).order_by("stbnr").values(*DIRECTORY_FIELDS):
+        if _in_scope(row["dienststatus"], scope):
+            changed.append(_entry(row))
+        else:
+            removed.append({"id": str(row["id"]), "pkid": row["pkid"]})
+
+    removed.extend(
+        {"id": str(mitglied_id), "pkid": pkid}
+        for mitglied_id, pkid in MitgliedLoeschung.objects.filter(version__gt=since).values_list(
+            "mitglied_id", "mitglied_pkid"
+        )
+    )
+    return {"mitglieder": changed, "deleted": removed}
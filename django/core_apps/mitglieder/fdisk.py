@@ -0,0 +1,153 @@
+import codecs
+import csv
+import io
+import zipfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .importer import ImportRowError, parse_date
+from .models import Mitglied
+
+SAMPLE_SIZE = 64 * 1024
+DELIMITERS = ";,\t"
+
+# FDISK-Datumsspalten, aus denen der Dienststatus abgeleitet wird, wenn STATUS leer ist
+STATUS_DATE_COLUMNS = (
+    ("datum_von_jugend", Mitglied.Dienststatus.JUGEND),
+    ("datum_aktiv", Mitglied.Dienststatus.AKTIV),
+    ("datum_in_reserve", Mitglied.Dienststatus.RESERVE),
+)
+LEAVE_DATE_COLUMNS = ("abmeldungsdatum", "sterbedatum")
+
+
+class FdiskFileError(ImportRowError):
+    """Upload ist keine lesbare FDISK-CSV (bzw. ZIP mit CSV)."""
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    FDISK exportiert je nach Version UTF-8 (teils mit BOM) oder Windows-1252. Lässt sich die
+    Stichprobe als UTF-8 lesen, wird UTF-8 angenommen; ein am Ende abgeschnittenes Zeichen zählt
+    dabei nicht als Fehler.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8-sig"
+
+
+def detect_delimiter(sample: str) -> str:
+    header = sample.splitlines()[0] if sample else ""
+    try:
+        return csv.Sniffer().sniff(header, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return ";"
+
+
+@contextmanager
+def open_upload(upload):
+    """
+    Binärstream der CSV: direkt oder die erste .csv-Datei eines ZIP-Archivs. Archiv und Eintrag
+    werden beim Verlassen geschlossen, die Upload-Datei selbst gehört dem Request.
+    """
+    upload.seek(0)
+    if not zipfile.is_zipfile(upload):
+        upload.seek(0)
+        yield upload
+        return
+
+    upload.seek(0)
+    with zipfile.ZipFile(upload) as archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(".csv")
+            and not info.filename.startswith("__MACOSX/")
+        ]
+        if not members:
+            raise FdiskFileError("ZIP-Archiv enthält keine CSV-Datei.")
+        with archive.open(members[0]) as member:
+            yield member
+
+
+def derive_status(record: dict) -> str:
+    """STATUS aus der Datei, sonst aus den Datumsspalten (Abmeldung vor jüngstem Wechsel)."""
+    status = str(record.get("status") or "").strip()
+    if status:
+        return status
+    if any(parse_date(record.get(column)) for column in LEAVE_DATE_COLUMNS):
+        return Mitglied.Dienststatus.ABGEMELDET
+
+    latest = None
+    derived = ""
+    for column, candidate in STATUS_DATE_COLUMNS:
+        value = parse_date(record.get(column))
+        if value is not None and (latest is None or value >= latest):
+            latest, derived = value, candidate
+    return derived
+
+
+class FdiskCsvReader:
+    """
+    Liest einen FDISK-Mitgliederexport zeilenweise aus dem Upload (CSV oder ZIP) und liefert
+    Importzeilen für MitgliedImport. Es wird nie die ganze Datei decodiert oder gehalten.
+
+    Enthält der Export mehrere Feuerwehren (Abschnitts-/Bezirksexport), werden nur Zeilen der
+    eigenen FW_NUMMER übernommen; die übrigen zählen als `skipped`.
+    """
+
+    def __init__(self, upload, fw_nummer: Optional[str] = None):
+        self.upload = upload
+        self.fw_nummer = str(fw_nummer or "").strip()
+        self.skipped = 0
+
+    @staticmethod
+    def _text_stream(stream):
+        sample = stream.read(SAMPLE_SIZE)
+        if not sample.strip():
+            raise FdiskFileError("CSV-Datei ist leer.")
+        stream.seek(0)
+        encoding = detect_encoding(sample)
+        delimiter = detect_delimiter(sample.decode(encoding, errors="replace"))
+        return io.TextIOWrapper(stream, encoding=encoding, errors="replace", newline=""), delimiter
+
+    def __iter__(self) -> Iterator[dict]:
+        with open_upload(self.upload) as stream:
+            yield from self._records(stream)
+
+    def _records(self, stream) -> Iterator[dict]:
+        text, delimiter = self._text_stream(stream)
+        try:
+            reader = csv.DictReader(text, delimiter=delimiter)
+            fieldnames = [str(name or "").strip().lower() for name in reader.fieldnames or ()]
+            if "stbnr" not in fieldnames:
+                raise FdiskFileError("Spalte STBNR fehlt (kein FDISK-Mitgliederexport?).")
+            reader.fieldnames = fieldnames
+
+            for record in reader:
+                if not any(str(value or "").strip() for key, value in record.items() if key):
+                    continue
+                if self._foreign(record):
+                    self.skipped += 1
+                    continue
+                yield {
+                    "stbnr": record.get("stbnr"),
+                    "vorname": record.get("vorname"),
+                    "zuname": record.get("zuname"),
+                    "dienstgrad": record.get("dienstgrad"),
+                    "status": derive_status(record),
+                    "geburtsdatum": record.get("geburtsdatum"),
+                }
+        except csv.Error as e:
+            raise FdiskFileError(f"CSV ungültig: {e}") from e
+        finally:
+            # Stream schließt open_upload, nur den Wrapper lösen
+            text.detach()
+
+    def _foreign(self, record: dict) -> bool:
+        fw_nummer = str(record.get("fw_nummer") or "").strip()
+        if not self.fw_nummer or not fw_nummer:
+            return False
+        return fw_nummer.lstrip("0") != self.fw_nummer.lstrip("0")
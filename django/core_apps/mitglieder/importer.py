@@ -0,0 +1,244 @@
+from datetime import datetime
+from itertools import islice
+from typing import Iterable
+
+from django.conf import settings
+from django.utils import timezone
+
+from .directory import bump_version
+from .models import Mitglied
+
+IMPORT_FIELDS = ("vorname", "nachname", "dienstgrad", "dienststatus", "geburtsdatum")
+
+
+class ImportRowError(ValueError):
+    """Ungültige Importzeile; der gesamte Import wird verworfen."""
+
+
+def normalize_import_item(raw_item) -> dict:
+    data = {}
+    for key, value in (raw_item or {}).items():
+        data[str(key).strip().lower()] = value
+
+    stbnr = data.get("stbnr")
+    try:
+        stbnr = int(str(stbnr).strip()) if stbnr not in (None, "") else None
+    except ValueError:
+        stbnr = None
+
+    return {
+        "stbnr": stbnr,
+        "vorname": str(data.get("vorname") or "").strip(),
+        "nachname": str(data.get("zuname") or data.get("nachname") or "").strip(),
+        "dienstgrad": str(data.get("dienstgrad") or "").strip(),
+        "dienststatus": str(data.get("status") or data.get("dienststatus") or "").strip(),
+        "geburtsdatum": str(data.get("geburtsdatum") or "").strip(),
+    }
+
+
+def parse_date(value):
+    if not value:
+        return None
+    value = str(value).strip()
+
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def map_status(value):
+    incoming = str(value or "").strip().upper()
+    if incoming in {
+        Mitglied.Dienststatus.JUGEND,
+        Mitglied.Dienststatus.AKTIV,
+        Mitglied.Dienststatus.RESERVE,
+        Mitglied.Dienststatus.ABGEMELDET,
+    }:
+        return incoming
+    if incoming == "RESERVIST":
+        return Mitglied.Dienststatus.RESERVE
+    return Mitglied.Dienststatus.AKTIV
+
+
+def chunked(rows: Iterable, size: int):
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class MitgliedImport:
+    """
+    Abgleich von Importzeilen (FDISK) mit dem Mitgliederbestand.
+
+    Zeilen werden blockweise verarbeitet (MITGLIEDER_IMPORT_BATCH_SIZE): je Block eine Abfrage für
+    alle enthaltenen stbnr, der Vergleich läuft im Speicher, im Modus "apply" wird per
+    bulk_create/bulk_update geschrieben (ohne Signale, der Verzeichnisstand wird je Block selbst
+    gesetzt). Der Aufrufer legt den Import in eine Transaktion, damit
+    eine ungültige Zeile (ImportRowError) auch bereits geschriebene Blöcke verwirft.
+    Mehrfach vorkommende stbnr werden gegen den Stand der vorherigen Zeile verglichen.
+    """
+
+    def __init__(self, mode: str = "preview"):
+        self.mode = mode
+        self.changes = []
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.total_rows = 0
+        self._members = {}
+
+    @staticmethod
+    def batch_size() -> int:
+        return max(1, int(getattr(settings, "MITGLIEDER_IMPORT_BATCH_SIZE", 500)))
+
+    def run(self, rows: Iterable) -> "MitgliedImport":
+        for chunk in chunked(rows, self.batch_size()):
+            self.feed(chunk)
+        return self
+
+    def _parse_row(self, index: int, raw_item) -> dict:
+        if not isinstance(raw_item, dict):
+            raise ImportRowError(f"Zeile {index} ist kein Objekt")
+
+        item = normalize_import_item(raw_item)
+        if item["stbnr"] is None:
+            raise ImportRowError(f"stbnr fehlt in Zeile {index}")
+        if not item["geburtsdatum"]:
+            raise ImportRowError(f"geburtsdatum fehlt in Zeile {index}")
+
+        parsed_date = parse_date(item["geburtsdatum"])
+        if parsed_date is None:
+            raise ImportRowError(f"geburtsdatum ungültig in Zeile {index}: {item['geburtsdatum']}")
+
+        return {
+            "stbnr": item["stbnr"],
+            "vorname": item["vorname"] or "",
+            "nachname": item["nachname"] or "",
+            "dienstgrad": item["dienstgrad"] or "",
+            "dienststatus": map_status(item["dienststatus"]),
+            "geburtsdatum": parsed_date,
+        }
+
+    def feed(self, rows: list) -> None:
+        """Verarbeitet einen Block Zeilen; Zeilennummern laufen über alle Blöcke weiter."""
+        start = self.total_rows + 1
+        parsed = [(index, self._parse_row(index, raw)) for index, raw in enumerate(rows, start=start)]
+
+        unknown = {values["stbnr"] for _, values in parsed} - self._members.keys()
+        if unknown:
+            self._members.update((m.stbnr, m) for m in Mitglied.objects.filter(stbnr__in=unknown))
+
+        to_create = []
+        to_update = {}
+        for index, values in parsed:
+            self.total_rows += 1
+            stbnr = values["stbnr"]
+            existing = self._members.get(stbnr)
+
+            if existing is None:
+                member = Mitglied(**values)
+                self._members[stbnr] = member
+                to_create.append(member)
+                self.changes.append(self._create_change(index, values))
+                if self.mode == "apply":
+                    self.created += 1
+                continue
+
+            changed_fields = [field for field in IMPORT_FIELDS if self._current(existing, field) != values[field]]
+            if not changed_fields:
+                self.unchanged += 1
+                continue
+
+            self.changes.append(self._update_change(index, values, existing, changed_fields))
+            for field in changed_fields:
+                setattr(existing, field, values[field])
+            # Neue Mitglieder dieses Blocks werden mit dem aktuellen Stand angelegt
+            if existing.pk is not None:
+                to_update[existing.pk] = existing
+            if self.mode == "apply":
+                self.updated += 1
+
+        if self.mode == "apply":
+            self._write(to_create, list(to_update.values()))
+
+    @staticmethod
+    def _current(member: Mitglied, field: str):
+        value = getattr(member, field)
+        return (value or "") if field == "dienstgrad" else value
+
+    def _write(self, to_create: list, to_update: list) -> None:
+        if not to_create and not to_update:
+            return
+        version = bump_version()
+        if to_create:
+            for member in to_create:
+                member.version = version
+            Mitglied.objects.bulk_create(to_create, batch_size=self.batch_size())
+        if to_update:
+            # bulk_update setzt auto_now nicht selbst
+            now = timezone.now()
+            for member in to_update:
+                member.updated_at = now
+                member.version = version
+            Mitglied.objects.bulk_update(
+                to_update, [*IMPORT_FIELDS, "updated_at", "version"], batch_size=self.batch_size()
+            )
+
+    @staticmethod
+    def _create_change(index: int, values: dict) -> dict:
+        return {
+            "action": "CREATE",
+            "row": index,
+            "stbnr": values["stbnr"],
+            "geburtsdatum": str(values["geburtsdatum"]),
+            "name": f"{values['vorname']} {values['nachname']}".strip(),
+            "changed_fields": ["vorname", "nachname", "dienstgrad", "dienststatus"],
+            "old": None,
+            "new": {
+                "vorname": values["vorname"],
+                "nachname": values["nachname"],
+                "dienstgrad": values["dienstgrad"],
+                "dienststatus": values["dienststatus"],
+            },
+        }
+
+    @staticmethod
+    def _update_change(index: int, values: dict, existing: Mitglied, changed_fields: list) -> dict:
+        return {
+            "action": "UPDATE",
+            "row": index,
+            "stbnr": values["stbnr"],
+            "geburtsdatum": str(values["geburtsdatum"]),
+            "name": f"{values['vorname']} {values['nachname']}".strip(),
+            "changed_fields": changed_fields,
+            "old": {
+                "vorname": existing.vorname,
+                "nachname": existing.nachname,
+                "dienstgrad": existing.dienstgrad,
+                "dienststatus": existing.dienststatus,
+                "geburtsdatum": str(existing.geburtsdatum),
+            },
+            "new": {
+                "vorname": values["vorname"],
+                "nachname": values["nachname"],
+                "dienstgrad": values["dienstgrad"],
+                "dienststatus": values["dienststatus"],
+                "geburtsdatum": str(values["geburtsdatum"]),
+            },
+        }
+
+    def result(self) -> dict:
+        return {
+            "mode": self.mode,
+            "changes": self.changes,
+            "summary": {
+                "created": self.created,
+                "updated": self.updated,
+                "unchanged": self.unchanged,
+                "total_changes": len(self.changes),
+                "total_rows": self.total_rows,
+            },
+        }
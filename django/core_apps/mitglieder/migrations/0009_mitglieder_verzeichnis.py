@@ -0,0 +1,46 @@
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mitglieder', '0008_remove_mitglied_jugend_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MitgliederVerzeichnis',
+            fields=[
+                ('pkid', models.BigAutoField(editable=False, primary_key=True, serialize=False, unique=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('version', models.BigIntegerField(default=0, verbose_name='Version')),
+                ('basis_version', models.BigIntegerField(default=0, verbose_name='Basisversion')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MitgliedLoeschung',
+            fields=[
+                ('pkid', models.BigAutoField(editable=False, primary_key=True, serialize=False, unique=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('mitglied_id', models.UUIDField(verbose_name='Mitglied-ID')),
+                ('mitglied_pkid', models.BigIntegerField(verbose_name='Mitglied-PKID')),
+                ('version', models.BigIntegerField(db_index=True, verbose_name='Version')),
+            ],
+            options={
+                'ordering': ['version'],
+            },
+        ),
+        migrations.AddField(
+            model_name='mitglied',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Version'),
+        ),
+    ]
@@ -24,14 +24,48 @@ class Mitglied(TimeStampedModel):
         choices=Dienststatus.choices,
         default=Dienststatus.AKTIV,
     )
+    # Stand des Mitgliederverzeichnisses bei der letzten Änderung (core_apps.mitglieder.directory)
+    version = models.BigIntegerField(verbose_name=_("Version"), default=0, db_index=True, editable=False)
 
     def __str__(self):
         return f"{self.vorname} {self.nachname}"
+
+    def save(self, *args, **kwargs):
+        # Verzeichnisstand im selben INSERT/UPDATE schreiben; loaddata (raw) ruft save() nicht auf
+        from .directory import bump_version
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or update_fields:
+            self.version = bump_version()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "version"}
+        super().save(*args, **kwargs)
     
     class Meta:
         ordering = ["stbnr"]
 
 
+class MitgliederVerzeichnis(TimeStampedModel):
+    """
+    Einzeiliger Zähler des Mitgliederverzeichnisses. `version` steigt bei jeder Änderung an einem
+    Mitglied; Deltas (since=<version>) sind erst ab `basis_version` gültig (z.B. nach einem Restore).
+    """
+
+    version = models.BigIntegerField(verbose_name=_("Version"), default=0)
+    basis_version = models.BigIntegerField(verbose_name=_("Basisversion"), default=0)
+
+
+class MitgliedLoeschung(TimeStampedModel):
+    """Gelöschtes Mitglied, damit Deltas des Verzeichnisses auch Löschungen melden können."""
+
+    mitglied_id = models.UUIDField(verbose_name=_("Mitglied-ID"))
+    mitglied_pkid = models.BigIntegerField(verbose_name=_("Mitglied-PKID"))
+    version = models.BigIntegerField(verbose_name=_("Version"), db_index=True)
+
+    class Meta:
+        ordering = ["version"]
+
+
 class JugendEvent(TimeStampedModel):
     titel = models.CharField(verbose_name=_("Titel"), max_length=255)
     datum = models.DateField(verbose_name=_("Datum"))
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .directory import record_deletion
+from .models import Mitglied
+
+
+@receiver(post_delete, sender=Mitglied, dispatch_uid="mitglieder_mitglied_deleted")
+def mitglied_deleted(sender, instance, **kwargs):
+    record_deletion(instance)
@@ -1,11 +1,21 @@
+import io
+import zipfile
 from uuid import uuid4
-from datetime import date
+from datetime import date, timedelta
+from unittest.mock import patch
 
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from core_apps.common.test_helpers import EndpointSmokeMixin
-from core_apps.mitglieder.models import Mitglied
+from core_apps.konfiguration.models import Konfiguration
+from core_apps.mitglieder import directory
+from core_apps.mitglieder.fdisk import FdiskCsvReader
+from core_apps.mitglieder.importer import MitgliedImport
+from core_apps.mitglieder.models import Mitglied, MitgliedLoeschung
 
 
 class MitgliederEndpointTests(EndpointSmokeMixin, APITestCase):
@@ -13,6 +23,8 @@ class MitgliederEndpointTests(EndpointSmokeMixin, APITestCase):
         endpoints = [
             "mitglieder/",
             "mitglieder/import/",
+            "mitglieder/import/csv/",
+            "mitglieder/verzeichnis/",
             f"mitglieder/{uuid4()}/",
         ]
 
@@ -134,6 +146,120 @@ class MitgliederEndpointTests(EndpointSmokeMixin, APITestCase):
         stored = Mitglied.objects.get(stbnr=901)
         self.assertEqual(stored.dienststatus, "ABGEMELDET")
 
+    def test_mitglieder_import_uses_constant_number_of_queries(self):
+        for stbnr in range(1, 51):
+            Mitglied.objects.create(stbnr=stbnr, vorname="Alt", nachname="Name", geburtsdatum=date(1990, 1, 1))
+        rows = [
+            {"STBNR": stbnr, "VORNAME": "Neu", "ZUNAME": "Name", "GEBURTSDATUM": "01.01.1990", "STATUS": "AKTIV"}
+            for stbnr in range(1, 101)
+        ]
+
+        with self.assertNumQueries(1):
+            preview = MitgliedImport("preview").run(rows).result()
+        # SELECT + Verzeichnisstand (UPDATE + SELECT) + INSERT + UPDATE (+ Savepoint der Transaktion)
+        with self.assertNumQueries(7):
+            with transaction.atomic():
+                applied = MitgliedImport("apply").run(rows).result()
+
+        self.assertEqual(preview["summary"]["total_changes"], 100)
+        self.assertEqual(applied["summary"]["created"], 50)
+        self.assertEqual(applied["summary"]["updated"], 50)
+        self.assertEqual(Mitglied.objects.filter(vorname="Neu").count(), 100)
+
+    def test_mitglieder_import_rolls_back_on_invalid_row(self):
+        admin = self.create_user_with_roles("ADMIN")
+        self.client.force_authenticate(user=admin)
+
+        rows = [
+            {"STBNR": 501, "VORNAME": "Gut", "ZUNAME": "Zeile", "GEBURTSDATUM": "01.01.2000"},
+            {"STBNR": 502, "VORNAME": "Kaputt", "ZUNAME": "Zeile", "GEBURTSDATUM": "31.02.2000"},
+        ]
+        with self.settings(MITGLIEDER_IMPORT_BATCH_SIZE=1):
+            response = self.request_method("post", "mitglieder/import/", data={"mode": "apply", "rows": rows})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Zeile 2", response.data["detail"])
+        self.assertFalse(Mitglied.objects.filter(stbnr=501).exists())
+
+    def test_mitglieder_import_duplicate_stbnr_compares_against_previous_row(self):
+        rows = [
+            {"STBNR": 600, "VORNAME": "Erst", "ZUNAME": "Name", "GEBURTSDATUM": "01.01.2000"},
+            {"STBNR": 600, "VORNAME": "Zweit", "ZUNAME": "Name", "GEBURTSDATUM": "01.01.2000"},
+        ]
+        with transaction.atomic():
+            result = MitgliedImport("apply").run(rows).result()
+
+        self.assertEqual([change["action"] for change in result["changes"]], ["CREATE", "UPDATE"])
+        self.assertEqual(Mitglied.objects.get(stbnr=600).vorname, "Zweit")
+
+    FDISK_HEADER = "FW_ART;FW_NAME;FW_NUMMER;STATUS;STBNR;DIENSTGRAD;VORNAME;ZUNAME;GEBURTSDATUM;datum_aktiv;datum_in_reserve;abmeldungsdatum\n"
+
+    def upload_fdisk(self, content: bytes, mode="preview", name="export.csv"):
+        admin = self.create_user_with_roles("ADMIN")
+        self.client.force_authenticate(user=admin)
+        upload = SimpleUploadedFile(name, content)
+        return self.client.post(
+            self.build_api_url("mitglieder/import/csv/"), {"mode": mode, "file": upload}, format="multipart"
+        )
+
+    def test_mitglieder_import_csv_preview_and_apply(self):
+        Konfiguration.objects.create(fw_nummer="03313", fw_name="FF Test")
+        content = (
+            self.FDISK_HEADER
+            + "FF;FF Test;03313;AKTIV;701;FM;Anna;Huber;01.02.1990;;;\n"
+            + "FF;FF Test;03313;;702;OFM;Bernd;Maier;03.04.1980;01.01.2000;01.01.2020;\n"
+            + "FF;FF Andere;04410;AKTIV;703;FM;Fremd;Wehr;05.06.1970;;;\n"
+        ).encode("utf-8")
+
+        preview = self.upload_fdisk(content)
+        self.assertEqual(preview.status_code, status.HTTP_200_OK)
+        self.assertEqual(preview.data["summary"]["total_rows"], 2)
+        self.assertEqual(preview.data["summary"]["skipped_rows"], 1)
+        self.assertFalse(Mitglied.objects.filter(stbnr__in=[701, 702]).exists())
+
+        applied = self.upload_fdisk(content, mode="apply")
+        self.assertEqual(applied.status_code, status.HTTP_200_OK)
+        self.assertEqual(applied.data["summary"]["created"], 2)
+        self.assertEqual(Mitglied.objects.get(stbnr=702).dienststatus, Mitglied.Dienststatus.RESERVE)
+        self.assertFalse(Mitglied.objects.filter(stbnr=703).exists())
+
+    def test_mitglieder_import_csv_accepts_zipped_cp1252_export(self):
+        content = (self.FDISK_HEADER + "FF;FF Test;03313;AKTIV;711;LM;Jürgen;Größ;07.08.1975;;;\n").encode("cp1252")
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zipped:
+            zipped.writestr("FDISK Export.csv", content)
+
+        response = self.upload_fdisk(archive.getvalue(), mode="apply", name="export.zip")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        member = Mitglied.objects.get(stbnr=711)
+        self.assertEqual((member.vorname, member.nachname), ("Jürgen", "Größ"))
+
+    def test_fdisk_reader_closes_zip_archive(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zipped:
+            zipped.writestr("export.csv", self.FDISK_HEADER + "FF;FF Test;03313;AKTIV;712;FM;Eva;Berg;;;;\n")
+        opened = []
+        zip_file = zipfile.ZipFile
+
+        def spy(*args, **kwargs):
+            opened.append(zip_file(*args, **kwargs))
+            return opened[-1]
+
+        with patch("core_apps.mitglieder.fdisk.zipfile.ZipFile", side_effect=spy):
+            rows = list(FdiskCsvReader(archive))
+
+        self.assertEqual([row["stbnr"] for row in rows], ["712"])
+        self.assertEqual(len(opened), 1)
+        self.assertIsNone(opened[0].fp)
+        self.assertFalse(archive.closed)
+
+    def test_mitglieder_import_csv_rejects_file_without_stbnr(self):
+        response = self.upload_fdisk(b"VORNAME;ZUNAME\nAnna;Huber\n")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("STBNR", response.data["detail"])
+
     def test_mitglieder_list_filters_abgemeldet_and_reserve_status(self):
         admin = self.create_user_with_roles("ADMIN")
         self.client.force_authenticate(user=admin)
@@ -168,6 +294,100 @@ class MitgliederEndpointTests(EndpointSmokeMixin, APITestCase):
         self.assertNotIn(1002, stbnr_list)
         self.assertNotIn(1003, stbnr_list)
 
+    def test_mitglieder_verzeichnis_snapshot_is_cached_per_version(self):
+        member = Mitglied.objects.create(stbnr=801, vorname="Vor", nachname="Her", geburtsdatum=date(1990, 1, 1))
+
+        self.assertEqual([m["vorname"] for m in directory.snapshot("im_dienst")], ["Vor"])
+        with self.assertNumQueries(1):
+            directory.snapshot("im_dienst")
+
+        member.vorname = "Nach"
+        member.save()
+        self.assertEqual([m["vorname"] for m in directory.snapshot("im_dienst")], ["Nach"])
+
+    def test_mitglieder_verzeichnis_etag_and_delta(self):
+        admin = self.create_user_with_roles("ADMIN")
+        self.client.force_authenticate(user=admin)
+        bleibt = Mitglied.objects.create(stbnr=811, vorname="Bleibt", nachname="A", geburtsdatum=date(1990, 1, 1))
+        reserve = Mitglied.objects.create(stbnr=812, vorname="Reserve", nachname="B", geburtsdatum=date(1990, 1, 1))
+        geloescht = Mitglied.objects.create(stbnr=813, vorname="Weg", nachname="C", geburtsdatum=date(1990, 1, 1))
+
+        full = self.client.get(self.build_api_url("mitglieder/verzeichnis/"))
+        self.assertEqual(full.status_code, status.HTTP_200_OK)
+        self.assertTrue(full.data["full"])
+        self.assertEqual(full["Cache-Control"], "private, no-cache")
+        self.assertEqual([m["stbnr"] for m in full.data["mitglieder"]], [811, 812, 813])
+        self.assertEqual(full.data["mitglieder"][0]["geburtsdatum"], "01.01.1990")
+
+        not_modified = self.client.get(self.build_api_url("mitglieder/verzeichnis/"), HTTP_IF_NONE_MATCH=full["ETag"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        bleibt.dienstgrad = "OFM"
+        bleibt.save()
+        reserve.dienststatus = Mitglied.Dienststatus.RESERVE
+        reserve.save()
+        geloescht_pkid = geloescht.pkid
+        geloescht.delete()
+
+        delta = self.client.get(
+            self.build_api_url("mitglieder/verzeichnis/"),
+            {"since": full.data["version"]},
+            HTTP_IF_NONE_MATCH=full["ETag"],
+        )
+        self.assertEqual(delta.status_code, status.HTTP_200_OK)
+        self.assertFalse(delta.data["full"])
+        self.assertEqual([(m["stbnr"], m["dienstgrad"]) for m in delta.data["mitglieder"]], [(811, "OFM")])
+        self.assertEqual({d["pkid"] for d in delta.data["deleted"]}, {reserve.pkid, geloescht_pkid})
+
+        directory.reset_directory(delta.data["version"])
+        stale = self.client.get(self.build_api_url("mitglieder/verzeichnis/"), {"since": delta.data["version"]})
+        self.assertTrue(stale.data["full"])
+        self.assertFalse(MitgliedLoeschung.objects.exists())
+
+    def test_mitglied_save_writes_version_in_same_update(self):
+        member = Mitglied.objects.create(stbnr=841, vorname="Vor", nachname="Her", geburtsdatum=date(1990, 1, 1))
+        member.vorname = "Nach"
+
+        # Zähler erhöhen und lesen, dann ein UPDATE des Mitglieds inkl. version
+        with self.assertNumQueries(3):
+            member.save(update_fields=["vorname"])
+
+        self.assertEqual(Mitglied.objects.get(pk=member.pk).version, directory.directory_state().version)
+
+    def test_mitglieder_verzeichnis_prunes_old_deletions(self):
+        alt = Mitglied.objects.create(stbnr=831, vorname="Alt", nachname="A", geburtsdatum=date(1990, 1, 1))
+        neu = Mitglied.objects.create(stbnr=832, vorname="Neu", nachname="B", geburtsdatum=date(1990, 1, 1))
+        since = directory.directory_state().version
+        alt.delete()
+        MitgliedLoeschung.objects.update(created_at=timezone.now() - timedelta(days=40))
+
+        with self.settings(MITGLIEDER_DIRECTORY_TOMBSTONE_DAYS=30):
+            neu.delete()
+
+        state = directory.directory_state()
+        self.assertEqual(MitgliedLoeschung.objects.count(), 1)
+        self.assertIsNone(directory.delta("im_dienst", since, state))
+        self.assertEqual(len(directory.delta("im_dienst", state.basis_version, state)["deleted"]), 1)
+
+    def test_mitglieder_verzeichnis_scope_requires_matching_role(self):
+        user = self.create_user_with_roles("ANWESENHEIT")
+        self.client.force_authenticate(user=user)
+
+        im_dienst = self.client.get(self.build_api_url("mitglieder/verzeichnis/"), {"scope": "im_dienst"})
+        alle = self.client.get(self.build_api_url("mitglieder/verzeichnis/"), {"scope": "alle"})
+
+        self.assertEqual(im_dienst.status_code, status.HTTP_200_OK)
+        self.assertEqual(alle.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_mitglieder_import_bumps_verzeichnis_version(self):
+        before = directory.directory_state().version
+        rows = [{"STBNR": 821, "VORNAME": "Import", "ZUNAME": "Bulk", "GEBURTSDATUM": "01.01.2000"}]
+        with transaction.atomic():
+            MitgliedImport("apply").run(rows)
+
+        changes = directory.delta("im_dienst", before, directory.directory_state())
+        self.assertEqual([m["stbnr"] for m in changes["mitglieder"]], [821])
+
     def test_mitglied_model_str(self):
         member = Mitglied.objects.create(
             stbnr=888,
@@ -1,5 +1,5 @@
 from django.urls import path, include
-from .views import MitgliedViewSet
+from .views import MitgliedViewSet, MitgliederVerzeichnisView
 
 mitglied_list = MitgliedViewSet.as_view({"get": "list", "post": "create"})
 mitglied_detail = MitgliedViewSet.as_view({
@@ -9,9 +9,13 @@ mitglied_detail = MitgliedViewSet.as_view({
     "delete": "destroy",
 })
 mitglied_import = MitgliedViewSet.as_view({"post": "import_list"})
+# initkwargs der Action (MultiPartParser) übernehmen, die sonst nur der Router setzt
+mitglied_import_csv = MitgliedViewSet.as_view({"post": "import_csv"}, **MitgliedViewSet.import_csv.kwargs)
 
 urlpatterns = [
     path("", mitglied_list, name="mitglied-list"),
     path("import/", mitglied_import, name="mitglied-import"),
+    path("import/csv/", mitglied_import_csv, name="mitglied-import-csv"),
+    path("verzeichnis/", MitgliederVerzeichnisView.as_view(), name="mitglied-verzeichnis"),
     path("<uuid:id>/", mitglied_detail, name="mitglied-detail"),
 ]
\ No newline at end of file
@@ -1,9 +1,13 @@
 from rest_framework import serializers
+from core_apps.media.derivatives import derivative_urls
+from core_apps.media.uploads import normalize_image_upload
+
 from .models import News, NewsTemplate
 
 class NewsSerializer(serializers.ModelSerializer):
     foto = serializers.ImageField(required=False, allow_null=True)
     foto_url = serializers.SerializerMethodField(read_only=True)
+    foto_urls = serializers.SerializerMethodField(read_only=True)
 
     def get_foto_url(self, obj):
         f = getattr(obj, "foto", None)
@@ -12,6 +16,9 @@ class NewsSerializer(serializers.ModelSerializer):
         except Exception:
             return None
 
+    def get_foto_urls(self, obj):
+        return derivative_urls(getattr(obj, "foto", None))
+
     def validate_foto(self, file):
         if not file:
             return file
@@ -28,7 +35,7 @@ class NewsSerializer(serializers.ModelSerializer):
             base = os.path.basename(name)
             base = re.sub(r"[^\w.\-]+", "_", base)
             file.name = base
-        return file
+        return normalize_image_upload(file)
 
     def create(self, validated_data):
         foto = validated_data.pop("foto", None)
@@ -78,6 +78,22 @@ class NewsEndpointTests(EndpointSmokeMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(all(item.get("typ") == "extern" for item in response.data))
 
+    def test_news_public_is_cacheable_and_revalidates_with_etag(self):
+        response = self.request_method("get", "news/public/")
+
+        self.assertTrue(response["Cache-Control"].startswith("public, max-age="))
+        self.assertIn("ETag", response)
+
+        cached = self.client.get(self.build_api_url("news/public/"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_news_intern_stays_no_store(self):
+        self.client.force_authenticate(user=self.news_role_user)
+
+        response = self.request_method("get", "news/intern/")
+
+        self.assertIn("no-store", response["Cache-Control"])
+
     def test_news_validate_foto_renames_blob_to_png(self):
         serializer = NewsSerializer()
         file = SimpleNamespace(name="upload.blob", content_type="image/png")
@@ -4,6 +4,7 @@ from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core_apps.common.http_cache import CACHE_PUBLIC, CachePolicyMixin
 from core_apps.common.logging_utils import log_event, log_exception
 from .models import News, NewsTemplate
 from .serializers import NewsSerializer, NewsTemplateSerializer
@@ -63,10 +64,11 @@ class NewsViewSet(ModelViewSet):
                 log_exception(logger, LOG_SOURCE, "destroy_image_delete_failed", image_name=name)
 
 
-class PublicNewsViewSet(ReadOnlyModelViewSet):
+class PublicNewsViewSet(CachePolicyMixin, ReadOnlyModelViewSet):
     queryset = News.objects.all().order_by("created_at")
     serializer_class = NewsSerializer
     permission_classes = [permissions.AllowAny]
+    cache_policy = CACHE_PUBLIC
     lookup_field = "id"
     pagination_class = None
     filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
@@ -0,0 +1,141 @@
+import logging
+import mimetypes
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+
+from core_apps.common.logging_utils import log_event
+
+logger = logging.getLogger(__name__)
+LOG_SOURCE = "pdf"
+
+# Remote-Referenzen in Templates: url(...) in CSS sowie src/href Attribute
+ASSET_URL_RE = re.compile(r"""(?:url\(\s*["']?|(?:src|href)\s*=\s*["'])(https?://[^"')\s]+)""", re.IGNORECASE)
+
+_FALLBACK_CONTENT_TYPES = {
+    ".woff": "font/woff",
+    ".woff2": "font/woff2",
+    ".ttf": "font/ttf",
+    ".otf": "font/otf",
+    ".svg": "image/svg+xml",
+    ".webp": "image/webp",
+}
+
+
+class PdfAssetStore:
+    """
+    Lokaler Ersatz für Fonts, Bilder und CSS, die Templates per http(s) referenzieren.
+
+    https://host/pfad/datei.ttf  ->  <root>/host/pfad/datei.ttf
+
+    Beim Rendern beantwortet `handle_route` jede Anfrage der Seite aus diesem Verzeichnis
+    (Inhalte zusätzlich im Speicher, gültig solange sich die mtime nicht ändert). Unbekannte
+    Remote-Ressourcen werden blockiert, dadurch wartet kein Render mehr auf Netzwerk-Roundtrips.
+    """
+
+    def __init__(self, root: Path, block_remote: bool = True, max_cache_bytes: int = 32 * 1024 * 1024):
+        self.root = Path(root)
+        self.block_remote = block_remote
+        self.max_cache_bytes = max_cache_bytes
+        # path -> (mtime_ns, body, content_type)
+        self._entries = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, url: str) -> Optional[Path]:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return None
+        relative = unquote(parts.path).lstrip("/")
+        if not relative:
+            return None
+
+        path = (self.root / parts.hostname / relative).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            return None
+        return path
+
+    def get(self, url: str) -> Optional[Tuple[bytes, str]]:
+        """Returns (Inhalt, Content-Type) oder None, wenn das Asset lokal nicht vorhanden ist."""
+        path = self.path_for(url)
+        if path is None:
+            return None
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is not None and cached[0] == mtime_ns:
+                self._entries.move_to_end(path)
+                return cached[1], cached[2]
+
+        body = path.read_bytes()
+        content_type = (
+            mimetypes.guess_type(path.name)[0]
+            or _FALLBACK_CONTENT_TYPES.get(path.suffix.lower())
+            or "application/octet-stream"
+        )
+
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._cached_bytes -= len(previous[1])
+            if len(body) <= self.max_cache_bytes:
+                self._entries[path] = (mtime_ns, body, content_type)
+                self._cached_bytes += len(body)
+                while self._cached_bytes > self.max_cache_bytes:
+                    _, (_, evicted, _) = self._entries.popitem(last=False)
+                    self._cached_bytes -= len(evicted)
+        return body, content_type
+
+    def handle_route(self, route) -> None:
+        """Playwright Route-Handler: lokal ausliefern, sonst blockieren (oder durchlassen)."""
+        url = route.request.url
+        asset = self.get(url)
+        if asset is not None:
+            body, content_type = asset
+            route.fulfill(status=200, body=body, content_type=content_type)
+            return
+
+        if self.block_remote and urlsplit(url).scheme in ("http", "https"):
+            log_event(logger, LOG_SOURCE, "pdf_asset_blocked", level="warning", url=url)
+            route.abort("blockedbyclient")
+            return
+        route.continue_()
+
+    def install(self, page) -> None:
+        page.route("**/*", self.handle_route)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._cached_bytes = 0
+
+
+def find_asset_urls(source: str) -> list:
+    """Alle http(s)-Ressourcen, die ein Template-Source referenziert (in Reihenfolge, ohne Duplikate)."""
+    return list(dict.fromkeys(ASSET_URL_RE.findall(source or "")))
+
+
+_store: Optional[PdfAssetStore] = None
+_store_lock = threading.Lock()
+
+
+def get_asset_store() -> PdfAssetStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PdfAssetStore(
+                    root=Path(getattr(settings, "PDF_ASSET_DIR", Path(settings.ROOT_DIR) / "static" / "pdf" / "assets")),
+                    block_remote=getattr(settings, "PDF_BLOCK_REMOTE_ASSETS", True),
+                    max_cache_bytes=getattr(settings, "PDF_ASSET_CACHE_MAX_MB", 32) * 1024 * 1024,
+                )
+    return _store
@@ -0,0 +1,323 @@
+import atexit
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from playwright.sync_api import sync_playwright
+
+from core_apps.common.logging_utils import log_event, log_exception
+
+
+logger = logging.getLogger(__name__)
+LOG_SOURCE = "pdf"
+
+CHROMIUM_ARGS = ["--no-sandbox", "--disable-dev-shm-usage"]
+
+
+class PdfRenderUnavailable(RuntimeError):
+    """Render-Pool ist ausgelastet (Queue voll) oder der Job hat das Timeout überschritten."""
+
+
+def _process_rss_mb(pid: int) -> float:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+
+class _BrowserWorker:
+    """
+    Ein Chromium-Prozess samt Browser-Context, gehört exklusiv einem Worker-Thread
+    (Playwright sync API ist an den Thread gebunden, in dem sie gestartet wurde).
+    """
+
+    def __init__(self, name: str, max_renders: int, max_memory_mb: int, memory_check_every: int = 1):
+        self.name = name
+        self.max_renders = max_renders
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_every = max(1, int(memory_check_every))
+        self._playwright_cm = None
+        self._browser = None
+        self._browser_pid = None
+        self._context = None
+        self._renders = 0
+        self._current = None
+        self._current_lock = threading.Lock()
+
+    def _start(self):
+        self._playwright_cm = sync_playwright()
+        playwright = self._playwright_cm.__enter__()
+        self._browser = playwright.chromium.launch(args=CHROMIUM_ARGS)
+        self._context = self._browser.new_context()
+        self._renders = 0
+        self._browser_pid = self._find_browser_pid()
+        log_event(logger, LOG_SOURCE, "browser_started", worker=self.name)
+
+    def _process_info(self) -> list:
+        session = self._browser.new_browser_cdp_session()
+        try:
+            return list(session.send("SystemInfo.getProcessInfo").get("processInfo", []))
+        finally:
+            session.detach()
+
+    def _find_browser_pid(self) -> Optional[int]:
+        """PID des Chromium-Hauptprozesses (einmal pro Start), für `abort` aus dem wartenden Thread."""
+        try:
+            for proc in self._process_info():
+                if proc.get("type") == "browser":
+                    return int(proc["id"])
+        except Exception:
+            pass
+        return None
+
+    def is_healthy(self) -> bool:
+        if self._browser is None or self._context is None:
+            return False
+        try:
+            return bool(self._browser.is_connected())
+        except Exception:
+            return False
+
+    def memory_mb(self) -> float:
+        """Summe RSS aller Chromium-Prozesse (Browser, Renderer, GPU) dieses Workers."""
+        if self._browser is None:
+            return 0.0
+        try:
+            processes = self._process_info()
+        except Exception:
+            return 0.0
+        return sum(_process_rss_mb(int(proc.get("id", 0))) for proc in processes)
+
+    def needs_recycle(self) -> bool:
+        if self.max_renders and self._renders >= self.max_renders:
+            return True
+        # Speicher nur stichprobenartig, jede Abfrage ist ein CDP-Roundtrip im Render-Pfad
+        if (
+            self.max_memory_mb
+            and self._renders % self.memory_check_every == 0
+            and self.memory_mb() > self.max_memory_mb
+        ):
+            return True
+        return False
+
+    def abort(self, future: Future) -> bool:
+        """
+        Aus dem wartenden Thread nach dessen Timeout: beendet Chromium, falls der Worker noch an
+        `future` rendert. Der laufende Aufruf bricht damit ab und der Worker startet neu.
+        """
+        with self._current_lock:
+            if self._current is not future or not self._browser_pid:
+                return False
+            try:
+                os.kill(self._browser_pid, signal.SIGKILL)
+            except OSError:
+                return False
+        log_event(logger, LOG_SOURCE, "browser_aborted", level="warning", worker=self.name)
+        return True
+
+    def run(self, fn: Callable, future: Optional[Future] = None):
+        with self._current_lock:
+            self._current = future
+        try:
+            return self._render(fn)
+        finally:
+            with self._current_lock:
+                self._current = None
+
+    def _render(self, fn: Callable):
+        if not self.is_healthy():
+            self.close()
+            self._start()
+
+        page = self._context.new_page()
+        try:
+            return fn(page)
+        except Exception:
+            # Nach einem Fehler den Browser sicherheitshalber verwerfen
+            self.close()
+            raise
+        finally:
+            self._renders += 1
+            if self._context is not None:
+                try:
+                    page.close()
+                except Exception:
+                    self.close()
+            if self._browser is not None and self.needs_recycle():
+                log_event(logger, LOG_SOURCE, "browser_recycled", worker=self.name, renders=self._renders)
+                self.close()
+
+    def close(self):
+        for closer in (
+            lambda: self._context and self._context.close(),
+            lambda: self._browser and self._browser.close(),
+            lambda: self._playwright_cm and self._playwright_cm.__exit__(None, None, None),
+        ):
+            try:
+                closer()
+            except Exception:
+                pass
+        self._playwright_cm = None
+        self._browser = None
+        self._browser_pid = None
+        self._context = None
+
+
+class PdfBrowserPool:
+    """
+    Fixe Anzahl an Worker-Threads mit je einem warmen Chromium.
+    Jobs werden über eine begrenzte Queue verteilt; `run` wartet maximal `timeout` Sekunden
+    (Queue-Wartezeit + Rendering) auf das Ergebnis.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_renders: int = 0,
+        max_memory_mb: int = 0,
+        queue_size: int = 0,
+        timeout: float = 60,
+        memory_check_every: int = 1,
+    ):
+        self.size = max(1, int(size))
+        self.max_renders = max_renders
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_every = memory_check_every
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max(0, int(queue_size)))
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads or self._closed:
+                return
+            for index in range(self.size):
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"pdf-browser-{index}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        worker = _BrowserWorker(
+            name=threading.current_thread().name,
+            max_renders=self.max_renders,
+            max_memory_mb=self.max_memory_mb,
+            memory_check_every=self.memory_check_every,
+        )
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                future, fn = job
+                future.worker = worker
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = worker.run(fn, future)
+                except BaseException as exc:
+                    log_exception(logger, LOG_SOURCE, "browser_job_failed", worker=worker.name)
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+        finally:
+            worker.close()
+
+    def run(self, fn: Callable, timeout: Optional[float] = None):
+        """Führt `fn(page)` in einem Worker aus und gibt dessen Ergebnis zurück."""
+        if self._closed:
+            raise PdfRenderUnavailable("PDF render pool is shut down.")
+        self._ensure_started()
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        future = Future()
+        try:
+            self._queue.put((future, fn), timeout=timeout)
+        except queue.Full:
+            log_event(logger, LOG_SOURCE, "browser_queue_full", level="warning", queue_size=self._queue.maxsize)
+            raise PdfRenderUnavailable("PDF render queue is full.")
+
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            # Noch in der Queue: nie starten; läuft bereits: Worker abbrechen statt für niemanden weiterrendern
+            worker = getattr(future, "worker", None)
+            if not future.cancel() and worker is not None:
+                worker.abort(future)
+            log_event(logger, LOG_SOURCE, "browser_job_timeout", level="warning", timeout=timeout)
+            raise PdfRenderUnavailable("PDF rendering timed out.")
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+_pool: Optional[PdfBrowserPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> Optional[PdfBrowserPool]:
+    """
+    Prozessweiter Pool (lazy, damit gunicorn erst nach dem Fork Threads startet).
+    Gibt None zurück, wenn PDF_RENDER_POOL_SIZE <= 0 ist (ein Browser pro Render).
+    """
+    global _pool, _pool_pid
+
+    size = getattr(settings, "PDF_RENDER_POOL_SIZE", 0)
+    if size <= 0:
+        return None
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = PdfBrowserPool(
+                size=size,
+                max_renders=getattr(settings, "PDF_RENDER_MAX_RENDERS", 0),
+                max_memory_mb=getattr(settings, "PDF_RENDER_MAX_MEMORY_MB", 0),
+                memory_check_every=getattr(settings, "PDF_RENDER_MEMORY_CHECK_EVERY", 10),
+                queue_size=getattr(settings, "PDF_RENDER_QUEUE_SIZE", 0),
+                timeout=getattr(settings, "PDF_RENDER_TIMEOUT", 60),
+            )
+            _pool_pid = pid
+    return _pool
+
+
+def shutdown_browser_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None and _pool_pid == os.getpid():
+        pool.shutdown(wait=False)
+
+
+atexit.register(shutdown_browser_pool)
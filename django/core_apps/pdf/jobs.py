@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core_apps.common.logging_utils import log_event, log_exception
+
+from .models import PdfRenderJob
+from .services import PdfTemplateService
+
+logger = logging.getLogger(__name__)
+LOG_SOURCE = "pdf"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor() -> Optional[ThreadPoolExecutor]:
+    """
+    Prozessweiter Thread-Pool für Render-Jobs (lazy, nach dem gunicorn Fork).
+    None, wenn PDF_RENDER_JOB_WORKERS <= 0 ist – Jobs laufen dann synchron im Request.
+    """
+    global _executor, _executor_pid
+
+    workers = getattr(settings, "PDF_RENDER_JOB_WORKERS", 0)
+    if workers <= 0:
+        return None
+
+    pid = os.getpid()
+    with _executor_lock:
+        if _executor is None or _executor_pid != pid:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-job")
+            _executor_pid = pid
+    return _executor
+
+
+def _render_job_bytes(job: PdfRenderJob) -> bytes:
+    if job.mode == PdfRenderJob.Mode.SINGLE:
+        payload = job.payloads[0] if job.payloads else {}
+        html, header_html, footer_html = PdfTemplateService.render_html(job.template, payload)
+        return PdfTemplateService.render_pdf_bytes(html, header_html, footer_html)
+    return PdfTemplateService.render_batch_pdf_bytes(job.template, job.payloads, mode=job.mode)
+
+
+def execute_render_job(job_pk: int) -> bool:
+    """
+    Führt einen PENDING Job aus. Der Statuswechsel PENDING -> RUNNING ist ein atomares UPDATE,
+    dadurch kann jeder Job von genau einem Worker (Thread, Prozess oder Kommando) übernommen werden.
+    Returns False, wenn der Job bereits von jemand anderem übernommen wurde.
+    """
+    claimed = PdfRenderJob.objects.filter(pk=job_pk, status=PdfRenderJob.Status.PENDING).update(
+        status=PdfRenderJob.Status.RUNNING,
+        started_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    if not claimed:
+        return False
+
+    job = PdfRenderJob.objects.select_related("template").get(pk=job_pk)
+    try:
+        pdf_bytes = _render_job_bytes(job)
+    except Exception as e:
+        log_exception(logger, LOG_SOURCE, "render_job_failed", job_id=job.id, template_id=job.template.id)
+        job.status = PdfRenderJob.Status.FAILED
+        job.error = str(e) or e.__class__.__name__
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at", "updated_at"])
+        return True
+
+    job.result.save(f"{job.id}.pdf", ContentFile(pdf_bytes), save=False)
+    job.status = PdfRenderJob.Status.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=["result", "status", "finished_at", "updated_at"])
+    log_event(
+        logger, LOG_SOURCE, "render_job_done",
+        job_id=job.id, template_id=job.template.id, count=len(job.payloads), mode=job.mode,
+    )
+    return True
+
+
+def _execute_in_thread(job_pk: int) -> None:
+    try:
+        execute_render_job(job_pk)
+    except Exception:
+        log_exception(logger, LOG_SOURCE, "render_job_crashed", job_pk=job_pk)
+    finally:
+        connection.close()
+
+
+def enqueue_render_job(job: PdfRenderJob) -> None:
+    executor = get_job_executor()
+    if executor is None:
+        execute_render_job(job.pk)
+        job.refresh_from_db()
+        return
+
+    # Erst nach dem Commit übergeben, sonst sieht der Worker-Thread den Job noch nicht
+    transaction.on_commit(lambda: executor.submit(_execute_in_thread, job.pk))
+
+
+def _stale_cutoff():
+    return timezone.now() - timedelta(seconds=getattr(settings, "PDF_RENDER_JOB_TIMEOUT", 900))
+
+
+def _stale_filter(cutoff) -> Q:
+    # PENDING: die Übergabe lag nur im Speicher eines Workers, der inzwischen neu gestartet wurde
+    return Q(status=PdfRenderJob.Status.RUNNING, started_at__lt=cutoff) | Q(
+        status=PdfRenderJob.Status.PENDING, created_at__lt=cutoff
+    )
+
+
+def job_is_stale(job: PdfRenderJob) -> bool:
+    """RUNNING bzw. PENDING länger als PDF_RENDER_JOB_TIMEOUT: der Worker wurde vermutlich beendet."""
+    cutoff = _stale_cutoff()
+    if job.status == PdfRenderJob.Status.RUNNING:
+        return job.started_at is not None and job.started_at < cutoff
+    if job.status == PdfRenderJob.Status.PENDING:
+        return job.created_at < cutoff
+    return False
+
+
+def fail_stale_jobs() -> int:
+    """
+    Markiert hängende RUNNING und nie übernommene PENDING Jobs als FAILED (Worker-Neustart/Kill),
+    damit Clients nicht endlos pollen. Nicht erneut PENDING: ein Job, der den Worker abstürzen
+    lässt, würde sonst immer wieder übernommen. Returns Anzahl.
+    """
+    now = timezone.now()
+    count = PdfRenderJob.objects.filter(_stale_filter(_stale_cutoff())).update(
+        status=PdfRenderJob.Status.FAILED,
+        error="Zeitüberschreitung: Job wurde nicht abgeschlossen.",
+        finished_at=now,
+        updated_at=now,
+    )
+    if count:
+        log_event(logger, LOG_SOURCE, "render_jobs_timed_out", level="warning", count=count)
+    return count
+
+
+def process_pending_jobs(limit: Optional[int] = None) -> int:
+    """Arbeitet liegengebliebene PENDING Jobs ab (z.B. nach einem Neustart). Returns Anzahl."""
+    pending = PdfRenderJob.objects.filter(status=PdfRenderJob.Status.PENDING).order_by("created_at")
+    pks = list(pending.values_list("pk", flat=True)[:limit] if limit else pending.values_list("pk", flat=True))
+    return sum(1 for pk in pks if execute_render_job(pk))
+
+
+def purge_finished_jobs(max_age: timedelta) -> int:
+    """
+    Löscht fertige/fehlgeschlagene Jobs inkl. Ergebnisdatei, die älter als `max_age` sind, sowie
+    RUNNING/PENDING Jobs, die seit mehr als `max_age` hängen.
+    """
+    cutoff = timezone.now() - max_age
+    stale = PdfRenderJob.objects.filter(
+        Q(status__in=[PdfRenderJob.Status.DONE, PdfRenderJob.Status.FAILED], finished_at__lt=cutoff)
+        | _stale_filter(cutoff)
+    )
+    count = 0
+    for job in stale:
+        if job.result:
+            job.result.delete(save=False)
+        job.delete()
+        count += 1
+    return count
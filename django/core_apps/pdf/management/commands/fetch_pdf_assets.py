@@ -0,0 +1,76 @@
+"""
+Management-Kommando: fetch_pdf_assets
+
+Lädt alle Fonts, Bilder und CSS, die PDF-Templates per http(s) referenzieren, einmalig in den
+lokalen Asset-Store (PDF_ASSET_DIR). Beim Rendern werden Remote-Requests blockiert, fehlende
+Assets müssen daher vorab mit diesem Kommando geholt werden.
+
+Aufruf:
+    python manage.py fetch_pdf_assets
+    python manage.py fetch_pdf_assets --force
+"""
+
+import os
+import tempfile
+
+import requests
+from django.core.management.base import BaseCommand
+
+from core_apps.pdf.assets import find_asset_urls, get_asset_store
+from core_apps.pdf.models import PdfTemplate
+
+
+class Command(BaseCommand):
+    help = "Lädt von PDF-Templates referenzierte Remote-Assets in den lokalen Asset-Store."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Bereits vorhandene Assets erneut herunterladen",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=20,
+            help="Timeout pro Download in Sekunden (Standard: 20)",
+        )
+
+    def handle(self, *args, **options):
+        store = get_asset_store()
+        urls = []
+        for source in PdfTemplate.objects.values_list("source", flat=True):
+            urls.extend(find_asset_urls(source))
+        urls = list(dict.fromkeys(urls))
+
+        fetched = skipped = failed = 0
+        for url in urls:
+            path = store.path_for(url)
+            if path is None:
+                failed += 1
+                self.stderr.write(f"Ungültige URL: {url}")
+                continue
+            if path.exists() and not options["force"]:
+                skipped += 1
+                continue
+
+            try:
+                response = requests.get(url, timeout=options["timeout"])
+                response.raise_for_status()
+            except requests.RequestException as e:
+                failed += 1
+                self.stderr.write(f"Fehler bei {url}: {e}")
+                continue
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(response.content)
+            os.replace(tmp_name, path)
+            fetched += 1
+            self.stdout.write(f"Geladen: {url}")
+
+        store.clear()
+        self.stdout.write(
+            self.style.SUCCESS(f"Assets: {fetched} geladen, {skipped} vorhanden, {failed} fehlgeschlagen")
+        )
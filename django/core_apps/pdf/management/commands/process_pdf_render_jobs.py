@@ -0,0 +1,49 @@
+"""
+Management-Kommando: process_pdf_render_jobs
+
+Arbeitet offene PDF-Render-Jobs ab (z.B. nach einem Neustart, als Cron oder eigener Prozess),
+markiert hängende Jobs als fehlgeschlagen und löscht abgelaufene Job-Ergebnisse.
+
+Aufruf:
+    python manage.py process_pdf_render_jobs
+    python manage.py process_pdf_render_jobs --limit 10
+    python manage.py process_pdf_render_jobs --purge-only
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core_apps.pdf.jobs import fail_stale_jobs, process_pending_jobs, purge_finished_jobs
+
+
+class Command(BaseCommand):
+    help = "Führt offene PDF-Render-Jobs aus und löscht abgelaufene Ergebnisse."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=0,
+            help="Maximale Anzahl Jobs pro Lauf (Standard: alle)",
+        )
+        parser.add_argument(
+            "--purge-only",
+            action="store_true",
+            help="Nur abgelaufene Jobs löschen, keine Jobs ausführen",
+        )
+
+    def handle(self, *args, **options):
+        ttl_hours = getattr(settings, "PDF_RENDER_JOB_TTL_HOURS", 24)
+        purged = purge_finished_jobs(timedelta(hours=ttl_hours))
+        self.stdout.write(f"Gelöscht: {purged} abgelaufene Jobs")
+
+        timed_out = fail_stale_jobs()
+        self.stdout.write(f"Abgebrochen: {timed_out} hängende Jobs")
+
+        if options["purge_only"]:
+            return
+
+        processed = process_pending_jobs(limit=options["limit"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Ausgeführt: {processed} Jobs"))
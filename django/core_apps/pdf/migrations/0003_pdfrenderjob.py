@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:23
+
+import core_apps.pdf.models
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf', '0002_alter_pdftemplate_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfRenderJob',
+            fields=[
+                ('pkid', models.BigAutoField(editable=False, primary_key=True, serialize=False, unique=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('mode', models.CharField(choices=[('single', 'Single'), ('pages', 'Pages'), ('documents', 'Documents')], default='single', max_length=12, verbose_name='Modus')),
+                ('payloads', models.JSONField(default=list, verbose_name='Payloads')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=12, verbose_name='Status')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Fehler')),
+                ('result', models.FileField(blank=True, null=True, upload_to=core_apps.pdf.models.pdf_job_filename, verbose_name='Ergebnis')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='render_jobs', to='pdf.pdftemplate')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='pdf_pdfrend_status_56132a_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,6 @@
+import os
+
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -31,3 +34,44 @@ class PdfTemplate(TimeStampedModel):
 
     def __str__(self):
         return f"{self.typ} v{self.version} [{self.status}]"
+
+
+def pdf_job_filename(instance, filename):
+    # Ergebnisse sind regenerierbar -> unter cache/, damit sie nicht im Backup landen
+    return os.path.join("cache", "pdf_jobs", f"{instance.id}.pdf")
+
+
+class PdfRenderJob(TimeStampedModel):
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    class Mode(models.TextChoices):
+        SINGLE = "single", "Single"
+        PAGES = "pages", "Pages"
+        DOCUMENTS = "documents", "Documents"
+
+    template = models.ForeignKey(PdfTemplate, on_delete=models.CASCADE, related_name="render_jobs")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    mode = models.CharField(verbose_name=_("Modus"), max_length=12, choices=Mode.choices, default=Mode.SINGLE)
+    payloads = models.JSONField(verbose_name=_("Payloads"), default=list)
+    status = models.CharField(verbose_name=_("Status"), max_length=12, choices=Status.choices, default=Status.PENDING)
+    error = models.TextField(verbose_name=_("Fehler"), blank=True, default="")
+    result = models.FileField(verbose_name=_("Ergebnis"), upload_to=pdf_job_filename, blank=True, null=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.template.typ} job [{self.status}]"
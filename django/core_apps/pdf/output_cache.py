@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+from .models import PdfTemplate
+
+# Bei Änderungen am Render-Ablauf erhöhen -> alle alten Einträge werden ungültig
+CACHE_FORMAT_VERSION = 1
+CACHE_SUBDIR = Path("cache") / "pdf"
+
+
+class RenderedPdfCache:
+    """
+    Content-adressierter Disk-Cache für gerenderte PDFs unter MEDIA_ROOT/cache/pdf/.
+    Key = sha256(Template-Version + kanonisierter Payload). Die mtime einer Datei dient als
+    LRU-Zeitstempel (wird bei Treffern aktualisiert), überschreitet der Cache `max_bytes`,
+    werden die ältesten Einträge gelöscht.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(tmpl: PdfTemplate, payload: dict) -> str:
+        canonical_payload = json.dumps(
+            payload,
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        )
+        updated_at = tmpl.updated_at.isoformat() if tmpl.updated_at else ""
+        material = f"{CACHE_FORMAT_VERSION}|{tmpl.id}|{tmpl.version}|{updated_at}|{canonical_payload}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pdf"
+
+    def has(self, key: str) -> bool:
+        return self.path_for(key).is_file()
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Atomar schreiben, damit parallele Worker nie eine halbe Datei lesen
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+
+        self.evict()
+
+    def evict(self) -> int:
+        entries = []
+        total = 0
+        for path in self.root.glob("*/*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+def get_rendered_pdf_cache() -> Optional[RenderedPdfCache]:
+    """None, wenn der Cache deaktiviert ist (PDF_OUTPUT_CACHE_MAX_MB <= 0)."""
+    max_mb = getattr(settings, "PDF_OUTPUT_CACHE_MAX_MB", 0)
+    if max_mb <= 0:
+        return None
+    return RenderedPdfCache(Path(settings.MEDIA_ROOT) / CACHE_SUBDIR, max_mb * 1024 * 1024)
@@ -0,0 +1,178 @@
+import uuid
+from datetime import date
+from typing import Callable, Dict, Optional, Tuple
+
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+
+from core_apps.fmd.models import FMD
+from core_apps.konfiguration.models import Konfiguration
+from core_apps.mitglieder.models import Mitglied
+
+# Body-Key, über den der Client statt der fertigen Daten nur Parameter (id/Filter) schickt
+PROVIDER_PARAMS_KEY = "provider_params"
+
+STAMMDATEN_FIELDS = ("fw_name", "fw_nummer", "fw_street", "fw_plz", "fw_ort", "fw_email", "fw_telefon")
+
+
+class PdfDataProvider:
+    """
+    Baut den Payload für Templates eines `PdfTemplate.typ` serverseitig aus der Datenbank.
+    `build(params)` bekommt die `provider_params` aus dem Request und liefert ein Dict, das
+    über den restlichen Payload gelegt wird. `roles`: wer diese Daten abrufen darf.
+    """
+
+    def __init__(self, typ: str, build: Callable[[dict], dict], roles: Tuple[str, ...]):
+        self.typ = typ
+        self.build = build
+        self.roles = roles
+
+
+_registry: Dict[str, PdfDataProvider] = {}
+
+
+def register_provider(typ: str, roles: Tuple[str, ...] = ("ADMIN",)):
+    def decorator(build: Callable[[dict], dict]):
+        _registry[typ] = PdfDataProvider(typ, build, tuple(roles))
+        return build
+
+    return decorator
+
+
+def get_provider(typ: str) -> Optional[PdfDataProvider]:
+    return _registry.get(typ)
+
+
+def _base_payload() -> dict:
+    """Druckdatum + Stammdaten der Feuerwehr (wie im Frontend aus der Konfiguration befüllt)."""
+    stammdaten = Konfiguration.objects.values(*STAMMDATEN_FIELDS).first() or {}
+    payload = {field: stammdaten.get(field, "") for field in STAMMDATEN_FIELDS}
+    payload["druck_datum"] = date.today().strftime("%d.%m.%Y")
+    return payload
+
+
+def _year_of(value) -> Optional[int]:
+    """Jahr aus 2027, "2027", "01.02.2027" oder "2027-02-01"; None bei leer/"nein"/ungültig."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    text = str(value).strip().lower()
+    if not text or text in ("nein", "none", "null"):
+        return None
+    for candidate in (text, text.rsplit(".", 1)[-1], text.split("-", 1)[0]):
+        if candidate.isdigit() and 1900 < int(candidate) < 3000:
+            return int(candidate)
+    return None
+
+
+def _json_safe(row: dict) -> dict:
+    """Datumswerte als ISO-String wie in der API (Payloads landen auch in JSONFields von Render-Jobs)."""
+    return {key: value.isoformat() if isinstance(value, date) else value for key, value in row.items()}
+
+
+def _alter(geburtsdatum: Optional[date]) -> int:
+    if not geburtsdatum:
+        return 0
+    today = date.today()
+    return today.year - geburtsdatum.year - ((today.month, today.day) < (geburtsdatum.month, geburtsdatum.day))
+
+
+ATS_FIELDS = {
+    "stbnr": F("mitglied_id__stbnr"),
+    "vorname": F("mitglied_id__vorname"),
+    "nachname": F("mitglied_id__nachname"),
+    "hauptberuflich": F("mitglied_id__hauptberuflich"),
+}
+ATS_VALUES = ("naechste_untersuchung", "tauglichkeit", "leistungstest", "leistungstest_art", "letzte_untersuchung")
+
+FMD_LISTEN = ("untersuchungen", "tauglichkeit", "leistungstest", "gesamt")
+
+
+def _gesamt_row(row: dict, current_year: int) -> dict:
+    """Spalten der Gesamtliste, gleiche Regeln wie printAlleMitglieder() im FMD-Frontend."""
+    ist_ats_traeger = row.pop("fmd_pkid") is not None
+    tauglichkeit = row["tauglichkeit"]
+    leistungstest = row["leistungstest"]
+
+    if row["hauptberuflich"]:
+        return {**row, "liste_ats": "Ja", "liste_tauglich": "Ja", "liste_arzt": "BF", "liste_leistungstest": "BF"}
+    if not ist_ats_traeger:
+        return {**row, "liste_ats": "Nein", "liste_tauglich": "-", "liste_arzt": "-", "liste_leistungstest": "-"}
+
+    arzt_jahr = _year_of(row["naechste_untersuchung"])
+    liste_arzt = ""
+    if arzt_jahr is not None:
+        liste_arzt = f"{'Nicht OK' if arzt_jahr <= current_year else 'OK'} | {arzt_jahr}"
+
+    test_jahr = _year_of(leistungstest)
+    if leistungstest is None:
+        liste_leistungstest = ""
+    elif test_jahr is not None and test_jahr >= current_year - 1:
+        liste_leistungstest = "OK"
+    else:
+        liste_leistungstest = f"Nicht OK | {test_jahr}" if test_jahr else "Nicht OK"
+
+    return {
+        **row,
+        "liste_ats": "Ja",
+        "liste_tauglich": "" if tauglichkeit is None else ("Ja" if tauglichkeit == "tauglich" else "Nein"),
+        "liste_arzt": liste_arzt,
+        "liste_leistungstest": liste_leistungstest,
+    }
+
+
+@register_provider("fmd-liste", roles=("ADMIN", "FMD"))
+def fmd_liste(params: dict) -> dict:
+    """
+    ATS-Träger-Listen (FMD_v3_Liste). params: {"liste": "untersuchungen" | "tauglichkeit" | "leistungstest" | "gesamt"}
+    Jede Liste ist genau eine Query (FMD JOIN Mitglied bzw. Mitglied LEFT JOIN FMD).
+    """
+    liste = params.get("liste") or "gesamt"
+    if liste not in FMD_LISTEN:
+        raise ValidationError({PROVIDER_PARAMS_KEY: f"liste erlaubt: {', '.join(FMD_LISTEN)}"})
+
+    current_year = date.today().year
+    if liste == "gesamt":
+        rows = (
+            Mitglied.objects.exclude(dienststatus=Mitglied.Dienststatus.RESERVE)
+            .order_by("nachname", "vorname")
+            .values(
+                "stbnr", "vorname", "nachname", "hauptberuflich",
+                fmd_pkid=F("fmd__pkid"),
+                **{field: F(f"fmd__{field}") for field in ATS_VALUES},
+            )
+        )
+        traeger = [_gesamt_row(_json_safe(row), current_year) for row in rows]
+    else:
+        qs = FMD.objects.values(*ATS_VALUES, **ATS_FIELDS)
+        if liste == "untersuchungen":
+            qs = qs.filter(Q(naechste_untersuchung__isnull=True) | Q(naechste_untersuchung__lte=current_year))
+            qs = qs.order_by(F("naechste_untersuchung").asc(nulls_first=True), "mitglied_id__stbnr")
+        else:
+            qs = qs.order_by("mitglied_id__stbnr")
+        traeger = [_json_safe(row) for row in qs]
+
+    return {**_base_payload(), "ats_traeger_liste": traeger, "fmd_export_liste_typ": liste}
+
+
+@register_provider("fmd-deckblatt", roles=("ADMIN", "FMD"))
+def fmd_deckblatt(params: dict) -> dict:
+    """Checkliste/Deckblatt eines ATS-Trägers (FMD_v1_Deckblatt). params: {"fmd_id": "<FMD id>"}"""
+    try:
+        fmd_id = uuid.UUID(str(params.get("fmd_id")))
+    except ValueError:
+        fmd_id = None
+    fmd = FMD.objects.select_related("mitglied_id").filter(id=fmd_id).first() if fmd_id else None
+    if fmd is None:
+        raise ValidationError({PROVIDER_PARAMS_KEY: "fmd_id fehlt oder ist unbekannt."})
+
+    mitglied = fmd.mitglied_id
+    return {
+        **_base_payload(),
+        "mitglied_stbnr": mitglied.stbnr,
+        "mitglied_vorname": mitglied.vorname,
+        "mitglied_zuname": mitglied.nachname,
+        "mitglied_alter": _alter(mitglied.geburtsdatum),
+        "mitglied_letzte_untersuchung": fmd.letzte_untersuchung.isoformat() if fmd.letzte_untersuchung else "",
+    }
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import PdfTemplate
+from .models import PdfRenderJob, PdfTemplate
 
 
 class PdfTemplateSerializer(serializers.ModelSerializer):
@@ -23,3 +23,26 @@ class PdfTemplateSerializer(serializers.ModelSerializer):
         return attrs
 
 
+
+
+class PdfRenderJobSerializer(serializers.ModelSerializer):
+    template = serializers.UUIDField(source="template.id", read_only=True)
+    count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PdfRenderJob
+        fields = [
+            "id",
+            "template",
+            "mode",
+            "status",
+            "error",
+            "count",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_count(self, obj):
+        return len(obj.payloads or [])
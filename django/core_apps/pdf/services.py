@@ -1,22 +1,65 @@
 import base64
 import io
+import math
 import re
+import threading
 from datetime import datetime
-from typing import Tuple
+from functools import lru_cache, partial
+from typing import Callable, List, Optional, Tuple
 from pathlib import Path
 import qrcode
 
 from django.conf import settings
 from django.template import Context, Template
 from playwright.sync_api import sync_playwright
+from pypdf import PdfReader, PdfWriter
 
+from .assets import get_asset_store
+from .browser_pool import CHROMIUM_ARGS, get_browser_pool
 from .models import PdfTemplate
+from .template_cache import CompiledTemplateCache
 
 
 _SECTION_RE = re.compile(
     r"<!--PDF:(CSS|HEADER|FOOTER|BODY)-->\s*(.*?)(?=(<!--PDF:(CSS|HEADER|FOOTER|BODY)-->|\Z))",
     re.DOTALL | re.IGNORECASE,
 )
+# Templates mit {{ now }} / {% now %} hängen von der Uhrzeit ab und dürfen nicht gecacht werden
+_NOW_RE = re.compile(r"{{\s*now\b|{%\s*now\b")
+
+template_cache = CompiledTemplateCache(max_size=getattr(settings, "PDF_TEMPLATE_CACHE_SIZE", 64))
+
+BATCH_MODE_PAGES = "pages"
+BATCH_MODE_DOCUMENTS = "documents"
+BATCH_MODES = (BATCH_MODE_PAGES, BATCH_MODE_DOCUMENTS)
+# Timeout des Batch-Jobs skaliert pro angefangene X Payloads mit PDF_RENDER_TIMEOUT
+BATCH_TIMEOUT_ITEMS = 25
+
+DEFAULT_QR_TEXT = "https://blaulichtcloud.at"
+
+# Logo & Co: path -> (mtime_ns, base64)
+_asset_cache = {}
+_asset_lock = threading.Lock()
+
+
+@lru_cache(maxsize=256)
+def _qr_base64_png(data: str, box_size: int) -> str:
+    qr = qrcode.QRCode(box_size=box_size, border=2)
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+def clear_asset_caches() -> None:
+    with _asset_lock:
+        _asset_cache.clear()
+    _qr_base64_png.cache_clear()
+    get_asset_store().clear()
+
 
 class PdfTemplateService:
     """
@@ -49,89 +92,209 @@ class PdfTemplateService:
         return parts["CSS"], parts["HEADER"], parts["FOOTER"], parts["BODY"]
 
     @staticmethod
-    def qr_base64_png(data: str) -> str:
-        qr = qrcode.QRCode(box_size=6, border=2)
-        qr.add_data(data)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
+    def cached_file_to_base64(path: Path) -> str:
+        """
+        Wie file_to_base64, aber prozessweit gecacht – gültig solange sich die mtime nicht ändert.
+        Raises FileNotFoundError wie file_to_base64.
+        """
+        mtime_ns = path.stat().st_mtime_ns
+        with _asset_lock:
+            cached = _asset_cache.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
 
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        return base64.b64encode(buf.getvalue()).decode("utf-8")
+        encoded = PdfTemplateService.file_to_base64(path)
+        with _asset_lock:
+            _asset_cache[path] = (mtime_ns, encoded)
+        return encoded
+
+    @staticmethod
+    def qr_base64_png(data: str, box_size: int = 6) -> str:
+        return _qr_base64_png(str(data), int(box_size))
 
     @staticmethod
     def build_context(payload: dict) -> dict:
         logo_path = Path(settings.ROOT_DIR) / "static" / "pdf" / "logo.png"
         logo_base64 = ""
         try:
-            logo_base64 = PdfTemplateService.file_to_base64(logo_path)
+            logo_base64 = PdfTemplateService.cached_file_to_base64(logo_path)
         except FileNotFoundError:
             logo_base64 = ""
 
         return {
             "now": datetime.now(),
             "payload": payload,
-            "qr_base64": PdfTemplateService.qr_base64_png(
-                payload.get("qr_text", "https://blaulichtcloud.at")
+            # Callable -> Django-Template ruft es erst auf, wenn {{ qr_base64 }} tatsächlich verwendet wird
+            "qr_base64": partial(
+                PdfTemplateService.qr_base64_png,
+                payload.get("qr_text", DEFAULT_QR_TEXT),
             ),
             "logo_base64": logo_base64,
         }
 
     @staticmethod
-    def render_html(tmpl: PdfTemplate, payload: dict) -> Tuple[str, str, str]:
+    def compile_sections(tmpl: PdfTemplate) -> Tuple[Optional[Template], ...]:
         """
-        Returns:
-          full_html (complete HTML document for page.set_content),
-          header_html (for Playwright header_template),
-          footer_html (for Playwright footer_template)
+        Geparste + kompilierte Sections (css, header, footer, body), leere Sections sind None.
+        Gespeicherte Templates werden über (id, version, updated_at) im LRU-Cache gehalten.
         """
-        css, header, footer, body = PdfTemplateService.split_source(tmpl.source)
+        def build():
+            return tuple(
+                Template(section) if section else None
+                for section in PdfTemplateService.split_source(tmpl.source)
+            )
+
+        key = (tmpl.id, tmpl.version, tmpl.updated_at) if tmpl.pk else None
+        return template_cache.get_or_build(key, build)
+
+    @staticmethod
+    def is_output_cacheable(tmpl: PdfTemplate) -> bool:
+        return not _NOW_RE.search(tmpl.source or "")
+
+    @staticmethod
+    def invalidate_compiled(tmpl: PdfTemplate) -> None:
+        template_cache.invalidate(tmpl.id)
+
+    @staticmethod
+    def render_sections(tmpl: PdfTemplate, payload: dict) -> Tuple[str, str, str, str]:
+        """
+        Rendert die einzelnen Sections mit dem Context des Payloads.
+        Returns: css, header, footer, body (jeweils bereits gerendert)
+        """
+        compiled = PdfTemplateService.compile_sections(tmpl)
         ctx = PdfTemplateService.build_context(payload)
         dj_ctx = Context(ctx)
 
         # CSS block is expected to include <style>...</style> already (LiveServer-friendly)
-        css_rendered = Template(css).render(dj_ctx) if css else ""
+        css_rendered, header_rendered, footer_rendered, body_rendered = (
+            section.render(dj_ctx) if section else "" for section in compiled
+        )
 
-        body_rendered = Template(body).render(dj_ctx)
-        header_rendered = Template(header).render(dj_ctx) if header else ""
-        footer_rendered = Template(footer).render(dj_ctx) if footer else ""
+        return css_rendered, header_rendered, footer_rendered, body_rendered
 
-        full_html = f"""<!doctype html>
+    @staticmethod
+    def wrap_document(css_html: str, body_html: str) -> str:
+        return f"""<!doctype html>
 <html>
 <head>
 <meta charset="utf-8" />
-{css_rendered}
+{css_html}
 </head>
 <body>
-{body_rendered}
+{body_html}
 </body>
 </html>"""
 
-        return full_html, header_rendered, footer_rendered
+    @staticmethod
+    def render_html(tmpl: PdfTemplate, payload: dict) -> Tuple[str, str, str]:
+        """
+        Returns:
+          full_html (complete HTML document for page.set_content),
+          header_html (for Playwright header_template),
+          footer_html (for Playwright footer_template)
+        """
+        css, header, footer, body = PdfTemplateService.render_sections(tmpl, payload)
+        return PdfTemplateService.wrap_document(css, body), header, footer
+
+    @staticmethod
+    def render_batch_html(tmpl: PdfTemplate, payloads: List[dict]) -> Tuple[str, str, str]:
+        """
+        Ein Dokument für alle Payloads, jeder Payload beginnt auf einer neuen Seite.
+        CSS, Header und Footer kommen vom ersten Payload (gemeinsame Felder wie fw_*).
+        """
+        if not payloads:
+            raise ValueError("Batch requires at least one payload")
+
+        css = header = footer = ""
+        bodies = []
+        for index, payload in enumerate(payloads):
+            item_css, item_header, item_footer, body = PdfTemplateService.render_sections(tmpl, payload)
+            if index == 0:
+                css, header, footer = item_css, item_header, item_footer
+            bodies.append(body)
+
+        separator = '\n<div style="break-after: page;"></div>\n'
+        return PdfTemplateService.wrap_document(css, separator.join(bodies)), header, footer
 
     @staticmethod
-    def render_pdf_bytes(html: str, header_html: str = "", footer_html: str = "") -> bytes:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(args=["--no-sandbox", "--disable-dev-shm-usage"])
-            page = browser.new_page()
-            page.set_content(html, wait_until="networkidle")
+    def print_page(page, html: str, header_html: str = "", footer_html: str = "") -> bytes:
+        # Fonts/Bilder/CSS kommen aus dem lokalen Asset-Store, Remote-Requests werden blockiert.
+        # Damit ist nach "load" alles da, ein Warten auf networkidle ist nicht mehr nötig.
+        get_asset_store().install(page)
+        page.set_content(html, wait_until="load")
+
+        pdf_kwargs = dict(
+            format="A4",
+            print_background=True,
+            margin={"top": "120px", "bottom": "50px", "left": "25px", "right": "25px"},
+        )
 
-            pdf_kwargs = dict(
-                format="A4",
-                print_background=True,
-                margin={"top": "120px", "bottom": "50px", "left": "25px", "right": "25px"},
+        if header_html or footer_html:
+            pdf_kwargs.update(
+                display_header_footer=True,
+                header_template=header_html or "<div></div>",
+                footer_template=footer_html or "<div></div>",
             )
 
-            if header_html or footer_html:
-                pdf_kwargs.update(
-                    display_header_footer=True,
-                    header_template=header_html or "<div></div>",
-                    footer_template=footer_html or "<div></div>",
-                )
+        return page.pdf(**pdf_kwargs)
+
+    @staticmethod
+    def run_with_page(fn: Callable, timeout: Optional[float] = None):
+        """
+        Führt `fn(page)` über den prozessweiten Browser-Pool (warmes Chromium) aus.
+        Ohne Pool (PDF_RENDER_POOL_SIZE=0) wird pro Aufruf ein Browser gestartet.
+        Raises PdfRenderUnavailable, wenn der Pool ausgelastet ist.
+        """
+        pool = get_browser_pool()
+        if pool is not None:
+            return pool.run(fn, timeout=timeout)
 
-            pdf_bytes = page.pdf(**pdf_kwargs)
+        with sync_playwright() as p:
+            browser = p.chromium.launch(args=CHROMIUM_ARGS)
+            page = browser.new_page()
+            result = fn(page)
             browser.close()
 
-        return pdf_bytes
-    
+        return result
+
+    @staticmethod
+    def render_pdf_bytes(html: str, header_html: str = "", footer_html: str = "") -> bytes:
+        return PdfTemplateService.run_with_page(
+            lambda page: PdfTemplateService.print_page(page, html, header_html, footer_html)
+        )
+
+    @staticmethod
+    def merge_pdfs(documents: List[bytes]) -> bytes:
+        writer = PdfWriter()
+        for document in documents:
+            writer.append(PdfReader(io.BytesIO(document)))
+
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue()
+
+    @staticmethod
+    def render_batch_pdf_bytes(tmpl: PdfTemplate, payloads: List[dict], mode: str = BATCH_MODE_PAGES) -> bytes:
+        """
+        Rendert alle Payloads in EINER Browser-Session.
+          pages:     ein HTML-Dokument mit Seitenumbrüchen, ein page.pdf() Aufruf
+          documents: ein PDF pro Payload (eigener Header/Footer) auf derselben Page, danach gemergt
+        """
+        if mode not in BATCH_MODES:
+            raise ValueError(f"Unknown batch mode '{mode}'")
+
+        timeout = getattr(settings, "PDF_RENDER_TIMEOUT", 60) * max(1, math.ceil(len(payloads) / BATCH_TIMEOUT_ITEMS))
+
+        if mode == BATCH_MODE_PAGES:
+            html, header_html, footer_html = PdfTemplateService.render_batch_html(tmpl, payloads)
+            return PdfTemplateService.run_with_page(
+                lambda page: PdfTemplateService.print_page(page, html, header_html, footer_html),
+                timeout=timeout,
+            )
 
+        rendered = [PdfTemplateService.render_html(tmpl, payload) for payload in payloads]
+        documents = PdfTemplateService.run_with_page(
+            lambda page: [PdfTemplateService.print_page(page, *item) for item in rendered],
+            timeout=timeout,
+        )
+        return PdfTemplateService.merge_pdfs(documents)
@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class CompiledTemplateCache:
+    """
+    Prozessweiter LRU-Cache für geparste/kompilierte Template-Sections.
+    Key: (template id, version, updated_at) – jede Änderung am Template erzeugt einen neuen Key,
+    `invalidate` räumt zusätzlich alle Einträge eines Templates sofort ab.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Optional[Hashable], build: Callable):
+        if key is None or self.max_size <= 0:
+            return build()
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = build()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, template_id) -> int:
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == template_id]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
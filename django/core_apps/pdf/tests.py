@@ -1,17 +1,35 @@
+from datetime import date, timedelta
 from uuid import uuid4
 from types import SimpleNamespace
 from unittest.mock import patch, Mock
 import tempfile
+import time
 from pathlib import Path
+import io
+import os
+import signal
 
+import qrcode
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.test import APITestCase
+from pypdf import PdfReader, PdfWriter
 
 from core_apps.common.test_helpers import EndpointSmokeMixin
-from core_apps.pdf.models import PdfTemplate
+from core_apps.fmd.models import FMD
+from core_apps.konfiguration.models import Konfiguration
+from core_apps.mitglieder.models import Mitglied
+from core_apps.pdf.assets import PdfAssetStore, find_asset_urls
+from core_apps.pdf.browser_pool import PdfBrowserPool, PdfRenderUnavailable
+from core_apps.pdf.models import PdfRenderJob, PdfTemplate
+from core_apps.pdf.output_cache import RenderedPdfCache
+from core_apps.pdf.providers import get_provider
 from core_apps.pdf.serializers import PdfTemplateSerializer
-from core_apps.pdf.services import PdfTemplateService
+from core_apps.pdf.services import PdfTemplateService, clear_asset_caches, template_cache
 
 
 class PdfEndpointTests(EndpointSmokeMixin, APITestCase):
@@ -42,6 +60,7 @@ class PdfEndpointTests(EndpointSmokeMixin, APITestCase):
             f"pdf/templates/{template_id}/new-version/",
             f"pdf/templates/{template_id}/preview/",
             f"pdf/templates/{template_id}/render/",
+            f"pdf/templates/{template_id}/render-batch/",
             f"pdf/templates/{template_id}/test/",
         ]
 
@@ -223,6 +242,7 @@ class PdfBranchCoverageTests(EndpointSmokeMixin, APITestCase):
             b64 = PdfTemplateService.file_to_base64(p)
         self.assertTrue(len(b64) > 0)
 
+        clear_asset_caches()
         with patch("core_apps.pdf.services.PdfTemplateService.file_to_base64", return_value="logo"):
             ctx = PdfTemplateService.build_context({"qr_text": "x"})
         self.assertEqual(ctx["logo_base64"], "logo")
@@ -335,3 +355,674 @@ class PdfBranchCoverageTests(EndpointSmokeMixin, APITestCase):
             format="json",
         )
         self.assertEqual(blocked_render.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PdfBrowserPoolTests(EndpointSmokeMixin, APITestCase):
+    def _playwright_mock(self):
+        page = Mock()
+        page.pdf.return_value = b"%PDF"
+        context = Mock()
+        context.new_page.return_value = page
+        browser = Mock()
+        browser.is_connected.return_value = True
+        browser.new_context.return_value = context
+
+        chromium = Mock()
+        chromium.launch.return_value = browser
+
+        cm = Mock()
+        cm.__enter__ = Mock(return_value=SimpleNamespace(chromium=chromium))
+        cm.__exit__ = Mock(return_value=False)
+        return cm, chromium, page
+
+    def test_pool_reuses_browser_and_recycles_after_max_renders(self):
+        cm, chromium, page = self._playwright_mock()
+        pool = PdfBrowserPool(size=1, max_renders=2, queue_size=5, timeout=5)
+
+        with patch("core_apps.pdf.browser_pool.sync_playwright", return_value=cm):
+            results = [pool.run(lambda p: p.pdf()) for _ in range(3)]
+            pool.shutdown()
+
+        self.assertEqual(results, [b"%PDF"] * 3)
+        self.assertEqual(chromium.launch.call_count, 2)
+        self.assertEqual(page.close.call_count, 3)
+
+    def test_pool_relaunches_disconnected_browser(self):
+        cm, chromium, _ = self._playwright_mock()
+        chromium.launch.return_value.is_connected.return_value = False
+        pool = PdfBrowserPool(size=1, queue_size=5, timeout=5)
+
+        with patch("core_apps.pdf.browser_pool.sync_playwright", return_value=cm):
+            pool.run(lambda p: p.pdf())
+            pool.run(lambda p: p.pdf())
+            pool.shutdown()
+
+        self.assertEqual(chromium.launch.call_count, 2)
+
+    def test_pool_raises_unavailable_on_timeout(self):
+        cm, _, _ = self._playwright_mock()
+        pool = PdfBrowserPool(size=1, queue_size=5, timeout=0.1)
+
+        with patch("core_apps.pdf.browser_pool.sync_playwright", return_value=cm):
+            with self.assertRaises(PdfRenderUnavailable):
+                pool.run(lambda p: time.sleep(0.5))
+            pool.shutdown()
+
+    def test_pool_kills_browser_of_job_running_past_timeout(self):
+        cm, chromium, _ = self._playwright_mock()
+        session = chromium.launch.return_value.new_browser_cdp_session.return_value
+        session.send.return_value = {"processInfo": [{"type": "renderer", "id": 11}, {"type": "browser", "id": 4242}]}
+        pool = PdfBrowserPool(size=1, queue_size=5, timeout=0.1)
+
+        with patch("core_apps.pdf.browser_pool.sync_playwright", return_value=cm), patch(
+            "core_apps.pdf.browser_pool.os.kill"
+        ) as kill_mock:
+            with self.assertRaises(PdfRenderUnavailable):
+                pool.run(lambda p: time.sleep(0.5))
+            pool.shutdown()
+
+        kill_mock.assert_called_once_with(4242, signal.SIGKILL)
+
+    def test_pool_samples_memory_every_n_renders(self):
+        cm, _, _ = self._playwright_mock()
+        pool = PdfBrowserPool(size=1, max_memory_mb=512, queue_size=5, timeout=5, memory_check_every=3)
+
+        with patch("core_apps.pdf.browser_pool.sync_playwright", return_value=cm), patch(
+            "core_apps.pdf.browser_pool._BrowserWorker.memory_mb", return_value=100.0
+        ) as memory_mock:
+            for _ in range(6):
+                pool.run(lambda p: p.pdf())
+            pool.shutdown()
+
+        self.assertEqual(memory_mock.call_count, 2)
+
+    def test_render_pdf_bytes_uses_pool_when_configured(self):
+        pool = Mock()
+        pool.run.return_value = b"%PDF-pool"
+
+        with patch("core_apps.pdf.services.get_browser_pool", return_value=pool):
+            result = PdfTemplateService.render_pdf_bytes("<html>x</html>")
+
+        self.assertEqual(result, b"%PDF-pool")
+        self.assertTrue(pool.run.called)
+
+    def test_render_view_returns_503_when_pool_unavailable(self):
+        admin = self.create_user_with_roles("ADMIN")
+        tmpl = PdfTemplate.objects.create(
+            typ="invoice",
+            bezeichnung="rechnung",
+            version=1,
+            status=PdfTemplate.Status.PUBLISHED,
+            source="<!--PDF:BODY--><div>x</div>",
+        )
+        self.client.force_authenticate(user=admin)
+
+        with patch(
+            "core_apps.pdf.views.PdfTemplateService.render_pdf_bytes",
+            side_effect=PdfRenderUnavailable("PDF render queue is full."),
+        ):
+            response = self.request_method("post", f"pdf/templates/{tmpl.id}/render/", data={})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "5")
+
+
+class PdfBatchRenderTests(EndpointSmokeMixin, APITestCase):
+    def setUp(self):
+        self.member = self.create_user_with_roles("MITGLIED")
+        self.published = PdfTemplate.objects.create(
+            typ="ats",
+            bezeichnung="traeger",
+            version=1,
+            status=PdfTemplate.Status.PUBLISHED,
+            source="<!--PDF:HEADER--><div>{{ payload.fw_name }}</div><!--PDF:BODY--><div>{{ payload.name }}</div>",
+        )
+
+    def _blank_pdf(self, pages=1):
+        writer = PdfWriter()
+        for _ in range(pages):
+            writer.add_blank_page(width=200, height=200)
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue()
+
+    def test_render_batch_html_joins_bodies_with_page_breaks(self):
+        html, header, footer = PdfTemplateService.render_batch_html(
+            self.published,
+            [{"name": "Max", "fw_name": "FF"}, {"name": "Harry", "fw_name": "FF"}],
+        )
+
+        self.assertIn("Max", html)
+        self.assertIn("Harry", html)
+        self.assertEqual(html.count("break-after: page"), 1)
+        self.assertIn("FF", header)
+        self.assertEqual(footer, "")
+
+    def test_render_batch_documents_mode_merges_in_one_session(self):
+        page = Mock()
+        page.pdf.side_effect = [self._blank_pdf(1), self._blank_pdf(2)]
+        run_with_page = Mock(side_effect=lambda fn, timeout=None: fn(page))
+
+        with patch("core_apps.pdf.services.PdfTemplateService.run_with_page", run_with_page):
+            merged = PdfTemplateService.render_batch_pdf_bytes(
+                self.published, [{"name": "Max"}, {"name": "Harry"}], mode="documents"
+            )
+
+        self.assertEqual(run_with_page.call_count, 1)
+        self.assertEqual(len(PdfReader(io.BytesIO(merged)).pages), 3)
+
+    def test_render_batch_rejects_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            PdfTemplateService.render_batch_pdf_bytes(self.published, [{}], mode="zip")
+
+    def test_render_batch_endpoint_streams_pdf(self):
+        self.client.force_authenticate(user=self.member)
+
+        with patch(
+            "core_apps.pdf.views.PdfTemplateService.render_batch_pdf_bytes", return_value=b"%PDF-batch"
+        ) as render_mock:
+            response = self.request_method(
+                "post",
+                f"pdf/templates/{self.published.id}/render-batch/",
+                data={"payloads": [{"name": "Max"}, {"name": "Harry"}]},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("application/pdf", response["Content-Type"])
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-batch")
+        self.assertEqual(render_mock.call_args.kwargs["mode"], "pages")
+
+    def test_render_batch_endpoint_validates_payloads(self):
+        self.client.force_authenticate(user=self.member)
+
+        for data in ({}, {"payloads": []}, {"payloads": ["x"]}, {"payloads": [{}], "mode": "zip"}):
+            with self.subTest(data=data):
+                response = self.request_method(
+                    "post", f"pdf/templates/{self.published.id}/render-batch/", data=data
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PdfTemplateCacheTests(EndpointSmokeMixin, APITestCase):
+    def setUp(self):
+        template_cache.clear()
+        self.admin = self.create_user_with_roles("ADMIN")
+        self.draft = PdfTemplate.objects.create(
+            typ="invoice",
+            bezeichnung="rechnung",
+            version=1,
+            status=PdfTemplate.Status.DRAFT,
+            source="<!--PDF:BODY--><div>{{ payload.name }}</div>",
+        )
+
+    def test_render_html_reuses_compiled_sections(self):
+        with patch("core_apps.pdf.services.PdfTemplateService.split_source", wraps=PdfTemplateService.split_source) as split:
+            first, _, _ = PdfTemplateService.render_html(self.draft, {"name": "Max"})
+            second, _, _ = PdfTemplateService.render_html(self.draft, {"name": "Harry"})
+
+        self.assertIn("Max", first)
+        self.assertIn("Harry", second)
+        self.assertEqual(split.call_count, 1)
+        self.assertEqual(template_cache.stats()["hits"], 1)
+        self.assertEqual(template_cache.stats()["misses"], 1)
+
+    def test_changed_source_is_recompiled(self):
+        PdfTemplateService.render_html(self.draft, {})
+        self.draft.source = "<!--PDF:BODY--><div>neu</div>"
+        self.draft.save()
+
+        html, _, _ = PdfTemplateService.render_html(self.draft, {})
+
+        self.assertIn("neu", html)
+
+    def test_publish_invalidates_template_entries(self):
+        PdfTemplateService.render_html(self.draft, {})
+        self.assertEqual(template_cache.stats()["size"], 1)
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.request_method("post", f"pdf/templates/{self.draft.id}/publish/", data={})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(template_cache.stats()["size"], 0)
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = type(template_cache)(max_size=2)
+        for key in ("a", "b", "a", "c"):
+            cache.get_or_build((key, 1, None), lambda: key)
+
+        self.assertEqual(cache.stats()["size"], 2)
+        self.assertEqual(cache.get_or_build(("a", 1, None), lambda: "rebuilt"), "a")
+        self.assertEqual(cache.get_or_build(("b", 1, None), lambda: "rebuilt"), "rebuilt")
+
+    def test_cache_stats_endpoint_requires_admin(self):
+        self.assert_requires_authentication("pdf/cache/stats/")
+        self.assert_forbidden_without_role("pdf/cache/stats/")
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.request_method("get", "pdf/cache/stats/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"size", "max_size", "hits", "misses"})
+
+
+class PdfOutputCacheTests(EndpointSmokeMixin, APITestCase):
+    def setUp(self):
+        self.tmp_media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.tmp_media.name, PDF_OUTPUT_CACHE_MAX_MB=1)
+        self.settings_override.enable()
+        self.admin = self.create_user_with_roles("ADMIN")
+        self.tmpl = PdfTemplate.objects.create(
+            typ="invoice",
+            bezeichnung="rechnung",
+            version=1,
+            status=PdfTemplate.Status.PUBLISHED,
+            source="<!--PDF:BODY--><div>{{ payload.name }}</div>",
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp_media.cleanup()
+
+    def _render(self, payload, **headers):
+        return self.client.post(
+            reverse("pdf-template-render", kwargs={"id": self.tmpl.id}),
+            data=payload,
+            format="json",
+            headers=headers,
+        )
+
+    def test_repeat_render_is_served_from_cache(self):
+        with patch("core_apps.pdf.views.PdfTemplateService.render_pdf_bytes", return_value=b"%PDF-1") as render_mock:
+            first = self._render({"name": "Max", "a": 1})
+            second = self._render({"a": 1, "name": "Max"})
+
+        self.assertEqual(render_mock.call_count, 1)
+        self.assertEqual(first.content, b"%PDF-1")
+        self.assertEqual(second.content, b"%PDF-1")
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_if_none_match_returns_304(self):
+        with patch("core_apps.pdf.views.PdfTemplateService.render_pdf_bytes", return_value=b"%PDF-1"):
+            first = self._render({"name": "Max"})
+            second = self._render({"name": "Max"}, **{"If-None-Match": first["ETag"]})
+            other = self._render({"name": "Harry"}, **{"If-None-Match": first["ETag"]})
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(other.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(other["ETag"], first["ETag"])
+
+    def test_templates_using_now_are_not_cached(self):
+        self.tmpl.source = "<!--PDF:BODY--><div>{{ now|date:'d.m.Y H:i' }}</div>"
+        self.tmpl.save()
+
+        with patch("core_apps.pdf.views.PdfTemplateService.render_pdf_bytes", return_value=b"%PDF-1") as render_mock:
+            first = self._render({})
+            self._render({})
+
+        self.assertEqual(render_mock.call_count, 2)
+        self.assertNotIn("ETag", first)
+
+    def test_cache_evicts_oldest_entries_above_size_limit(self):
+        cache = RenderedPdfCache(Path(self.tmp_media.name) / "evict", max_bytes=10)
+        cache.put("aa11", b"123456")
+        os.utime(cache.path_for("aa11"), (1, 1))
+        cache.put("bb22", b"123456")
+
+        self.assertFalse(cache.has("aa11"))
+        self.assertEqual(cache.get("bb22"), b"123456")
+
+
+class PdfContextAssetTests(APITestCase):
+    def setUp(self):
+        clear_asset_caches()
+
+    def test_logo_is_read_once_until_mtime_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            logo = Path(tmp) / "logo.png"
+            logo.write_bytes(b"v1")
+            with patch("core_apps.pdf.services.PdfTemplateService.file_to_base64", wraps=PdfTemplateService.file_to_base64) as read:
+                first = PdfTemplateService.cached_file_to_base64(logo)
+                PdfTemplateService.cached_file_to_base64(logo)
+                logo.write_bytes(b"v2")
+                os.utime(logo, ns=(logo.stat().st_mtime_ns + 10**9,) * 2)
+                second = PdfTemplateService.cached_file_to_base64(logo)
+
+        self.assertEqual(read.call_count, 2)
+        self.assertNotEqual(first, second)
+
+    def test_qr_code_is_memoized_per_text_and_box_size(self):
+        with patch("core_apps.pdf.services.qrcode.QRCode", wraps=qrcode.QRCode) as qr_cls:
+            a = PdfTemplateService.qr_base64_png("https://example.com")
+            b = PdfTemplateService.qr_base64_png("https://example.com")
+            c = PdfTemplateService.qr_base64_png("https://example.com", box_size=3)
+
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+        self.assertEqual(qr_cls.call_count, 2)
+
+    def test_unused_qr_code_is_never_generated(self):
+        tmpl = PdfTemplate(typ="x", bezeichnung="x", version=1, source="<!--PDF:BODY--><div>{{ payload.name }}</div>")
+
+        with patch("core_apps.pdf.services._qr_base64_png") as qr_mock:
+            PdfTemplateService.render_html(tmpl, {"name": "Max", "qr_text": "y"})
+        qr_mock.assert_not_called()
+
+        tmpl.source = '<!--PDF:BODY--><img src="data:image/png;base64,{{ qr_base64 }}">'
+        html, _, _ = PdfTemplateService.render_html(tmpl, {"qr_text": "y"})
+        self.assertIn(PdfTemplateService.qr_base64_png("y"), html)
+
+
+class PdfRenderJobTests(EndpointSmokeMixin, APITestCase):
+    def setUp(self):
+        self.tmp_media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.tmp_media.name, PDF_RENDER_JOB_WORKERS=0)
+        self.settings_override.enable()
+        self.admin = self.create_user_with_roles("ADMIN")
+        self.member = self.create_user_with_roles("MITGLIED")
+        self.tmpl = PdfTemplate.objects.create(
+            typ="invoice",
+            bezeichnung="rechnung",
+            version=1,
+            status=PdfTemplate.Status.PUBLISHED,
+            source="<!--PDF:BODY--><div>{{ payload.name }}</div>",
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp_media.cleanup()
+
+    def test_job_endpoints_resolve(self):
+        job_id = uuid4()
+        for endpoint in [
+            f"pdf/templates/{job_id}/render-jobs/",
+            f"pdf/jobs/{job_id}/",
+            f"pdf/jobs/{job_id}/download/",
+        ]:
+            with self.subTest(endpoint=endpoint):
+                self.assert_options_works(endpoint)
+                self.assert_requires_authentication(endpoint)
+
+    def test_job_runs_and_result_can_be_downloaded(self):
+        self.client.force_authenticate(user=self.member)
+
+        with patch("core_apps.pdf.jobs.PdfTemplateService.render_pdf_bytes", return_value=b"%PDF-job"):
+            response = self.request_method("post", f"pdf/templates/{self.tmpl.id}/render-jobs/", data={"name": "Max"})
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data["id"]
+
+        detail = self.request_method("get", f"pdf/jobs/{job_id}/")
+        self.assertEqual(detail.data["status"], PdfRenderJob.Status.DONE)
+        self.assertEqual(detail.data["count"], 1)
+
+        download = self.request_method("get", f"pdf/jobs/{job_id}/download/")
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(download.streaming_content), b"%PDF-job")
+        download.close()
+
+    def test_batch_job_uses_batch_renderer(self):
+        self.client.force_authenticate(user=self.member)
+
+        with patch(
+            "core_apps.pdf.jobs.PdfTemplateService.render_batch_pdf_bytes", return_value=b"%PDF-batch"
+        ) as batch_mock:
+            response = self.request_method(
+                "post",
+                f"pdf/templates/{self.tmpl.id}/render-jobs/",
+                data={"payloads": [{"name": "Max"}, {"name": "Harry"}], "mode": "documents"},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(batch_mock.call_args.kwargs["mode"], "documents")
+        self.assertEqual(len(batch_mock.call_args.args[1]), 2)
+
+    def test_failed_job_reports_error_and_blocks_download(self):
+        self.client.force_authenticate(user=self.member)
+
+        with patch(
+            "core_apps.pdf.jobs.PdfTemplateService.render_pdf_bytes",
+            side_effect=PdfRenderUnavailable("PDF rendering timed out."),
+        ):
+            response = self.request_method("post", f"pdf/templates/{self.tmpl.id}/render-jobs/", data={})
+
+        job_id = response.data["id"]
+        detail = self.request_method("get", f"pdf/jobs/{job_id}/")
+        self.assertEqual(detail.data["status"], PdfRenderJob.Status.FAILED)
+        self.assertIn("timed out", detail.data["error"])
+
+        download = self.request_method("get", f"pdf/jobs/{job_id}/download/")
+        self.assertEqual(download.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_jobs_are_only_visible_to_creator_or_admin(self):
+        job = PdfRenderJob.objects.create(template=self.tmpl, created_by=self.admin, payloads=[{}])
+
+        self.client.force_authenticate(user=self.member)
+        self.assertEqual(self.request_method("get", f"pdf/jobs/{job.id}/").status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.request_method("get", f"pdf/jobs/{job.id}/").status_code, status.HTTP_200_OK)
+
+    def test_job_is_handed_to_executor_after_commit(self):
+        executor = Mock()
+        self.client.force_authenticate(user=self.member)
+
+        with patch("core_apps.pdf.jobs.get_job_executor", return_value=executor), self.captureOnCommitCallbacks(execute=True):
+            response = self.request_method("post", f"pdf/templates/{self.tmpl.id}/render-jobs/", data={})
+
+        self.assertEqual(response.data["status"], PdfRenderJob.Status.PENDING)
+        self.assertEqual(executor.submit.call_count, 1)
+
+    def test_management_command_processes_pending_jobs_once(self):
+        job = PdfRenderJob.objects.create(template=self.tmpl, created_by=self.admin, payloads=[{"name": "Max"}])
+
+        with patch("core_apps.pdf.jobs.PdfTemplateService.render_pdf_bytes", return_value=b"%PDF") as render_mock:
+            call_command("process_pdf_render_jobs", stdout=io.StringIO())
+            call_command("process_pdf_render_jobs", stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PdfRenderJob.Status.DONE)
+        self.assertEqual(render_mock.call_count, 1)
+
+    def test_stale_running_job_is_failed_instead_of_polling_forever(self):
+        job = PdfRenderJob.objects.create(
+            template=self.tmpl,
+            created_by=self.member,
+            payloads=[{}],
+            status=PdfRenderJob.Status.RUNNING,
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        self.client.force_authenticate(user=self.member)
+
+        with self.settings(PDF_RENDER_JOB_TIMEOUT=600):
+            detail = self.request_method("get", f"pdf/jobs/{job.id}/")
+
+        self.assertEqual(detail.data["status"], PdfRenderJob.Status.FAILED)
+        self.assertIn("Zeitüberschreitung", detail.data["error"])
+
+    def test_pending_job_lost_on_worker_restart_is_failed_when_polled(self):
+        job = PdfRenderJob.objects.create(template=self.tmpl, created_by=self.member, payloads=[{}])
+        PdfRenderJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        fresh = PdfRenderJob.objects.create(template=self.tmpl, created_by=self.member, payloads=[{}])
+        self.client.force_authenticate(user=self.member)
+
+        with self.settings(PDF_RENDER_JOB_TIMEOUT=600):
+            detail = self.request_method("get", f"pdf/jobs/{job.id}/")
+            fresh_detail = self.request_method("get", f"pdf/jobs/{fresh.id}/")
+
+        self.assertEqual(detail.data["status"], PdfRenderJob.Status.FAILED)
+        self.assertEqual(fresh_detail.data["status"], PdfRenderJob.Status.PENDING)
+
+    def test_management_command_fails_stale_and_purges_old_running_jobs(self):
+        fresh = PdfRenderJob.objects.create(
+            template=self.tmpl, created_by=self.admin, payloads=[{}],
+            status=PdfRenderJob.Status.RUNNING, started_at=timezone.now(),
+        )
+        stale = PdfRenderJob.objects.create(
+            template=self.tmpl, created_by=self.admin, payloads=[{}],
+            status=PdfRenderJob.Status.RUNNING, started_at=timezone.now() - timedelta(minutes=30),
+        )
+        ancient = PdfRenderJob.objects.create(
+            template=self.tmpl, created_by=self.admin, payloads=[{}],
+            status=PdfRenderJob.Status.RUNNING, started_at=timezone.now() - timedelta(days=3),
+        )
+
+        with self.settings(PDF_RENDER_JOB_TIMEOUT=600, PDF_RENDER_JOB_TTL_HOURS=24):
+            call_command("process_pdf_render_jobs", "--purge-only", stdout=io.StringIO())
+
+        fresh.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual(fresh.status, PdfRenderJob.Status.RUNNING)
+        self.assertEqual(stale.status, PdfRenderJob.Status.FAILED)
+        self.assertFalse(PdfRenderJob.objects.filter(pk=ancient.pk).exists())
+
+
+class PdfAssetStoreTests(APITestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = PdfAssetStore(Path(self.tmp.name))
+        font = Path(self.tmp.name, "fonts.example.com", "Inter", "Inter-Regular.ttf")
+        font.parent.mkdir(parents=True)
+        font.write_bytes(b"font-bytes")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _route(self, url):
+        return Mock(request=SimpleNamespace(url=url))
+
+    def test_local_asset_is_fulfilled_from_memory_after_first_read(self):
+        url = "https://fonts.example.com/Inter/Inter-Regular.ttf"
+        first, second = self._route(url), self._route(url)
+
+        with patch.object(Path, "read_bytes", autospec=True, side_effect=lambda p: b"font-bytes") as read:
+            self.store.handle_route(first)
+            self.store.handle_route(second)
+
+        self.assertEqual(read.call_count, 1)
+        first.fulfill.assert_called_once_with(status=200, body=b"font-bytes", content_type="font/ttf")
+        second.fulfill.assert_called_once()
+
+    def test_unknown_remote_asset_is_blocked_and_traversal_rejected(self):
+        route = self._route("https://cdn.example.com/logo.png")
+        self.store.handle_route(route)
+        route.abort.assert_called_once_with("blockedbyclient")
+        route.fulfill.assert_not_called()
+
+        self.assertIsNone(self.store.path_for("https://fonts.example.com/../../etc/passwd"))
+
+        passthrough = PdfAssetStore(Path(self.tmp.name), block_remote=False)
+        route = self._route("https://cdn.example.com/logo.png")
+        passthrough.handle_route(route)
+        route.continue_.assert_called_once()
+
+    def test_print_page_installs_interception_and_waits_for_load(self):
+        page = Mock()
+        page.pdf.return_value = b"%PDF"
+
+        PdfTemplateService.print_page(page, "<html></html>")
+
+        page.route.assert_called_once()
+        page.set_content.assert_called_once_with("<html></html>", wait_until="load")
+
+    def test_fetch_command_downloads_missing_template_assets(self):
+        PdfTemplate.objects.create(
+            typ="ASSET",
+            bezeichnung="Asset",
+            version=1,
+            source=(
+                '<!--PDF:CSS--><style>@font-face { src: url("https://fonts.example.com/Inter/Inter-Regular.ttf") }'
+                ' .x { background: url(https://cdn.example.com/bg.png) }</style>'
+                '<!--PDF:BODY--><img src="https://cdn.example.com/bg.png">'
+            ),
+        )
+        self.assertEqual(
+            find_asset_urls(PdfTemplate.objects.get(typ="ASSET").source),
+            ["https://fonts.example.com/Inter/Inter-Regular.ttf", "https://cdn.example.com/bg.png"],
+        )
+
+        response = Mock(content=b"png-bytes")
+        with patch("core_apps.pdf.management.commands.fetch_pdf_assets.get_asset_store", return_value=self.store), patch(
+            "core_apps.pdf.management.commands.fetch_pdf_assets.requests.get", return_value=response
+        ) as get:
+            call_command("fetch_pdf_assets", stdout=io.StringIO())
+
+        get.assert_called_once_with("https://cdn.example.com/bg.png", timeout=20)
+        self.assertEqual(Path(self.tmp.name, "cdn.example.com", "bg.png").read_bytes(), b"png-bytes")
+
+
+class PdfDataProviderTests(EndpointSmokeMixin, APITestCase):
+    def setUp(self):
+        self.fmd_user = self.create_user_with_roles("FMD", "MITGLIED")
+        self.member = self.create_user_with_roles("MITGLIED")
+        Konfiguration.objects.create(fw_nummer="1", fw_name="FF Test", fw_ort="Testdorf")
+        self.ats = Mitglied.objects.create(stbnr=2, vorname="Anna", nachname="Berger", geburtsdatum=date(1990, 5, 1))
+        self.ohne_ats = Mitglied.objects.create(stbnr=1, vorname="Max", nachname="Auer", geburtsdatum=date(1985, 1, 1))
+        Mitglied.objects.create(
+            stbnr=3, vorname="Res", nachname="Erve", geburtsdatum=date(1950, 1, 1),
+            dienststatus=Mitglied.Dienststatus.RESERVE,
+        )
+        self.fmd = FMD.objects.create(
+            mitglied_id=self.ats,
+            naechste_untersuchung=date.today().year + 2,
+            tauglichkeit="tauglich",
+            leistungstest=f"01.03.{date.today().year}",
+            letzte_untersuchung=date(2025, 2, 3),
+        )
+        self.tmpl = PdfTemplate.objects.create(
+            typ="fmd-liste",
+            bezeichnung="liste",
+            version=1,
+            status=PdfTemplate.Status.PUBLISHED,
+            source=(
+                "<!--PDF:BODY-->{{ payload.fw_name }}|{% for item in payload.ats_traeger_liste %}"
+                "{{ item.nachname }}:{{ item.liste_ats }}:{{ item.liste_arzt }}:{{ item.liste_leistungstest }};{% endfor %}"
+            ),
+        )
+
+    def _render(self, user, data):
+        self.client.force_authenticate(user=user)
+        with patch("core_apps.pdf.views.PdfTemplateService.render_pdf_bytes", return_value=b"%PDF") as render:
+            response = self.request_method("post", f"pdf/templates/{self.tmpl.id}/render/", data=data)
+        return response, render
+
+    def test_gesamt_list_is_built_server_side_in_one_query(self):
+        with self.assertNumQueries(2):
+            payload = get_provider("fmd-liste").build({"liste": "gesamt"})
+
+        self.assertEqual(payload["fw_name"], "FF Test")
+        self.assertEqual([row["nachname"] for row in payload["ats_traeger_liste"]], ["Auer", "Berger"])
+        auer, berger = payload["ats_traeger_liste"]
+        self.assertEqual((auer["liste_ats"], auer["liste_arzt"]), ("Nein", "-"))
+        self.assertEqual(berger["liste_ats"], "Ja")
+        self.assertEqual(berger["liste_arzt"], f"OK | {date.today().year + 2}")
+        self.assertEqual(berger["liste_leistungstest"], "OK")
+        self.assertEqual(berger["letzte_untersuchung"], "2025-02-03")
+
+    def test_render_endpoint_uses_provider_params(self):
+        response, render = self._render(self.fmd_user, {"provider_params": {"liste": "tauglichkeit"}})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        html = render.call_args.args[0]
+        self.assertIn("FF Test|Berger:", html)
+        self.assertNotIn("Auer", html)
+
+    def test_provider_params_are_validated_and_role_checked(self):
+        response, _ = self._render(self.member, {"provider_params": {"liste": "gesamt"}})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response, _ = self._render(self.fmd_user, {"provider_params": {"liste": "alles"}})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.tmpl.typ = "invoice"
+        self.tmpl.save()
+        response, _ = self._render(self.fmd_user, {"provider_params": {}})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deckblatt_provider_loads_member_by_fmd_id(self):
+        payload = get_provider("fmd-deckblatt").build({"fmd_id": str(self.fmd.id)})
+
+        self.assertEqual(payload["mitglied_zuname"], "Berger")
+        self.assertEqual(payload["mitglied_letzte_untersuchung"], "2025-02-03")
+        with self.assertRaises(DRFValidationError):
+            get_provider("fmd-deckblatt").build({"fmd_id": "kein-uuid"})
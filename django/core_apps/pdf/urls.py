@@ -7,7 +7,12 @@ from .views import (
     PdfTemplateNewVersionView,
     PdfTemplatePreviewView,
     PdfTemplateRenderView,
+    PdfTemplateRenderBatchView,
     PdfTemplateTestView,
+    PdfTemplateCacheStatsView,
+    PdfTemplateRenderJobCreateView,
+    PdfRenderJobDetailView,
+    PdfRenderJobDownloadView,
 )
 
 router = DefaultRouter()
@@ -16,9 +21,14 @@ router.register(r"templates", PdfTemplateViewSet, basename="pdf-templates")
 urlpatterns = [
     path("", include(router.urls)),
 
+    path("jobs/<uuid:id>/", PdfRenderJobDetailView.as_view(), name="pdf-render-job-detail"),
+    path("jobs/<uuid:id>/download/", PdfRenderJobDownloadView.as_view(), name="pdf-render-job-download"),
+    path("cache/stats/", PdfTemplateCacheStatsView.as_view(), name="pdf-template-cache-stats"),
     path("templates/<uuid:id>/publish/", PdfTemplatePublishView.as_view(), name="pdf-template-publish"),
     path("templates/<uuid:id>/new-version/", PdfTemplateNewVersionView.as_view(), name="pdf-template-new-version"),
     path("templates/<uuid:id>/preview/", PdfTemplatePreviewView.as_view(), name="pdf-template-preview"),
     path("templates/<uuid:id>/render/", PdfTemplateRenderView.as_view(), name="pdf-template-render"),
+    path("templates/<uuid:id>/render-batch/", PdfTemplateRenderBatchView.as_view(), name="pdf-template-render-batch"),
+    path("templates/<uuid:id>/render-jobs/", PdfTemplateRenderJobCreateView.as_view(), name="pdf-template-render-job"),
     path("templates/<uuid:id>/test/", PdfTemplateTestView.as_view(), name="pdf-template-test"),
 ]
@@ -1,26 +1,83 @@
+import io
 import logging
+from datetime import timedelta
+from django.conf import settings
 from django.db.models import Max
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 
-from rest_framework import permissions
+from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.views import APIView
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.renderers import StaticHTMLRenderer
 
 from core_apps.common.logging_utils import log_event
 from core_apps.common.permissions import any_of, HasAnyRolePermission, HasReadOnlyRolePermission
-from .models import PdfTemplate
-from .serializers import PdfTemplateSerializer
-from .services import PdfTemplateService
+from .jobs import enqueue_render_job, fail_stale_jobs, job_is_stale, purge_finished_jobs
+from .models import PdfRenderJob, PdfTemplate
+from .output_cache import get_rendered_pdf_cache
+from .providers import PROVIDER_PARAMS_KEY, get_provider
+from .serializers import PdfRenderJobSerializer, PdfTemplateSerializer
+from .browser_pool import PdfRenderUnavailable
+from .services import BATCH_MODE_PAGES, BATCH_MODES, PdfTemplateService, template_cache
 from .renderers import PdfRenderer
 
 logger = logging.getLogger(__name__)
 LOG_SOURCE = "pdf"
 
 
+def _render_unavailable_response(exc: PdfRenderUnavailable, tmpl: PdfTemplate) -> Response:
+    log_event(logger, LOG_SOURCE, "template_render_unavailable", level="warning", template_id=tmpl.id, reason=str(exc))
+    resp = Response({"detail": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    resp["Retry-After"] = "5"
+    return resp
+
+
+def _resolve_payload(request, view, tmpl: PdfTemplate) -> dict:
+    """
+    Payload aus dem Request. Enthält er `provider_params`, baut der für `tmpl.typ` registrierte
+    Datenprovider die Daten serverseitig (Client schickt nur id/Filter statt fertiger Listen).
+    """
+    data = request.data or {}
+    if PROVIDER_PARAMS_KEY not in data:
+        return data
+
+    payload = {key: value for key, value in data.items() if key != PROVIDER_PARAMS_KEY}
+    params = data[PROVIDER_PARAMS_KEY]
+    if not isinstance(params, dict):
+        raise ValidationError({PROVIDER_PARAMS_KEY: "Muss ein Objekt sein."})
+
+    provider = get_provider(tmpl.typ)
+    if provider is None:
+        raise ValidationError({PROVIDER_PARAMS_KEY: f"Kein Datenprovider für Typ '{tmpl.typ}'."})
+    if not HasAnyRolePermission.with_roles(*provider.roles)().has_permission(request, view):
+        raise PermissionDenied("Keine Berechtigung für die Daten dieses Templates.")
+
+    payload.update(provider.build(params))
+    return payload
+
+
+def _validate_batch_request(data) -> tuple:
+    payloads = data.get("payloads")
+    if not isinstance(payloads, list) or not payloads:
+        raise ValidationError({"payloads": "Mindestens ein Payload erforderlich."})
+    if not all(isinstance(payload, dict) for payload in payloads):
+        raise ValidationError({"payloads": "Jeder Payload muss ein Objekt sein."})
+
+    max_items = getattr(settings, "PDF_BATCH_MAX_ITEMS", 500)
+    if len(payloads) > max_items:
+        raise ValidationError({"payloads": f"Maximal {max_items} Payloads pro Batch."})
+
+    mode = data.get("mode") or BATCH_MODE_PAGES
+    if mode not in BATCH_MODES:
+        raise ValidationError({"mode": f"Erlaubt: {', '.join(BATCH_MODES)}"})
+
+    return payloads, mode
+
+
 # -----------------------------
 # CRUD ViewSet (ohne actions)
 # -----------------------------
@@ -59,10 +116,18 @@ class PdfTemplateViewSet(ModelViewSet):
         self._assert_mutable(tmpl)
         return super().partial_update(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        instance = serializer.save()
+        PdfTemplateService.invalidate_compiled(instance)
+
     def destroy(self, request, *args, **kwargs):
         tmpl = self.get_object()
         return super().destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        PdfTemplateService.invalidate_compiled(instance)
+        instance.delete()
+
 
 # -----------------------------
 # Spezial-Endpunkte (APIView)
@@ -88,6 +153,7 @@ class PdfTemplatePublishView(APIView):
 
         tmpl.publish()
         tmpl.save(update_fields=["status", "published_at", "updated_at"])
+        PdfTemplateService.invalidate_compiled(tmpl)
         log_event(logger, LOG_SOURCE, "template_published", template_id=tmpl.id, typ=tmpl.typ, version=tmpl.version)
 
         return Response(PdfTemplateSerializer(tmpl).data)
@@ -111,6 +177,7 @@ class PdfTemplateNewVersionView(APIView):
             status=PdfTemplate.Status.DRAFT,
             source=tmpl.source,
         )
+        PdfTemplateService.invalidate_compiled(tmpl)
 
         log_event(logger, LOG_SOURCE, "template_new_version", source_template_id=tmpl.id, cloned_template_id=cloned.id, version=cloned.version)
 
@@ -118,6 +185,13 @@ class PdfTemplateNewVersionView(APIView):
         return Response(PdfTemplateSerializer(cloned).data, status=201)
 
 
+class PdfTemplateCacheStatsView(APIView):
+    permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN")]
+
+    def get(self, request):
+        return Response(template_cache.stats())
+
+
 class PdfTemplatePreviewView(APIView):
     renderer_classes = [StaticHTMLRenderer]
     permission_classes = [
@@ -141,6 +215,12 @@ class PdfTemplatePreviewView(APIView):
 
 
 class PdfTemplateRenderView(APIView):
+    """
+    Gerenderte PDFs werden serverseitig content-adressiert gecacht (Template-Version + Payload), eine
+    Wiederholung spart das Rendern. Das ETag nennt den Cache-Schlüssel; Browser revalidieren POST
+    nicht (Antwort bleibt no-store), 304 gibt es nur für API-Clients, die If-None-Match selbst senden.
+    Body: fertiger Payload oder {"provider_params": {...}} für Templates mit Datenprovider (providers.py).
+    """
     renderer_classes = [PdfRenderer]
     permission_classes = [
         permissions.IsAuthenticated,
@@ -154,19 +234,168 @@ class PdfTemplateRenderView(APIView):
         if (not is_admin) and tmpl.status != PdfTemplate.Status.PUBLISHED:
             raise ValidationError("Template not published.")
 
+        payload = _resolve_payload(request, self, tmpl)
+        cache = get_rendered_pdf_cache() if PdfTemplateService.is_output_cacheable(tmpl) else None
+        cache_key = cache.make_key(tmpl, payload) if cache else None
+        etag = f'"{cache_key}"' if cache_key else None
+
+        if cache_key:
+            if etag in parse_etags(request.headers.get("If-None-Match", "")) and cache.has(cache_key):
+                not_modified = HttpResponseNotModified()
+                not_modified["ETag"] = etag
+                return not_modified
+
+            pdf_bytes = cache.get(cache_key)
+            if pdf_bytes is not None:
+                log_event(logger, LOG_SOURCE, "template_render_cache_hit", template_id=tmpl.id, version=tmpl.version)
+                return self._pdf_response(tmpl, pdf_bytes, etag)
+
         try:
-            html, header_html, footer_html = PdfTemplateService.render_html(tmpl, request.data or {})
+            html, header_html, footer_html = PdfTemplateService.render_html(tmpl, payload)
         except ValueError as e:
             raise ValidationError(str(e))
 
-        pdf_bytes = PdfTemplateService.render_pdf_bytes(html, header_html, footer_html)
+        try:
+            pdf_bytes = PdfTemplateService.render_pdf_bytes(html, header_html, footer_html)
+        except PdfRenderUnavailable as e:
+            return _render_unavailable_response(e, tmpl)
         log_event(logger, LOG_SOURCE, "template_rendered", template_id=tmpl.id, typ=tmpl.typ, version=tmpl.version)
 
+        if cache_key:
+            try:
+                cache.put(cache_key, pdf_bytes)
+            except OSError as e:
+                log_event(logger, LOG_SOURCE, "template_render_cache_write_failed", level="warning", error=str(e))
+
+        return self._pdf_response(tmpl, pdf_bytes, etag)
+
+    def _pdf_response(self, tmpl: PdfTemplate, pdf_bytes: bytes, etag=None) -> Response:
         resp = Response(pdf_bytes, content_type="application/pdf")
         resp["Content-Disposition"] = f'inline; filename="{tmpl.typ}_v{tmpl.version}.pdf"'
+        if etag:
+            resp["ETag"] = etag
         return resp
 
 
+class PdfTemplateRenderBatchView(APIView):
+    """
+    POST {"payloads": [{...}, {...}], "mode": "pages" | "documents"}
+    Rendert alle Payloads in einer Browser-Session und liefert EIN PDF zurück.
+    """
+    renderer_classes = [PdfRenderer]
+    permission_classes = [
+        permissions.IsAuthenticated,
+        HasAnyRolePermission.with_roles("ADMIN", "MITGLIED"),
+    ]
+
+    def post(self, request, id):
+        tmpl = get_object_or_404(PdfTemplate, id=id)
+
+        is_admin = HasAnyRolePermission.with_roles("ADMIN")().has_permission(request, self)
+        if (not is_admin) and tmpl.status != PdfTemplate.Status.PUBLISHED:
+            raise ValidationError("Template not published.")
+
+        payloads, mode = _validate_batch_request(request.data)
+
+        try:
+            pdf_bytes = PdfTemplateService.render_batch_pdf_bytes(tmpl, payloads, mode=mode)
+        except ValueError as e:
+            raise ValidationError(str(e))
+        except PdfRenderUnavailable as e:
+            return _render_unavailable_response(e, tmpl)
+
+        log_event(
+            logger, LOG_SOURCE, "template_batch_rendered",
+            template_id=tmpl.id, typ=tmpl.typ, version=tmpl.version, count=len(payloads), mode=mode,
+        )
+
+        return FileResponse(
+            io.BytesIO(pdf_bytes),
+            content_type="application/pdf",
+            filename=f"{tmpl.typ}_v{tmpl.version}_batch.pdf",
+        )
+
+
+class PdfTemplateRenderJobCreateView(APIView):
+    """
+    Legt einen Render-Job an und antwortet sofort mit 202.
+    Body: Payload (Einzel-PDF) oder {"payloads": [...], "mode": "pages" | "documents"} (Batch).
+    Status: GET jobs/<id>/, Ergebnis: GET jobs/<id>/download/
+    """
+    permission_classes = [
+        permissions.IsAuthenticated,
+        HasAnyRolePermission.with_roles("ADMIN", "MITGLIED"),
+    ]
+
+    def post(self, request, id):
+        tmpl = get_object_or_404(PdfTemplate, id=id)
+
+        is_admin = HasAnyRolePermission.with_roles("ADMIN")().has_permission(request, self)
+        if (not is_admin) and tmpl.status != PdfTemplate.Status.PUBLISHED:
+            raise ValidationError("Template not published.")
+
+        if "payloads" in request.data:
+            payloads, mode = _validate_batch_request(request.data)
+        else:
+            payloads, mode = [_resolve_payload(request, self, tmpl)], PdfRenderJob.Mode.SINGLE
+
+        try:
+            PdfTemplateService.compile_sections(tmpl)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+        purge_finished_jobs(timedelta(hours=getattr(settings, "PDF_RENDER_JOB_TTL_HOURS", 24)))
+        job = PdfRenderJob.objects.create(
+            template=tmpl,
+            created_by=request.user,
+            mode=mode,
+            payloads=payloads,
+        )
+        log_event(logger, LOG_SOURCE, "render_job_created", job_id=job.id, template_id=tmpl.id, count=len(payloads), mode=mode)
+        enqueue_render_job(job)
+
+        return Response(PdfRenderJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+def _render_jobs_for(request, view):
+    qs = PdfRenderJob.objects.select_related("template")
+    is_admin = HasAnyRolePermission.with_roles("ADMIN")().has_permission(request, view)
+    return qs if is_admin else qs.filter(created_by=request.user)
+
+
+class PdfRenderJobDetailView(APIView):
+    permission_classes = [
+        permissions.IsAuthenticated,
+        HasAnyRolePermission.with_roles("ADMIN", "MITGLIED"),
+    ]
+
+    def get(self, request, id):
+        job = get_object_or_404(_render_jobs_for(request, self), id=id)
+        if job_is_stale(job):
+            fail_stale_jobs()
+            job.refresh_from_db()
+        return Response(PdfRenderJobSerializer(job).data)
+
+
+class PdfRenderJobDownloadView(APIView):
+    permission_classes = [
+        permissions.IsAuthenticated,
+        HasAnyRolePermission.with_roles("ADMIN", "MITGLIED"),
+    ]
+
+    def get(self, request, id):
+        job = get_object_or_404(_render_jobs_for(request, self), id=id)
+        if job.status != PdfRenderJob.Status.DONE or not job.result:
+            raise ValidationError(f"Job ist nicht fertig (Status: {job.status}).")
+
+        log_event(logger, LOG_SOURCE, "render_job_download", job_id=job.id)
+        return FileResponse(
+            job.result.open("rb"),
+            content_type="application/pdf",
+            filename=f"{job.template.typ}_v{job.template.version}.pdf",
+        )
+
+
 class PdfTemplateTestView(APIView):
     renderer_classes = [PdfRenderer]
     permission_classes = [permissions.IsAuthenticated, HasAnyRolePermission.with_roles("ADMIN")]
@@ -247,7 +476,10 @@ class PdfTemplateTestView(APIView):
         except ValueError as e:
             raise ValidationError(str(e))
 
-        pdf_bytes = PdfTemplateService.render_pdf_bytes(html, header_html, footer_html)
+        try:
+            pdf_bytes = PdfTemplateService.render_pdf_bytes(html, header_html, footer_html)
+        except PdfRenderUnavailable as e:
+            return _render_unavailable_response(e, tmpl)
         log_event(logger, LOG_SOURCE, "template_test_rendered", template_id=tmpl.id, typ=tmpl.typ, version=tmpl.version)
 
         resp = Response(pdf_bytes, content_type="application/pdf")
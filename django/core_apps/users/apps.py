@@ -5,4 +5,7 @@ from django.utils.translation import gettext_lazy as _
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core_apps.users"
-    verbose_name = _("Benutzer")
\ No newline at end of file
+    verbose_name = _("Benutzer")
+
+    def ready(self):
+        from . import signals  # noqa: F401
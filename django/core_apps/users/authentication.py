@@ -0,0 +1,49 @@
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from django.utils.functional import SimpleLazyObject, empty
+
+from .roles import remember_auth_stamp
+from .tokens import ROLES_VERSION_CLAIM, role_claims
+
+
+class LazyTokenUser(SimpleLazyObject):
+    """
+    request.user, das den Benutzer erst beim ersten Attributzugriff lädt. Ist der Rollen-Stand
+    des Tokens bestätigt (role_claims), beantworten is_authenticated und die Rollen-Permissions
+    den Request ohne User- und Rollenabfrage.
+    """
+
+    def __init__(self, func, token):
+        super().__init__(func)
+        self.__dict__["_token"] = token
+
+    def _user(self):
+        if self._wrapped is empty:
+            self._setup()
+        return self._wrapped
+
+    def __bool__(self):
+        # IsAuthenticated prüft `request.user and ...`; LazyObject würde dafür laden
+        return True
+
+    @property
+    def is_authenticated(self):
+        if self._wrapped is empty and role_claims(self._token) is not None:
+            return True
+        return self._user().is_authenticated
+
+    @property
+    def is_anonymous(self):
+        return not self.is_authenticated
+
+
+class RoleClaimsJWTCookieAuthentication(JWTCookieAuthentication):
+    def get_user(self, validated_token):
+        if ROLES_VERSION_CLAIM not in validated_token:
+            # Tokens ohne Rollen-Claims (vor der Umstellung ausgestellt)
+            return self._load_user(validated_token)
+        return LazyTokenUser(lambda: self._load_user(validated_token), validated_token)
+
+    def _load_user(self, validated_token):
+        user = super().get_user(validated_token)
+        remember_auth_stamp(user)
+        return user
@@ -3,6 +3,8 @@ from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from django.utils.translation import gettext_lazy as _
 
+from .roles import normalize_role_keys
+
 
 class CustomUserManager(BaseUserManager):
     def _extract_password(self, args, password, extra_fields):
@@ -62,7 +64,7 @@ class CustomUserManager(BaseUserManager):
         # Rollen setzen, falls übergeben (über self.model.Role zugreifen)
         if roles:
             Role = self.model.roles.rel.model  # Zugriff auf Role-Modell über User.roles
-            role_objs = Role.objects.filter(key__in=roles)
+            role_objs = Role.objects.filter(key__in=normalize_role_keys(roles))
             user.roles.set(role_objs)
 
         return user
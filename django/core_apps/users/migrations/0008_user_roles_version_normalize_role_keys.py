@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def normalize_role_keys(apps, schema_editor):
+    Role = apps.get_model("users", "Role")
+    existing = set(Role.objects.values_list("key", flat=True))
+    for role in Role.objects.all():
+        normalized = role.key.strip().upper()
+        # Kollisionen (z.B. "admin" neben "ADMIN") bleiben unverändert und müssen manuell bereinigt werden
+        if normalized == role.key or normalized in existing:
+            continue
+        existing.discard(role.key)
+        existing.add(normalized)
+        role.key = normalized
+        role.save(update_fields=["key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_user_last_invite_sent_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="roles_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(normalize_role_keys, migrations.RunPython.noop),
+    ]
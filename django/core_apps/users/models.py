@@ -2,11 +2,11 @@ import uuid
 
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
-from django.db.models import Q
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .managers import CustomUserManager
+from .roles import load_role_keys, normalize_role_key, normalize_role_keys
 
 
 class Role(models.Model):
@@ -19,6 +19,11 @@ class Role(models.Model):
     def __str__(self):
         return self.verbose_name
 
+    def save(self, *args, **kwargs):
+        # Normalisiert speichern: Abfragen laufen über den Unique-Index statt über iexact
+        self.key = normalize_role_key(self.key)
+        super().save(*args, **kwargs)
+
 
 class User(AbstractBaseUser, PermissionsMixin):
     pkid = models.BigAutoField(primary_key=True, editable=False)
@@ -30,6 +35,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     date_joined = models.DateTimeField(default=timezone.now)
     last_invite_sent_at = models.DateTimeField(null=True, blank=True)
+    # Wird bei jeder Änderung an `roles` erhöht (signals.py); Teil des Cache-Keys der Rollen
+    roles_version = models.PositiveIntegerField(default=0, editable=False)
 
     # Mitgliederzugehörigkeit (optional)
     mitglied = models.OneToOneField(
@@ -69,19 +76,24 @@ class User(AbstractBaseUser, PermissionsMixin):
     def get_short_name(self):
         return self.username
     
+    def get_role_keys(self) -> frozenset:
+        """Rollen-Keys, einmal je Instanz (= je Request) geladen; Änderungen an `roles` setzen das zurück."""
+        role_keys = getattr(self, "_role_keys", None)
+        if role_keys is None:
+            role_keys = self._role_keys = load_role_keys(self)
+        return role_keys
+
+    def clear_role_cache(self) -> None:
+        self.__dict__.pop("_role_keys", None)
+
     def has_role(self, key: str) -> bool:
-        normalized = str(key or "").strip()
+        normalized = normalize_role_key(key)
         if not normalized:
             return False
-        return self.roles.filter(key__iexact=normalized).exists()
+        return normalized in self.get_role_keys()
 
     def has_any_role(self, *keys: str) -> bool:
-        normalized_keys = [str(k or "").strip() for k in keys if str(k or "").strip()]
+        normalized_keys = normalize_role_keys(keys)
         if not normalized_keys:
             return False
-
-        query = Q()
-        for role_key in normalized_keys:
-            query |= Q(key__iexact=role_key)
-
-        return self.roles.filter(query).exists()
+        return not self.get_role_keys().isdisjoint(normalized_keys)
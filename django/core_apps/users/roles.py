@@ -0,0 +1,64 @@
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+
+def normalize_role_key(key) -> str:
+    """Rollen-Keys werden getrimmt und groß gespeichert/verglichen (ADMIN, FMD, ...)."""
+    return str(key or "").strip().upper()
+
+
+def normalize_role_keys(keys: Iterable) -> list:
+    return [normalized for normalized in (normalize_role_key(key) for key in keys or ()) if normalized]
+
+
+def role_cache_key(user) -> str:
+    # UUID statt pkid: Primärschlüssel können (z.B. nach Restore oder in Tests) neu vergeben werden
+    return f"users:roles:{user.id}:{user.roles_version}"
+
+
+def load_role_keys(user) -> frozenset:
+    """
+    Rollen-Keys eines Benutzers aus dem geteilten Cache, bei Miss aus der DB.
+    Der Cache-Key enthält `roles_version`, jede Änderung an den Rollen erzeugt damit einen neuen Eintrag.
+    """
+    if user.pk is None:
+        return frozenset()
+
+    key = role_cache_key(user)
+    keys = cache.get(key)
+    if keys is None:
+        keys = frozenset(normalize_role_key(k) for k in user.roles.values_list("key", flat=True))
+        cache.set(key, keys, getattr(settings, "USER_ROLE_CACHE_TIMEOUT", 300))
+    return keys
+
+
+def auth_stamp_key(user_id) -> str:
+    return f"users:auth_stamp:{user_id}"
+
+
+def remember_auth_stamp(user) -> None:
+    """
+    Merkt sich `roles_version` eines gerade aus der DB geladenen, aktiven Benutzers. Solange der
+    Eintrag existiert und zum Token passt, gelten die Rollen-Claims des Access-Tokens als aktuell.
+    """
+    cache.set(auth_stamp_key(user.id), user.roles_version, getattr(settings, "JWT_ROLE_CLAIMS_STAMP_TIMEOUT", 60))
+
+
+def forget_auth_stamps(user_ids: Iterable) -> None:
+    keys = [auth_stamp_key(user_id) for user_id in user_ids or ()]
+    if keys:
+        cache.delete_many(keys)
+
+
+def bump_roles_version(user_pks: Iterable) -> None:
+    user_pks = list(user_pks or ())
+    if not user_pks:
+        return
+    from core_apps.users.models import User
+
+    users = User.objects.filter(pk__in=user_pks)
+    users.update(roles_version=F("roles_version") + 1)
+    forget_auth_stamps(users.values_list("id", flat=True))
@@ -8,6 +8,7 @@ from rest_framework import serializers
 from core_apps.common.email import build_invite_url, send_account_invite_email
 from .models import User, Role
 from .invite_tokens import make_invite_token
+from .roles import normalize_role_key, normalize_role_keys
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +39,7 @@ def send_user_invite(user: User, request=None) -> bool:
 
 class RoleKeyRelatedField(serializers.SlugRelatedField):
     def to_internal_value(self, data):
-        role_key = str(data or "").strip()
+        role_key = normalize_role_key(data)
         if not role_key:
             self.fail("does_not_exist", slug_name=self.slug_field, value=data)
 
@@ -196,8 +197,7 @@ class AdminCreateUserSerializer(serializers.ModelSerializer):
         fields = ("username", "email", "password1", "password2", "send_invite", "roles", "mitglied_id")
 
     def validate(self, attrs):
-        roles = [str(role or "").strip() for role in (attrs.get("roles") or [])]
-        roles = [role for role in roles if role]
+        roles = normalize_role_keys(attrs.get("roles"))
 
         if not roles:
             raise serializers.ValidationError({"roles": "Mindestens eine Rolle ist erforderlich."})
@@ -0,0 +1,53 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Role, User
+from .roles import bump_roles_version, forget_auth_stamps
+
+
+@receiver(m2m_changed, sender=User.roles.through, dispatch_uid="users_roles_changed")
+def roles_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.roles.add/remove/set/clear
+        if action in ("post_add", "post_remove", "post_clear"):
+            bump_roles_version([instance.pk])
+            instance.roles_version += 1
+            instance.clear_role_cache()
+        return
+
+    # role.users.add/remove/clear
+    if action == "pre_clear":
+        instance._role_users_cleared = list(instance.users.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        bump_roles_version(pk_set)
+    elif action == "post_clear":
+        bump_roles_version(getattr(instance, "_role_users_cleared", ()))
+
+
+@receiver(post_save, sender=Role, dispatch_uid="users_role_saved")
+def role_saved(sender, instance, created, **kwargs):
+    if not created:
+        # Key kann sich geändert haben
+        bump_roles_version(instance.users.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Role, dispatch_uid="users_role_pre_delete")
+def role_pre_delete(sender, instance, **kwargs):
+    instance._role_users_deleted = list(instance.users.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Role, dispatch_uid="users_role_deleted")
+def role_deleted(sender, instance, **kwargs):
+    bump_roles_version(getattr(instance, "_role_users_deleted", ()))
+
+
+@receiver(post_save, sender=User, dispatch_uid="users_user_saved")
+def user_saved(sender, instance, created, **kwargs):
+    # z.B. deaktiviert: Rollen-Claims erst nach erneutem Laden des Benutzers wieder vertrauen
+    if not created:
+        forget_auth_stamps([instance.id])
+
+
+@receiver(post_delete, sender=User, dispatch_uid="users_user_deleted")
+def user_deleted(sender, instance, **kwargs):
+    forget_auth_stamps([instance.id])
@@ -9,7 +9,9 @@ from django.urls import reverse
 from dj_rest_auth.app_settings import api_settings as rest_auth_settings
 from rest_framework import status
 from rest_framework.test import APITestCase, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
 
+from core_apps.common.permissions import HasAnyRolePermission
 from core_apps.common.test_helpers import EndpointSmokeMixin
 from core_apps.fahrzeuge.views import make_public_token, read_public_token
 from core_apps.inventar.models import Inventar
@@ -18,6 +20,8 @@ from core_apps.users.serializers import UserSerializer, UserSelfSerializer
 from core_apps.users.views import CustomUserDetailsView, ForceLogoutView
 from core_apps.users.renderers import UserJSONRenderer
 from core_apps.users.adapter import UserAdapter
+from core_apps.users.authentication import RoleClaimsJWTCookieAuthentication
+from core_apps.users.tokens import RoleClaimsRefreshToken
 from core_apps.users.invite_tokens import make_invite_token
 
 from .models import Role
@@ -378,6 +382,88 @@ class UserSecurityTests(APITestCase):
         self.assertEqual(admin_entry["invite_status"], "password_set")
 
 
+class UserRoleCacheTests(TestCase):
+    def setUp(self):
+        self.role_admin = Role.objects.create(key="ADMIN", verbose_name="Admin")
+        self.role_member = Role.objects.create(key=" mitglied ", verbose_name="Mitglied")
+        self.user = User.objects.create_user(username="role_cache", password="Strong!123")
+        self.user.roles.add(self.role_member)
+
+    def test_role_keys_are_normalized(self):
+        self.assertEqual(self.role_member.key, "MITGLIED")
+        self.assertTrue(self.user.has_role("mitglied"))
+
+    def test_role_checks_are_memoized_per_instance_and_shared_across_requests(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.has_role("MITGLIED"))
+        with self.assertNumQueries(0):
+            self.assertFalse(user.has_role("ADMIN"))
+            self.assertTrue(user.has_any_role("ADMIN", "MITGLIED"))
+
+        next_request_user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(next_request_user.has_role("MITGLIED"))
+
+    def test_role_changes_invalidate_cache(self):
+        self.assertFalse(self.user.has_role("ADMIN"))
+
+        self.user.roles.add(self.role_admin)
+        self.assertTrue(self.user.has_role("ADMIN"))
+
+        self.role_admin.users.remove(self.user)
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_role("ADMIN"))
+
+        self.role_member.delete()
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_role("MITGLIED"))
+
+
+class RoleClaimsTokenTests(TestCase):
+    def setUp(self):
+        self.role_admin = Role.objects.create(key="ADMIN", verbose_name="Admin")
+        self.role_member = Role.objects.create(key="MITGLIED", verbose_name="Mitglied")
+        self.user = User.objects.create_user(username="claims_user", password="Strong!123")
+        self.user.roles.add(self.role_admin)
+        self.access = str(RoleClaimsRefreshToken.for_user(User.objects.get(pk=self.user.pk)).access_token)
+        self.admin_permission = HasAnyRolePermission.with_roles("ADMIN")()
+
+    def _authenticate(self, access=None):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access or self.access}")
+        user, token = RoleClaimsJWTCookieAuthentication().authenticate(request)
+        return SimpleNamespace(user=user, auth=token, method="GET")
+
+    def test_access_token_carries_role_claims(self):
+        token = AccessToken(self.access)
+
+        self.assertEqual(token["roles"], ["ADMIN"])
+        self.assertEqual(token["roles_version"], User.objects.get(pk=self.user.pk).roles_version)
+
+    def test_permission_uses_claims_once_stamp_is_confirmed(self):
+        # Erster Request lädt den Benutzer und bestätigt den Rollen-Stand
+        self.assertTrue(self.admin_permission.has_permission(self._authenticate(), None))
+
+        request = self._authenticate()
+        with self.assertNumQueries(0):
+            self.assertTrue(request.user and request.user.is_authenticated)
+            self.assertTrue(self.admin_permission.has_permission(request, None))
+            self.assertFalse(HasAnyRolePermission.with_roles("MITGLIED")().has_permission(request, None))
+
+    def test_role_change_makes_claims_stale(self):
+        self.assertTrue(self.admin_permission.has_permission(self._authenticate(), None))
+
+        self.user.roles.remove(self.role_admin)
+
+        self.assertFalse(self.admin_permission.has_permission(self._authenticate(), None))
+
+    def test_refresh_restamps_role_claims(self):
+        refresh = RoleClaimsRefreshToken.for_user(self.user)
+        self.user.roles.add(self.role_member)
+
+        access = RoleClaimsRefreshToken(str(refresh)).access_token
+
+        self.assertEqual(access["roles"], ["ADMIN", "MITGLIED"])
+        self.assertEqual(access["roles_version"], User.objects.get(pk=self.user.pk).roles_version)
+
+
 class PublicTokenHelperTests(TestCase):
     def test_make_and_read_public_token_returns_expected_scope(self):
         token = make_public_token()
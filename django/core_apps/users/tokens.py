@@ -0,0 +1,69 @@
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from dj_rest_auth.jwt_auth import CookieTokenRefreshSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .roles import auth_stamp_key
+
+ROLES_CLAIM = "roles"
+ROLES_VERSION_CLAIM = "roles_version"
+
+
+def stamp_role_claims(token, user) -> None:
+    token[ROLES_CLAIM] = sorted(user.get_role_keys())
+    token[ROLES_VERSION_CLAIM] = user.roles_version
+
+
+def role_claims(token) -> Optional[frozenset]:
+    """
+    Rollen aus den Claims eines Access-Tokens, wenn dessen `roles_version` zum gemerkten Stand
+    des Benutzers passt (remember_auth_stamp). Sonst None: dann entscheidet die DB.
+    """
+    if token is None:
+        return None
+    try:
+        roles = token[ROLES_CLAIM]
+        version = token[ROLES_VERSION_CLAIM]
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except (KeyError, TypeError):
+        return None
+    if cache.get(auth_stamp_key(user_id)) != version:
+        return None
+    return frozenset(roles)
+
+
+class RoleClaimsRefreshToken(RefreshToken):
+    """
+    Refresh-Token mit Rollen-Claims. Jedes daraus erzeugte Access-Token bekommt die Rollen neu aus
+    der DB (einmal je Access-Token-Laufzeit), über die Rotation auch der neue Refresh-Token.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        stamp_role_claims(token, user)
+        token._claims_user = user
+        return token
+
+    @property
+    def access_token(self):
+        user = getattr(self, "_claims_user", None)
+        if user is None:
+            user = get_user_model().objects.filter(
+                **{jwt_settings.USER_ID_FIELD: self.payload.get(jwt_settings.USER_ID_CLAIM)}
+            ).first()
+        if user is not None:
+            stamp_role_claims(self, user)
+        return super().access_token
+
+
+class RoleClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RoleClaimsRefreshToken
+
+
+class RoleClaimsTokenRefreshSerializer(CookieTokenRefreshSerializer):
+    token_class = RoleClaimsRefreshToken
@@ -7,6 +7,7 @@ from rest_framework import generics, permissions, status, viewsets
 from rest_framework.views import APIView
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
+from dj_rest_auth.jwt_auth import get_refresh_view
 from dj_rest_auth.views import LoginView, LogoutView
 from dj_rest_auth.app_settings import api_settings as rest_auth_settings
 
@@ -22,6 +23,8 @@ from .serializers import (
     send_user_invite,
 )
 from .invite_tokens import resolve_invite_token
+from .tokens import RoleClaimsTokenRefreshSerializer
+from core_apps.common.http_cache import CACHE_PRIVATE, CachePolicyMixin
 from core_apps.common.permissions import IsAdminPermission, HasAnyRolePermission
 
 
@@ -39,6 +42,10 @@ class PublicLoginView(LoginView):
     permission_classes = [permissions.AllowAny]
 
 
+class RoleClaimsTokenRefreshView(get_refresh_view()):
+    serializer_class = RoleClaimsTokenRefreshSerializer
+
+
 class CustomUserDetailsView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSelfSerializer
     permission_classes = [
@@ -60,16 +67,16 @@ class UserListView(generics.ListAPIView):
     renderer_classes = [UserJSONRenderer]
 
 
-class UserContextView(APIView):
+class UserContextView(CachePolicyMixin, APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdminPermission]
     renderer_classes = [UserJSONRenderer]
+    cache_policy = CACHE_PRIVATE
 
     def get(self, request):
-        from core_apps.mitglieder.models import Mitglied
-        from core_apps.mitglieder.serializers import MitgliedSerializer
+        from core_apps.mitglieder.directory import snapshot as mitglieder_snapshot
 
         rollen = RoleSerializer(Role.objects.all(), many=True).data
-        mitglieder = MitgliedSerializer(Mitglied.objects.all(), many=True).data
+        mitglieder = mitglieder_snapshot("alle")
         return Response({"rollen": rollen, "mitglieder": mitglieder})
 
 
@@ -1,7 +1,10 @@
 from datetime import timedelta
 from pathlib import Path
+import atexit
 import re
+import shutil
 import sys
+import tempfile
 
 import environ, os
 env = environ.Env()
@@ -51,6 +54,7 @@ LOCAL_APPS = [
     "core_apps.anwesenheitsliste",
     "core_apps.jugend",
     "core_apps.wartung_service",
+    "core_apps.media",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -143,8 +147,53 @@ JWT_REFRESH_COOKIE_PATH = f"{API_URL_PREFIX}auth/token/refresh/"
 
 MEDIA_URL = f"/{API_URL_PATH}files/"
 MEDIA_ROOT = os.path.join(ROOT_DIR, "mediafiles")
+if TESTING:
+    # Tests speichern Uploads (inkl. blobs/ der ContentAddressedStorage) nicht ins Arbeitsverzeichnis
+    MEDIA_ROOT = tempfile.mkdtemp(prefix="blaulicht-test-media-")
+    atexit.register(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+
+# Datei-Downloads per nginx X-Accel-Redirect ausliefern (Verzeichnis -> interne nginx-Location).
+# Ohne nginx davor (lokal, Tests) streamt Django die Datei selbst.
+FILE_ACCEL_REDIRECT = env.bool("DJANGO_FILE_ACCEL_REDIRECT", default=False)
+FILE_ACCEL_LOCATIONS = {
+    MEDIA_ROOT: "/internal/media/",
+    "/app/backups/": "/internal/backups/",
+}
 
-DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+# Verkleinerte Bildvarianten (thumb/medium) unter MEDIA_ROOT/cache/derivatives
+MEDIA_DERIVATIVE_FORMAT = env("MEDIA_DERIVATIVE_FORMAT", default="WEBP")
+MEDIA_DERIVATIVE_QUALITY = env.int("MEDIA_DERIVATIVE_QUALITY", default=80)
+# Uploads: längste Kante begrenzen, rekomprimieren, EXIF-Orientierung anwenden und Metadaten entfernen
+MEDIA_UPLOAD_NORMALIZE = env.bool("MEDIA_UPLOAD_NORMALIZE", default=True)
+MEDIA_UPLOAD_MAX_EDGE = env.int("MEDIA_UPLOAD_MAX_EDGE", default=2560)
+MEDIA_UPLOAD_QUALITY = env.int("MEDIA_UPLOAD_QUALITY", default=85)
+# Dateiindex für den Orphan-Cleanup (MEDIA_ROOT/cache/media_index.sqlite3): parallele Ordner-Scans beim Aufbau
+MEDIA_INDEX_SCAN_WORKERS = env.int("MEDIA_INDEX_SCAN_WORKERS", default=4)
+
+# HTTP-Caching je Route (core_apps.common.http_cache), alles ohne Policy bleibt no-store
+# Öffentliche Medien (news/, homepage/): kurz cachen, dann per ETag revalidieren (URLs sind nicht versioniert)
+HTTP_CACHE_MEDIA_MAX_AGE = env.int("HTTP_CACHE_MEDIA_MAX_AGE", default=300)
+HTTP_CACHE_PUBLIC_MAX_AGE = env.int("HTTP_CACHE_PUBLIC_MAX_AGE", default=60)
+# Rollen je Benutzer im Django-Cache (Key enthält User.roles_version, Änderungen invalidieren sofort)
+USER_ROLE_CACHE_TIMEOUT = env.int("USER_ROLE_CACHE_TIMEOUT", default=300)
+# Rollen-Claims im Access-Token gelten ohne DB-Abfrage, solange der gemerkte Rollen-Stand passt.
+# Rollenänderungen löschen den Stand sofort; mit prozesslokalem Cache (LocMem) greift das in anderen
+# Workern erst nach diesem Timeout - für sofortige Wirkung einen geteilten Cache (Redis) konfigurieren.
+JWT_ROLE_CLAIMS_STAMP_TIMEOUT = env.int("JWT_ROLE_CLAIMS_STAMP_TIMEOUT", default=60)
+
+# Mitglieder-Import (FDISK): Zeilen je Block (eine Abfrage + bulk_create/bulk_update je Block)
+MITGLIEDER_IMPORT_BATCH_SIZE = env.int("MITGLIEDER_IMPORT_BATCH_SIZE", default=500)
+# Mitgliederverzeichnis (core_apps.mitglieder.directory): Cache-Einträge gelten je Verzeichnisstand
+MITGLIEDER_DIRECTORY_CACHE_TIMEOUT = env.int("MITGLIEDER_DIRECTORY_CACHE_TIMEOUT", default=3600)
+# Löschmarken für Deltas; ältere `since`-Stände bekommen danach wieder die volle Liste
+MITGLIEDER_DIRECTORY_TOMBSTONE_DAYS = env.int("MITGLIEDER_DIRECTORY_TOMBSTONE_DAYS", default=30)
+
+# Uploads inhaltsadressiert (core_apps.media.storage): gleiche Inhalte liegen nur einmal unter MEDIA_ROOT/blobs
+MEDIA_DEDUPLICATE = env.bool("MEDIA_DEDUPLICATE", default=True)
+STORAGES = {
+    "default": {"BACKEND": "core_apps.media.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
@@ -162,7 +211,7 @@ REST_FRAMEWORK = {
     'DATETIME_FORMAT': '%d.%m.%YT%H:%M:%S',
     'DATETIME_INPUT_FORMATS': ['%d.%m.%YT%H:%M:%S', 'iso-8601'],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "dj_rest_auth.jwt_auth.JWTCookieAuthentication",
+        "core_apps.users.authentication.RoleClaimsJWTCookieAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -192,6 +241,7 @@ REST_AUTH = {
     "JWT_AUTH_COOKIE_USE_CSRF": True,
     "JWT_AUTH_COOKIE_ENFORCE_CSRF_ON_UNAUTHENTICATED": True,
     "USER_DETAILS_SERIALIZER": "core_apps.users.serializers.UserDetailSerializer",
+    "JWT_TOKEN_CLAIMS_SERIALIZER": "core_apps.users.tokens.RoleClaimsTokenObtainPairSerializer",
 }
 
 SIMPLE_JWT = {
@@ -249,3 +299,23 @@ BLAULICHTSMS_DASHBOARD_SESSION_ID = env.str(
     default=env.str("BLAULICHTSMS_DASHBOARD_SESSIONID", default=""),
 )
 BLAULICHTSMS_TIMEOUT = env.int("BLAULICHTSMS_TIMEOUT", default=10)
+
+# PDF Rendering (Playwright/Chromium Pool pro gunicorn Worker, 0 = Browser pro Render starten)
+PDF_RENDER_POOL_SIZE = env.int("PDF_RENDER_POOL_SIZE", default=0 if TESTING else 2)
+PDF_RENDER_MAX_RENDERS = env.int("PDF_RENDER_MAX_RENDERS", default=200)
+PDF_RENDER_MAX_MEMORY_MB = env.int("PDF_RENDER_MAX_MEMORY_MB", default=768)
+# Speicher nur jedes n-te Rendern prüfen (CDP-Roundtrip)
+PDF_RENDER_MEMORY_CHECK_EVERY = env.int("PDF_RENDER_MEMORY_CHECK_EVERY", default=10)
+PDF_RENDER_QUEUE_SIZE = env.int("PDF_RENDER_QUEUE_SIZE", default=20)
+PDF_RENDER_TIMEOUT = env.int("PDF_RENDER_TIMEOUT", default=60)
+PDF_BATCH_MAX_ITEMS = env.int("PDF_BATCH_MAX_ITEMS", default=500)
+PDF_TEMPLATE_CACHE_SIZE = env.int("PDF_TEMPLATE_CACHE_SIZE", default=64)
+PDF_OUTPUT_CACHE_MAX_MB = env.int("PDF_OUTPUT_CACHE_MAX_MB", default=0 if TESTING else 256)
+PDF_RENDER_JOB_WORKERS = env.int("PDF_RENDER_JOB_WORKERS", default=0 if TESTING else 2)
+PDF_RENDER_JOB_TTL_HOURS = env.int("PDF_RENDER_JOB_TTL_HOURS", default=24)
+# RUNNING Jobs, die länger laufen, gelten als abgebrochen (Worker beendet) und werden FAILED
+PDF_RENDER_JOB_TIMEOUT = env.int("PDF_RENDER_JOB_TIMEOUT", default=900)
+# Lokale Kopien von Fonts/Bildern/CSS, die Templates per http(s) referenzieren (<dir>/<host>/<pfad>)
+PDF_ASSET_DIR = env("PDF_ASSET_DIR", default=str(ROOT_DIR / "static" / "pdf" / "assets"))
+PDF_BLOCK_REMOTE_ASSETS = env.bool("PDF_BLOCK_REMOTE_ASSETS", default=True)
+PDF_ASSET_CACHE_MAX_MB = env.int("PDF_ASSET_CACHE_MAX_MB", default=32)
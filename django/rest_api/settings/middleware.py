@@ -1,11 +1,39 @@
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.utils.http import parse_http_date_safe
+
+from core_apps.common.http_cache import NO_STORE_HEADER
+
+
 class APICacheControlMiddleware:
+    """
+    Standard für alle Antworten ist no-store (authentifizierte API-Daten). Views mit Cache-Policy
+    (CachePolicyMixin) setzen ihren Cache-Control selbst; für diese ergänzt die Middleware ein ETag
+    und beantwortet If-None-Match/If-Modified-Since mit 304.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         response = self.get_response(request)
-        response['Cache-Control'] = 'no-store, no-cache, must-revalidate, proxy-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
 
+        cache_control = response.get("Cache-Control", "")
+        if not cache_control or "no-store" in cache_control:
+            response['Cache-Control'] = NO_STORE_HEADER
+            response['Pragma'] = 'no-cache'
+            response['Expires'] = '0'
+            return response
+
+        if request.method not in ("GET", "HEAD") or response.status_code != 200:
+            return response
+
+        if not response.streaming and not response.has_header("ETag"):
+            set_response_etag(response)
+
+        last_modified = parse_http_date_safe(response.get("Last-Modified", ""))
+        return get_conditional_response(
+            request,
+            etag=response.get("ETag"),
+            last_modified=last_modified,
+            response=response,
+        )
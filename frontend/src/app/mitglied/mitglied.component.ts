@@ -22,7 +22,6 @@ import { MatInputModule } from '@angular/material/input';
 import { MatPaginator, MatPaginatorModule } from '@angular/material/paginator';
 import { MatSelectModule } from '@angular/material/select';
 import { MatTableDataSource, MatTableModule } from '@angular/material/table';
-import * as Papa from 'papaparse';
 import { MatSort } from '@angular/material/sort';
 import { DateInputMaskDirective } from '../_directive/date-input-mask.directive';
 
@@ -45,13 +44,12 @@ type ImportSummary = {
   unchanged: number;
   total_changes: number;
   total_rows: number;
+  skipped_rows?: number;
 };
 
 type ImportPreviewResponse = { changes?: ImportChange[]; summary?: ImportSummary };
 type ImportApplyResponse = { summary?: { created: number; updated: number } };
 
-type CsvRawRow = Record<string, string | number | boolean | null | undefined>;
-
 @Component({
     selector: 'app-mitglied',
     imports: [
@@ -100,7 +98,7 @@ export class MitgliedComponent implements OnInit {
 
   mitglieder: IMitglied[] = [];
   breadcrumb: ImrBreadcrumbItem[] = [];
-  importRows: CsvRawRow[] = [];
+  importFile: File | null = null;
   importChanges: ImportChange[] = [];
   importSummary: ImportSummary | null = null;
 
@@ -171,24 +169,8 @@ export class MitgliedComponent implements OnInit {
       return;
     }
     const file = input.files[0];
-
-    Papa.parse<CsvRawRow>(file, {
-      header: true,
-      skipEmptyLines: true,
-      delimiter: ';',
-      complete: (results) => {
-        const parsed = results.data;
-
-        if (parsed.length > 0) {
-          this.previewImport(parsed);
-        } else {
-          this.uiMessageService.erstelleMessage('info', 'Keine CSV-Daten gefunden.');
-        }
-
-        input.value = '';
-      },
-      error: () => this.uiMessageService.erstelleMessage('error', 'CSV Parsing Fehler.')
-    });
+    input.value = '';
+    this.previewImport(file);
   }
 
   transformArray<T extends Record<string, unknown>>(
@@ -211,10 +193,17 @@ export class MitgliedComponent implements OnInit {
     this.dataSource.paginator?.firstPage();
   }
 
-  previewImport(entries: CsvRawRow[]): void {
-    this.importRows = entries;
-    const url = `${this.modul}/import`;
-    this.apiHttpService.post<ImportPreviewResponse>(url, { mode: 'preview', rows: entries }, false).subscribe({
+  private importFormData(file: File, mode: 'preview' | 'apply'): FormData {
+    const fd = new FormData();
+    fd.append('mode', mode);
+    fd.append('file', file);
+    return fd;
+  }
+
+  previewImport(file: File): void {
+    this.importFile = file;
+    const url = `${this.modul}/import/csv`;
+    this.apiHttpService.post<ImportPreviewResponse>(url, this.importFormData(file, 'preview'), true).subscribe({
       next: (erg: ImportPreviewResponse) => {
         this.importChanges = erg?.changes ?? [];
         this.importSummary = erg?.summary ?? null;
@@ -225,13 +214,13 @@ export class MitgliedComponent implements OnInit {
   }
 
   importBestaetigen(): void {
-    if (this.importRows.length === 0) {
+    if (!this.importFile) {
       this.uiMessageService.erstelleMessage('info', 'Keine Importdaten vorhanden.');
       return;
     }
 
-    const url = `${this.modul}/import`;
-    this.apiHttpService.post<ImportApplyResponse>(url, { mode: 'apply', rows: this.importRows }, false).subscribe({
+    const url = `${this.modul}/import/csv`;
+    this.apiHttpService.post<ImportApplyResponse>(url, this.importFormData(this.importFile, 'apply'), true).subscribe({
       next: (erg: ImportApplyResponse) => {
         const summary = erg?.summary ?? { created: 0, updated: 0 };
         this.uiMessageService.erstelleMessage('success', `${summary.created} neu, ${summary.updated} aktualisiert.`);
@@ -250,7 +239,7 @@ export class MitgliedComponent implements OnInit {
   }
 
   importAbbrechen(): void {
-    this.importRows = [];
+    this.importFile = null;
     this.importChanges = [];
     this.importSummary = null;
   }
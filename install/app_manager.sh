@@ -263,6 +263,7 @@ function do_update() {
     set_env_var_if_missing ".envs/.django" "DJANGO_EMAIL_HOST_PASSWORD" "9d9MXrBA9jKYmAMq"
     set_env_var_if_missing ".envs/.django" "DJANGO_DEFAULT_FROM_EMAIL" "app@blaulichtcloud.at"
     set_env_var_if_missing ".envs/.django" "DJANGO_EMAIL_TIMEOUT" "10"
+    set_env_var_if_missing ".envs/.django" "DJANGO_FILE_ACCEL_REDIRECT" "True"
 
 
     APP_ORIGIN="https://$DOMAIN_CURRENT"